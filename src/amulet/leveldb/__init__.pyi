@@ -5,7 +5,196 @@ import typing
 
 from . import _leveldb, _version
 
-__all__: list = ["LevelDB", "LevelDBEncrypted", "LevelDBException", "LevelDBIterator"]
+__all__: list = [
+    "BlockCache",
+    "BulkImport",
+    "BulkLoader",
+    "Compaction",
+    "LevelDB",
+    "LevelDBEncrypted",
+    "LevelDBException",
+    "LevelDBIterator",
+    "Snapshot",
+    "WriteBatch",
+]
+
+class BlockCache:
+    """
+    A cache of uncompressed blocks that can be shared between databases.
+
+    Sharing one cache puts a single bound on the block cache memory used by all databases that use it.
+    """
+
+    def __init__(self, capacity: typing.SupportsInt) -> None:
+        """
+        Construct a new block cache.
+
+        :param capacity: The maximum size of the cache in bytes.
+        """
+
+    @property
+    def capacity(self) -> int:
+        """
+        The maximum size of the cache in bytes.
+        Reducing the capacity evicts unused blocks until the cache fits.
+        """
+
+    @capacity.setter
+    def capacity(self, arg1: typing.SupportsInt) -> None: ...
+    @property
+    def usage(self) -> int:
+        """
+        The combined size of the blocks in the cache in bytes.
+        """
+
+class BulkImport:
+    """
+    Buffers writes into large unsynchronised batches to import data quickly.
+
+    Create this with :meth:`LevelDB.bulk_import`.
+    Writes are not atomic and may not be visible until they are flushed.
+    If the process crashes before :meth:`finish` is called some of the writes may be lost.
+    """
+
+    def __enter__(self) -> BulkImport: ...
+    def __exit__(
+        self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any
+    ) -> None: ...
+    def delete(self, key: bytes) -> None:
+        """
+        Delete a key from the database.
+        """
+
+    def finish(self) -> None:
+        """
+        Write the remaining data, sync it to disk and compact the modified range if enabled.
+        Other methods will error after this is called.
+        """
+
+    def put(self, key: bytes, value: bytes) -> None:
+        """
+        Set a value in the database.
+        """
+
+    def put_many(self, pairs: collections.abc.Iterable[tuple[bytes, bytes]]) -> None:
+        """
+        Set a value in the database for each key, value pair.
+
+        :param pairs: An iterable of key, value pairs. Eg. dict.items()
+        """
+
+class BulkLoader:
+    """
+    Writes sorted data directly to table files and adds them to a database.
+
+    This skips the log, the memtable and the compaction work that normal writes go through,
+    which makes it much faster than :meth:`LevelDB.put_batch` for importing large amounts of data.
+    Each table is added to the deepest level that does not overlap existing data.
+
+    The database is locked until the loader is finished or abandoned so it cannot be opened in the mean time.
+    Loaded values replace existing values with the same key.
+    The database is only modified when :meth:`finish` is called.
+
+    >>> with BulkLoader(path, True) as loader:
+    >>>     loader.add_many(sorted(data.items()))
+    >>> db = LevelDB(path)
+    """
+
+    def __enter__(self) -> BulkLoader: ...
+    def __exit__(
+        self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any
+    ) -> None: ...
+    def __init__(
+        self,
+        path: str,
+        create_if_missing: bool = False,
+        *,
+        compression_type: CompressionType = ...,
+        block_size: typing.SupportsInt = 163840,
+        bloom_filter_bits: typing.SupportsInt = 10,
+        max_file_size: typing.SupportsInt = 2097152,
+    ) -> None:
+        """
+        Lock a closed database and prepare to load data into it.
+
+        :param path: The path to the database directory.
+        :param create_if_missing: If True and there is no database at the given path a new database will be created.
+        :param compression_type: The compression used for the new tables.
+        :param block_size: The approximate size of uncompressed data per block in bytes.
+        :param bloom_filter_bits: The number of bits per key in the bloom filter. 0 disables the filter. This should match the value used to open the database.
+        :param max_file_size: The approximate size of each table file in bytes.
+        :raises: LevelDBException if the database does not exist or is open.
+        """
+
+    def __len__(self) -> int: ...
+    def abandon(self) -> None:
+        """
+        Delete the tables that have been written and unlock the database without modifying it.
+        This is called automatically if the loader is destroyed before it is finished.
+        """
+
+    def add(self, key: bytes, value: bytes) -> None:
+        """
+        Add a key and value.
+
+        :raises: ValueError if the key is not greater than the previous key.
+        """
+
+    def add_many(self, pairs: collections.abc.Iterable[tuple[bytes, bytes]]) -> None:
+        """
+        Add each key, value pair.
+
+        :param pairs: An iterable of key, value pairs in strictly increasing key order.
+        :raises: ValueError if the keys are not in strictly increasing order.
+        """
+
+    def finish(self) -> None:
+        """
+        Add the tables to the database and unlock it.
+        Other methods will error after this is called.
+        """
+
+class Compaction:
+    """
+    A compaction running on a background thread.
+
+    Create this with :meth:`LevelDB.compact_async`.
+    The range is compacted in partitions so that it can be cancelled between partitions.
+    Closing the database cancels the compaction and waits for the current partition to finish.
+    """
+
+    def cancel(self) -> None:
+        """
+        Stop the compaction after the current partition.
+        The partitions that have already been compacted stay compacted.
+        """
+
+    def wait(self, timeout: typing.SupportsFloat | None = None) -> bool:
+        """
+        Wait for the compaction to stop.
+
+        :param timeout: The maximum number of seconds to wait. None to wait indefinitely.
+        :return: True if the compaction has stopped, False if the timeout expired.
+        :raises: LevelDBException if the compaction failed.
+        """
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Has the compaction been cancelled.
+        """
+
+    @property
+    def done(self) -> bool:
+        """
+        Has the compaction stopped. This is true if it completed, was cancelled or failed.
+        """
+
+    @property
+    def progress(self) -> float:
+        """
+        The fraction of the partitions that have been compacted from 0.0 to 1.0.
+        """
 
 class CompressionType:
     """
@@ -61,6 +250,20 @@ class LevelDB:
         path: str,
         create_if_missing: bool = False,
         compression_type: CompressionType = ...,
+        *,
+        block_cache_size: typing.SupportsInt = 41943040,
+        write_buffer_size: typing.SupportsInt = 4194304,
+        block_size: typing.SupportsInt = 163840,
+        bloom_filter_bits: typing.SupportsInt = 10,
+        max_open_files: typing.SupportsInt = 1000,
+        block_cache: BlockCache | None = None,
+        sync: bool = False,
+        read_only: bool = False,
+        value_cache_size: typing.SupportsInt = 0,
+        metrics: bool = False,
+        repair: str = "auto",
+        io_stats: bool = False,
+        compaction_write_rate: typing.SupportsInt = 0,
     ) -> None:
         """
         Construct a new :class :`LevelDB` instance from the database at the given path.
@@ -70,11 +273,65 @@ class LevelDB:
         :param path: The path to the database directory.
         :param create_if_missing: If True a new database will be created if one does not exist at the given path.
         :param compression_type: The compression type to use when writing data to the database. Defaults to zlib raw.
+        :param block_cache_size: The size of the cache of uncompressed blocks in bytes. Defaults to 40 MiB.
+        :param write_buffer_size: The amount of data to build up in memory before writing it to disk in bytes. Defaults to 4 MiB.
+        :param block_size: The approximate size of the uncompressed data in each block in bytes. Defaults to 160 KiB.
+        :param bloom_filter_bits: The number of bits per key in the bloom filter. 0 disables the filter. Defaults to 10.
+        :param max_open_files: The maximum number of files the database may keep open. Defaults to 1000.
+        :param block_cache: A block cache to share with other databases. If given, block_cache_size is ignored.
+        :param sync: The default for the sync argument of write methods. If True, writes are flushed from the operating system buffer cache before returning. Defaults to False.
+        :param read_only: Open the database without modifying or locking its files. Many processes can open a database in read only mode at the same time. The database shows the data as it was when it was opened. A read only database is not protected from a writer in another process or object. Compactions in the writer delete table files that the read only database may still need, after which reads may raise LevelDBException. Reopen the database to see the current files. Methods that write to the database raise LevelDBException. Corrupt databases are not repaired. Defaults to False.
+        :param value_cache_size: The size of the cache of decoded values used by get and get_many in bytes. Repeated reads of a cached key skip the database. Writes through this object remove the modified keys. 0 disables the cache. Defaults to 0.
+        :param metrics: Record the latency of each operation. See :meth:`metrics`. Defaults to False.
+        :param repair: What to do if the database is corrupt. "auto" repairs it, which may take several minutes for a large database. "never" raises LevelDBException so that the caller can run :meth:`repair` at a better time. Defaults to "auto".
+        :param io_stats: Count the bytes read and written to each type of file. See :meth:`io_stats`. Defaults to False.
+        :param compaction_write_rate: The maximum number of bytes per second written to table files by compactions and memtable flushes. This stops background compactions using all of the disk bandwidth. Writes slow down if the flushes fall behind. 0 for no limit. Defaults to 0.
         :raises: LevelDBException if create_if_missing is False and the db does not exist.
         """
 
     def __iter__(self) -> collections.abc.Iterator[bytes]: ...
     def __setitem__(self, key: bytes, value: bytes) -> None: ...
+    def approximate_size(
+        self, start: bytes | None = None, end: bytes | None = None
+    ) -> int:
+        """
+        Get the approximate size on disk of the data in a range of keys.
+
+        This is computed from the table file indexes without reading the data.
+        Recently written data that is still in memory is not included.
+
+        :param start: The first key in the range. Leave as None to start at the beginning.
+        :param end: The key after the range. Leave as None to finish at the end.
+        :return: The approximate size in bytes.
+        """
+
+    def approximate_sizes(
+        self, ranges: collections.abc.Sequence[tuple[bytes | None, bytes | None]]
+    ) -> list[int]:
+        """
+        Get the approximate size on disk of the data in each range of keys.
+
+        :param ranges: A sequence of start, end pairs. See :meth:`approximate_size`.
+        :return: The approximate size in bytes of each range.
+        """
+
+    def bulk_import(
+        self, max_batch_size: typing.SupportsInt = 4194304, compact: bool = True
+    ) -> BulkImport:
+        """
+        Start a bulk import.
+
+        Writes are buffered into large batches that are written without syncing, which amortises the per-write logging overhead.
+        When the import finishes the data is synced to disk and the modified key range is compacted.
+
+        >>> with db.bulk_import() as bulk:
+        >>>     bulk.put_many(data.items())
+
+        :param max_batch_size: The approximate size of each batch in bytes.
+        :param compact: Compact the modified key range when the import finishes.
+        :return: A :class:`BulkImport` context manager that finishes the import on exit.
+        """
+
     def close(self) -> None:
         """
         Close the leveldb database.
@@ -87,16 +344,125 @@ class LevelDB:
         Remove deleted entries from the database to reduce its size.
         """
 
+    def compact_async(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        partition_size: typing.SupportsInt = 67108864,
+    ) -> Compaction:
+        """
+        Compact the keys in [start, end) on a background thread.
+
+        The range is split into partitions of approximately partition_size bytes of table data which are compacted in order.
+        The compaction can be cancelled between partitions.
+        Closing the database cancels the compaction and waits for the current partition.
+
+        >>> compaction = db.compact_async(b"start", b"end")
+        >>> compaction.wait()
+
+        :param start: The first key in the range. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        :param partition_size: The approximate size of each partition in bytes.
+        :return: A :class:`Compaction` handle to monitor or cancel the compaction.
+        """
+
+    def compact_range(
+        self, start: bytes | None = None, end: bytes | None = None
+    ) -> None:
+        """
+        Compact the keys in [start, end).
+
+        This only rewrites the tables that overlap the range, which is much faster than :meth:`compact` after editing a small region.
+        The end key may also be compacted.
+
+        :param start: The first key in the range. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        """
+
+    def contains_many(self, keys: collections.abc.Sequence[bytes]) -> list[bool]:
+        """
+        Check if many keys exist in the database.
+
+        All keys are checked against the same snapshot of the database without holding the GIL.
+
+        :param keys: The keys to look for.
+        :return: A list of bools in the same order as the keys.
+        """
+
     def create_iterator(self) -> LevelDBIterator:
         """
         Create a new leveldb Iterator.
         """
 
-    def delete(self, key: bytes) -> None:
+    def delete(self, key: bytes, sync: bool | None = None) -> None:
         """
         Delete a key from the database.
 
         :param key: The key to delete from the database.
+        :param sync: If True the write is flushed from the operating system buffer cache before returning. Leave as None to use the database default.
+        """
+
+    def delete_prefix(
+        self,
+        prefix: bytes,
+        *,
+        compact: bool = False,
+        max_batch_size: typing.SupportsInt = 4194304,
+        sync: bool | None = None,
+    ) -> int:
+        """
+        Delete all keys that start with the prefix.
+
+        The keys are deleted in batches so the deletion is not atomic.
+
+        :param prefix: The prefix of the keys to delete.
+        :param compact: Compact the range afterwards to reclaim the disk space.
+        :param max_batch_size: The approximate size of each write batch in bytes.
+        :param sync: If True the last batch is flushed from the operating system buffer cache before returning. Leave as None to use the database default.
+        :return: The number of keys that were deleted.
+        """
+
+    def delete_range(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        compact: bool = False,
+        max_batch_size: typing.SupportsInt = 4194304,
+        sync: bool | None = None,
+    ) -> int:
+        """
+        Delete all keys in [start, end).
+
+        The keys are deleted in batches so the deletion is not atomic.
+
+        :param start: The first key to delete. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        :param compact: Compact the range afterwards to reclaim the disk space.
+        :param max_batch_size: The approximate size of each write batch in bytes.
+        :param sync: If True the last batch is flushed from the operating system buffer cache before returning. Leave as None to use the database default.
+        :return: The number of keys that were deleted.
+        """
+
+    def estimate_count(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        sample_size: typing.SupportsInt = 10000,
+    ) -> int:
+        """
+        Estimate the number of keys in a range without reading the whole range.
+
+        If the range contains at most sample_size keys they are counted exactly.
+        Otherwise the first sample_size keys are counted and about sample_size more keys are read from points spread evenly through the data in the rest of the range. Their density is scaled by the approximate size of the rest of the range.
+        The estimate is less accurate if the size of entries varies a lot through the range.
+
+        :param start: The first key in the range. Leave as None to start at the beginning.
+        :param end: The key after the range. Leave as None to finish at the end.
+        :param sample_size: The number of keys to read.
+        :return: The estimated number of keys.
         """
 
     def get(self, key: bytes) -> bytes:
@@ -109,19 +475,208 @@ class LevelDB:
         :raises: LevelDBException on other error.
         """
 
+    def get_config(self) -> dict[str, typing.Any]:
+        """
+        Get the configuration the database was opened with.
+
+        :return: A new dictionary mapping the option names accepted by :meth:`__init__` to their values.
+        """
+
+    def get_many(
+        self, keys: collections.abc.Sequence[bytes], default: typing.Any = None
+    ) -> list[typing.Any]:
+        """
+        Get the values for many keys from the database.
+
+        All keys are read from the same snapshot of the database without holding the GIL.
+        If the value cache is enabled, cached values are used for the keys that hit so values written by other threads during the call may be newer than the snapshot.
+
+        :param keys: The keys to get from the database.
+        :param default: The value to use for keys that are not present.
+        :return: A list of the values in the same order as the keys.
+        :raises: LevelDBException on other error.
+        """
+
+    def get_property(self, name: str) -> str | None:
+        """
+        Get the value of a leveldb property.
+
+        Supported properties include
+        "leveldb.num-files-at-level<N>", "leveldb.stats", "leveldb.sstables" and "leveldb.approximate-memory-usage".
+
+        :param name: The name of the property.
+        :return: The value of the property or None if the property is not known.
+        """
+
+    def get_view(self, key: bytes) -> memoryview:
+        """
+        Get a key from the database as a read-only memoryview.
+
+        This avoids the copy into a bytes object that :meth:`get` makes.
+        The memoryview owns the data so it stays valid after the database is modified or closed.
+
+        :param key: The key to get from the database.
+        :return: A read-only memoryview of the data stored behind the given key.
+        :raises: KeyError if the requested key is not present.
+        :raises: LevelDBException on other error.
+        """
+
+    def io_stats(self) -> dict[str, typing.Any]:
+        """
+        Get the amount of data read from and written to the database files since the database was opened.
+
+        The database must be opened with io_stats=True or a compaction_write_rate. Otherwise this returns an empty dictionary.
+        The returned dictionary has a dictionary for each type of file, "log", "table", "manifest" and "other", containing:
+
+        * read_bytes: The number of bytes read.
+        * reads: The number of reads.
+        * write_bytes: The number of bytes written.
+        * writes: The number of writes.
+        * syncs: The number of times the files were flushed to disk.
+
+        It also contains throttled_time, the total time in seconds that table writes waited for the compaction_write_rate.
+        Table reads served from the block cache do not read from the files.
+
+        :return: A new dictionary of statistics.
+        """
+
     def items(self) -> collections.abc.Iterator[tuple[bytes, bytes]]:
         """
         An iterable of all items in the database.
         """
 
     def iterate(
-        self, start: bytes | None = None, end: bytes | None = None
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        start_inclusive: bool = True,
+        end_inclusive: bool = False,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
     ) -> collections.abc.Iterator[tuple[bytes, bytes]]:
         """
         Iterate through all keys and data that exist between the given keys.
 
         :param start: The key to start at. Leave as None to start at the beginning.
         :param end: The key to end at. Leave as None to finish at the end.
+        :param start_inclusive: Include the start key if it exists.
+        :param end_inclusive: Include the end key if it exists.
+        :param reverse: Iterate from the end of the range to the start.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        :return: An iterator of key, value tuples.
+        """
+
+    def iterate_batches(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        batch_size: typing.SupportsInt = 1000,
+        max_bytes: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[list[tuple[bytes, bytes]]]:
+        """
+        Iterate through all keys and data that exist between the given keys in batches.
+
+        Each batch is read without holding the GIL.
+
+        :param start: The key to start at. Leave as None to start at the beginning.
+        :param end: The key to end at. Leave as None to finish at the end.
+        :param batch_size: The maximum number of items in each batch.
+        :param max_bytes: The maximum combined size of the keys and values in each batch. A batch always contains at least one item. Leave as None for no limit.
+        :return: An iterator of lists of key, value tuples.
+        """
+
+    def iterate_key_batches(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        batch_size: typing.SupportsInt = 1000,
+        max_bytes: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[list[bytes]]:
+        """
+        Iterate through all keys that exist between the given keys in batches.
+
+        Each batch is read without holding the GIL.
+
+        :param start: The key to start at. Leave as None to start at the beginning.
+        :param end: The key to end at. Leave as None to finish at the end.
+        :param batch_size: The maximum number of keys in each batch.
+        :param max_bytes: The maximum combined size of the keys in each batch. A batch always contains at least one key. Leave as None for no limit.
+        :return: An iterator of lists of keys.
+        """
+
+    def iterate_keys(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        start_inclusive: bool = True,
+        end_inclusive: bool = False,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[bytes]:
+        """
+        Iterate through all keys that exist between the given keys.
+
+        :param start: The key to start at. Leave as None to start at the beginning.
+        :param end: The key to end at. Leave as None to finish at the end.
+        :param start_inclusive: Include the start key if it exists.
+        :param end_inclusive: Include the end key if it exists.
+        :param reverse: Iterate from the end of the range to the start.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        :return: An iterator of keys.
+        """
+
+    def iterate_keys_prefix(
+        self,
+        prefix: bytes,
+        *,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[bytes]:
+        """
+        Iterate through all keys that start with the prefix.
+
+        :param prefix: The prefix to match.
+        :param reverse: Iterate in descending key order.
+        :param limit: The maximum number of keys to yield. Leave as None for no limit.
+        """
+
+    def iterate_prefix(
+        self,
+        prefix: bytes,
+        *,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[tuple[bytes, bytes]]:
+        """
+        Iterate through all keys and data where the key starts with the prefix.
+
+        :param prefix: The prefix to match.
+        :param reverse: Iterate in descending key order.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        """
+
+    def iterate_values(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        start_inclusive: bool = True,
+        end_inclusive: bool = False,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[bytes]:
+        """
+        Iterate through the data of all keys that exist between the given keys.
+
+        :param start: The key to start at. Leave as None to start at the beginning.
+        :param end: The key to end at. Leave as None to finish at the end.
+        :param start_inclusive: Include the start key if it exists.
+        :param end_inclusive: Include the end key if it exists.
+        :param reverse: Iterate from the end of the range to the start.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        :return: An iterator of values.
         """
 
     def keys(self) -> collections.abc.Iterator[bytes]:
@@ -129,14 +684,170 @@ class LevelDB:
         An iterable of all keys in the database.
         """
 
-    def put(self, key: bytes, value: bytes) -> None:
+    def metrics(self) -> dict[str, dict[str, typing.Any]]:
+        """
+        Get the latency of the operations on the database.
+
+        The database must be opened with metrics=True. Otherwise this returns an empty dictionary.
+        The returned dictionary maps each operation to a dictionary containing the number of calls, the total time and the min, max, mean, p50, p90, p99 and p999 latency in seconds. The latencies are None if the operation has not been called.
+        The percentiles are accurate to about 6%.
+
+        The operations are:
+
+        * open: Opening the database.
+        * repair: Repairing a corrupt database while opening it.
+        * get: :meth:`get`.
+        * get_many: :meth:`get_many`.
+        * put: :meth:`put`.
+        * delete: :meth:`delete`.
+        * write: Writing a batch. This includes :meth:`put_batch`, :meth:`write` and the batches written by :meth:`delete_range` and :meth:`bulk_import`.
+        * seek: Moving an iterator created by the iteration methods to the start of its range.
+        * next: Moving an iterator created by the iteration methods to the next item.
+        * next_batch: Reading a batch in :meth:`iterate_batches`, :meth:`iterate_key_batches` and :meth:`parallel_scan`.
+        * compact: :meth:`compact`, :meth:`compact_range` and each partition of :meth:`compact_async`.
+
+        :return: A new dictionary of metrics.
+        """
+
+    def open_info(self) -> dict[str, typing.Any]:
+        """
+        Get information about opening the database.
+
+        The returned dictionary contains:
+
+        * log_files: The number of log files that were replayed. Writes that had not been written to a table are replayed from the logs.
+        * log_bytes: The combined size of the log files in bytes.
+        * table_files: The number of table files. Tables are opened when they are first read rather than when the database is opened.
+        * total_time: The time taken to construct this object in seconds.
+        * open_time: The time spent opening the database, including replaying the logs, in seconds.
+        * repaired: True if the database was corrupt and has been repaired.
+        * repair_time: The time spent repairing the database in seconds or None if it was not repaired.
+
+        :return: A new dictionary of information.
+        """
+
+    def parallel_scan(
+        self,
+        start: bytes | None,
+        end: bytes | None,
+        fn: collections.abc.Callable[[list[tuple[bytes, bytes]]], None],
+        *,
+        workers: typing.SupportsInt | None = None,
+        batch_size: typing.SupportsInt = 1000,
+    ) -> None:
+        """
+        Call a function with batches of the items in [start, end) from several threads.
+
+        The range is split into partitions with :meth:`split_range` and read from one snapshot by worker threads.
+        Reading and decompressing the data is done without the GIL so it runs in parallel.
+        The function is called with the GIL so it should do as little work as possible.
+        The batches are passed in no particular order.
+        If the function raises an exception the scan stops and the exception is raised here.
+
+        >>> counts = collections.Counter()
+        >>> db.parallel_scan(None, None, lambda batch: counts.update(key[:8] for key, _ in batch))
+
+        :param start: The first key in the range. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        :param fn: The function to call with each list of key, value tuples.
+        :param workers: The number of threads. None to use the number of processors.
+        :param batch_size: The maximum number of items in each batch.
+        """
+
+    def put(self, key: bytes, value: bytes, sync: bool | None = None) -> None:
         """
         Set a value in the database.
+
+        :param key: The key to set.
+        :param value: The value to set.
+        :param sync: If True the write is flushed from the operating system buffer cache before returning. Leave as None to use the database default.
         """
 
-    def put_batch(self, batch: collections.abc.Mapping[bytes, bytes]) -> None:
+    def put_batch(
+        self,
+        batch: collections.abc.Mapping[bytes, bytes | None],
+        sync: bool | None = None,
+    ) -> None:
         """
         Set a group of values in the database.
+
+        :param batch: A mapping of keys to values. A value of None deletes the key.
+        :param sync: If True the write is flushed from the operating system buffer cache before returning. Leave as None to use the database default.
+        """
+
+    @staticmethod
+    def repair(
+        path: str,
+        *,
+        compression_type: CompressionType = ...,
+        block_size: typing.SupportsInt = 163840,
+        bloom_filter_bits: typing.SupportsInt = 10,
+    ) -> None:
+        """
+        Repair a closed database.
+
+        This rebuilds the database from its table and log files and may take several minutes for a large database.
+        It runs without the GIL so it can be run on a worker thread. Eg. after opening with repair="never" failed.
+
+        :param path: The path to the database directory.
+        :param compression_type: The compression used for the rebuilt tables.
+        :param block_size: The approximate size of uncompressed data per block in bytes.
+        :param bloom_filter_bits: The number of bits per key in the bloom filter. 0 disables the filter.
+        :raises: LevelDBException if the database could not be repaired or is open.
+        """
+
+    def reset_metrics(self) -> None:
+        """
+        Clear the metrics returned by :meth:`metrics`.
+        """
+
+    def snapshot(self) -> Snapshot:
+        """
+        Create a snapshot of the current state of the database.
+
+        Reads from the snapshot are not affected by later writes.
+        The snapshot is released when it is used as a context manager and the block exits, when :meth:`Snapshot.release` is called or when the database is closed.
+        """
+
+    def split_range(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        count: typing.SupportsInt = 16,
+    ) -> list[tuple[bytes | None, bytes | None]]:
+        """
+        Split the keys in [start, end) into ranges with approximately equal amounts of data.
+
+        This only reads the table indexes so it is fast on large databases.
+        Data that has not been written to a table yet is not counted.
+        The ranges can be processed in parallel. Eg. with :meth:`iterate_batches` on a thread pool.
+
+        :param start: The first key in the range. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        :param count: The maximum number of ranges. Fewer are returned if the range is too small to split.
+        :return: A list of start, end pairs in order that together cover the range.
+        """
+
+    def stats(self) -> dict[str, typing.Any]:
+        """
+        Get statistics about the database.
+
+        The returned dictionary contains:
+
+        * levels: A list with a dictionary for each level containing the number of files, their size in bytes and the time in seconds, MiB read and MiB written by compactions into the level since the database was opened.
+        * files: The total number of table files.
+        * size: The total size of the table files in bytes.
+        * read_amplification: The maximum number of table files a read may need to check. A high value means level 0 files are piling up.
+        * write_amplification: An estimate of the number of times each byte written has been rewritten by flushes and compactions since the database was opened. None if nothing has been written.
+        * memory_usage: The approximate memory used by the memtables and the block cache in bytes.
+        * block_cache_usage: The size of the blocks in the block cache in bytes.
+        * block_cache_capacity: The capacity of the block cache in bytes or None if unknown.
+        * value_cache_usage: The approximate size of the values in the value cache in bytes.
+        * value_cache_capacity: The capacity of the value cache in bytes. 0 if it is disabled.
+        * value_cache_hits: The number of reads served from the value cache since the database was opened.
+        * value_cache_misses: The number of reads that missed the value cache since the database was opened.
+
+        :return: A new dictionary of statistics.
         """
 
     def values(self) -> collections.abc.Iterator[bytes]:
@@ -144,6 +855,14 @@ class LevelDB:
         An iterable of all values in the database.
         """
 
+    def write(self, batch: WriteBatch, sync: bool | None = None) -> None:
+        """
+        Apply the operations in a batch to the database atomically.
+
+        :param batch: The batch to write. It is not cleared.
+        :param sync: If True the write is flushed from the operating system buffer cache before returning. Leave as None to use the database default.
+        """
+
 class LevelDBEncrypted(Exception):
     pass
 
@@ -195,6 +914,190 @@ class LevelDBIterator:
         :raises: runtime_error if iterator is not valid.
         """
 
+class Snapshot:
+    """
+    A consistent read-only view of a LevelDB database at a point in time.
+    """
+
+    def __enter__(self) -> Snapshot: ...
+    def __exit__(
+        self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any
+    ) -> None: ...
+    def create_iterator(self) -> LevelDBIterator:
+        """
+        Create a new leveldb Iterator over the snapshot.
+        """
+
+    def get(self, key: bytes) -> bytes:
+        """
+        Get a key from the snapshot.
+
+        :param key: The key to get from the snapshot.
+        :return: The data stored behind the given key.
+        :raises: KeyError if the requested key is not present.
+        :raises: LevelDBException on other error.
+        """
+
+    def get_many(
+        self, keys: collections.abc.Sequence[bytes], default: typing.Any = None
+    ) -> list[typing.Any]:
+        """
+        Get the values for many keys from the snapshot without holding the GIL.
+
+        :param keys: The keys to get from the snapshot.
+        :param default: The value to use for keys that are not present.
+        :return: A list of the values in the same order as the keys.
+        :raises: LevelDBException on other error.
+        """
+
+    def iterate(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        start_inclusive: bool = True,
+        end_inclusive: bool = False,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[tuple[bytes, bytes]]:
+        """
+        Iterate through all keys and data in the snapshot that exist between the given keys.
+
+        :param start: The key to start at. Leave as None to start at the beginning.
+        :param end: The key to end at. Leave as None to finish at the end.
+        :param start_inclusive: Include the start key if it exists.
+        :param end_inclusive: Include the end key if it exists.
+        :param reverse: Iterate from the end of the range to the start.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        :return: An iterator of key, value tuples.
+        """
+
+    def iterate_keys(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        start_inclusive: bool = True,
+        end_inclusive: bool = False,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[bytes]:
+        """
+        Iterate through all keys in the snapshot that exist between the given keys.
+
+        :param start: The key to start at. Leave as None to start at the beginning.
+        :param end: The key to end at. Leave as None to finish at the end.
+        :param start_inclusive: Include the start key if it exists.
+        :param end_inclusive: Include the end key if it exists.
+        :param reverse: Iterate from the end of the range to the start.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        :return: An iterator of keys.
+        """
+
+    def iterate_keys_prefix(
+        self,
+        prefix: bytes,
+        *,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[bytes]:
+        """
+        Iterate through all keys in the snapshot that start with the prefix.
+
+        :param prefix: The prefix to match.
+        :param reverse: Iterate in descending key order.
+        :param limit: The maximum number of keys to yield. Leave as None for no limit.
+        """
+
+    def iterate_prefix(
+        self,
+        prefix: bytes,
+        *,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[tuple[bytes, bytes]]:
+        """
+        Iterate through all keys and data in the snapshot where the key starts with the prefix.
+
+        :param prefix: The prefix to match.
+        :param reverse: Iterate in descending key order.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        """
+
+    def iterate_values(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        start_inclusive: bool = True,
+        end_inclusive: bool = False,
+        reverse: bool = False,
+        limit: typing.SupportsInt | None = None,
+    ) -> collections.abc.Iterator[bytes]:
+        """
+        Iterate through the data of all keys in the snapshot that exist between the given keys.
+
+        :param start: The key to start at. Leave as None to start at the beginning.
+        :param end: The key to end at. Leave as None to finish at the end.
+        :param start_inclusive: Include the start key if it exists.
+        :param end_inclusive: Include the end key if it exists.
+        :param reverse: Iterate from the end of the range to the start.
+        :param limit: The maximum number of entries to yield. Leave as None for no limit.
+        :return: An iterator of values.
+        """
+
+    def release(self) -> None:
+        """
+        Release the snapshot.
+        Other methods will error after this is called.
+        """
+
+class WriteBatch:
+    """
+    A group of put and delete operations that are applied to a database atomically.
+
+    Operations are applied in the order they were added.
+    Write the batch to a database with :meth:`LevelDB.write`.
+    """
+
+    def __init__(self) -> None: ...
+    def __len__(self) -> int:
+        """
+        The number of operations in the batch.
+        """
+
+    def append(self, other: WriteBatch) -> None:
+        """
+        Add the operations from another batch to the end of this batch.
+        """
+
+    def approximate_size(self) -> int:
+        """
+        The size of the serialised batch in bytes.
+        """
+
+    def clear(self) -> None:
+        """
+        Remove all operations from the batch.
+        """
+
+    def delete(self, key: bytes) -> None:
+        """
+        Add an operation to delete a key.
+        """
+
+    def put(self, key: bytes, value: bytes) -> None:
+        """
+        Add an operation to set a value.
+        """
+
+    def put_many(self, pairs: collections.abc.Iterable[tuple[bytes, bytes]]) -> None:
+        """
+        Add an operation to set a value for each key, value pair.
+
+        :param pairs: An iterable of key, value pairs. Eg. dict.items()
+        """
+
 def _init() -> None: ...
 
 __version__: str
@@ -0,0 +1,270 @@
+#pragma once
+
+#include <array>
+#include <atomic>
+#include <cstdint>
+#include <functional>
+#include <list>
+#include <mutex>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <unordered_map>
+
+#include <leveldb/cache.h>
+#include <leveldb/slice.h>
+
+namespace Amulet {
+
+// A least recently used cache that implements leveldb::Cache.
+// The cache returned by leveldb::NewLRUCache has a fixed capacity.
+// This implementation allows the capacity to be changed after creation
+// so that one cache can be shared between many databases and resized at runtime.
+class ResizableLRUCache : public leveldb::Cache {
+private:
+    struct Entry : public leveldb::Cache::Handle {
+        std::string key;
+        void* value;
+        void (*deleter)(const leveldb::Slice& key, void* value);
+        size_t charge;
+        // The number of references including the reference held by the cache.
+        size_t refs;
+        // Is the entry in the table.
+        bool in_cache;
+        // The location in the lru list if the entry is only referenced by the cache.
+        std::optional<std::list<Entry*>::iterator> lru_it;
+    };
+
+    class Shard {
+    private:
+        mutable std::mutex mutex;
+        size_t capacity = 0;
+        size_t usage = 0;
+        // Entries in the cache.
+        std::unordered_map<std::string, Entry*> table;
+        // Entries only referenced by the cache. The front is the most recently used.
+        std::list<Entry*> lru;
+
+        void ref(Entry* entry)
+        {
+            if (entry->lru_it) {
+                lru.erase(*entry->lru_it);
+                entry->lru_it.reset();
+            }
+            entry->refs++;
+        }
+
+        void unref(Entry* entry)
+        {
+            entry->refs--;
+            if (entry->refs == 0) {
+                entry->deleter(entry->key, entry->value);
+                delete entry;
+            } else if (entry->in_cache && entry->refs == 1) {
+                lru.push_front(entry);
+                entry->lru_it = lru.begin();
+            }
+        }
+
+        // Remove an entry that has already been removed from the table.
+        void finish_erase(Entry* entry)
+        {
+            entry->in_cache = false;
+            usage -= entry->charge;
+            if (entry->lru_it) {
+                lru.erase(*entry->lru_it);
+                entry->lru_it.reset();
+            }
+            unref(entry);
+        }
+
+        void evict()
+        {
+            while (capacity < usage && !lru.empty()) {
+                Entry* entry = lru.back();
+                table.erase(entry->key);
+                finish_erase(entry);
+            }
+        }
+
+    public:
+        ~Shard()
+        {
+            // All handles must have been released.
+            while (!lru.empty()) {
+                Entry* entry = lru.back();
+                table.erase(entry->key);
+                finish_erase(entry);
+            }
+        }
+
+        Entry* insert(
+            const leveldb::Slice& key,
+            void* value,
+            size_t charge,
+            void (*deleter)(const leveldb::Slice& key, void* value))
+        {
+            std::lock_guard lock(mutex);
+            auto* entry = new Entry();
+            entry->key = key.ToString();
+            entry->value = value;
+            entry->deleter = deleter;
+            entry->charge = charge;
+            // One reference for the returned handle.
+            entry->refs = 1;
+            entry->in_cache = false;
+            if (capacity) {
+                // One reference for the cache.
+                entry->refs++;
+                entry->in_cache = true;
+                usage += charge;
+                auto [it, inserted] = table.try_emplace(entry->key, entry);
+                if (!inserted) {
+                    finish_erase(it->second);
+                    it->second = entry;
+                }
+                evict();
+            }
+            return entry;
+        }
+
+        Entry* lookup(const leveldb::Slice& key)
+        {
+            std::lock_guard lock(mutex);
+            auto it = table.find(key.ToString());
+            if (it == table.end()) {
+                return nullptr;
+            }
+            ref(it->second);
+            return it->second;
+        }
+
+        void release(Entry* entry)
+        {
+            std::lock_guard lock(mutex);
+            unref(entry);
+        }
+
+        void erase(const leveldb::Slice& key)
+        {
+            std::lock_guard lock(mutex);
+            auto it = table.find(key.ToString());
+            if (it != table.end()) {
+                Entry* entry = it->second;
+                table.erase(it);
+                finish_erase(entry);
+            }
+        }
+
+        void prune()
+        {
+            std::lock_guard lock(mutex);
+            while (!lru.empty()) {
+                Entry* entry = lru.back();
+                table.erase(entry->key);
+                finish_erase(entry);
+            }
+        }
+
+        void set_capacity(size_t new_capacity)
+        {
+            std::lock_guard lock(mutex);
+            capacity = new_capacity;
+            evict();
+        }
+
+        size_t get_usage() const
+        {
+            std::lock_guard lock(mutex);
+            return usage;
+        }
+    };
+
+    static constexpr size_t shard_count = 16;
+
+    std::array<Shard, shard_count> shards;
+    std::atomic<size_t> capacity;
+    std::atomic<uint64_t> last_id = 0;
+
+    Shard& get_shard(const leveldb::Slice& key)
+    {
+        return shards[std::hash<std::string_view> {}(std::string_view(key.data(), key.size())) % shard_count];
+    }
+
+public:
+    ResizableLRUCache(size_t capacity)
+    {
+        set_capacity(capacity);
+    }
+
+    Handle* Insert(
+        const leveldb::Slice& key,
+        void* value,
+        size_t charge,
+        void (*deleter)(const leveldb::Slice& key, void* value)) override
+    {
+        return get_shard(key).insert(key, value, charge, deleter);
+    }
+
+    Handle* Lookup(const leveldb::Slice& key) override
+    {
+        return get_shard(key).lookup(key);
+    }
+
+    void Release(Handle* handle) override
+    {
+        auto* entry = static_cast<Entry*>(handle);
+        get_shard(entry->key).release(entry);
+    }
+
+    void* Value(Handle* handle) override
+    {
+        return static_cast<Entry*>(handle)->value;
+    }
+
+    void Erase(const leveldb::Slice& key) override
+    {
+        get_shard(key).erase(key);
+    }
+
+    uint64_t NewId() override
+    {
+        return ++last_id;
+    }
+
+    void Prune() override
+    {
+        for (auto& shard : shards) {
+            shard.prune();
+        }
+    }
+
+    size_t TotalCharge() const override
+    {
+        size_t total = 0;
+        for (auto& shard : shards) {
+            total += shard.get_usage();
+        }
+        return total;
+    }
+
+    // Get the maximum total charge of the cache.
+    size_t get_capacity() const
+    {
+        return capacity;
+    }
+
+    // Change the maximum total charge of the cache.
+    // Unused entries are evicted until the cache fits in the new capacity.
+    void set_capacity(size_t new_capacity)
+    {
+        capacity = new_capacity;
+        // Round up so that the shards can hold the full capacity.
+        size_t shard_capacity = (new_capacity + (shard_count - 1)) / shard_count;
+        for (auto& shard : shards) {
+            shard.set_capacity(shard_capacity);
+        }
+    }
+};
+
+} // namespace Amulet
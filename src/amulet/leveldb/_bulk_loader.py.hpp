@@ -0,0 +1,660 @@
+#pragma once
+
+#include <array>
+#include <cstdint>
+#include <cstdio>
+#include <map>
+#include <memory>
+#include <optional>
+#include <string>
+#include <vector>
+
+#include <leveldb/comparator.h>
+#include <leveldb/env.h>
+#include <leveldb/filter_policy.h>
+#include <leveldb/options.h>
+#include <leveldb/slice.h>
+#include <leveldb/status.h>
+#include <leveldb/table_builder.h>
+
+namespace Amulet {
+
+namespace bulk_loader_detail {
+
+    // The number of levels in the database.
+    static constexpr int level_count = 7;
+    // The size of a block in the manifest log.
+    static constexpr size_t log_block_size = 32768;
+    // The size of the header of a record in the manifest log.
+    static constexpr size_t log_header_size = 7;
+
+    // Record types in the manifest log.
+    enum LogRecordType : char {
+        LogZeroType = 0,
+        LogFullType = 1,
+        LogFirstType = 2,
+        LogMiddleType = 3,
+        LogLastType = 4,
+    };
+
+    // Tags in a version edit record.
+    enum VersionEditTag : uint32_t {
+        EditComparator = 1,
+        EditLogNumber = 2,
+        EditNextFileNumber = 3,
+        EditLastSequence = 4,
+        EditCompactPointer = 5,
+        EditDeletedFile = 6,
+        EditNewFile = 7,
+        EditPrevLogNumber = 9,
+    };
+
+    // The value type of a put in an internal key.
+    static constexpr uint64_t type_value = 1;
+
+    inline uint32_t crc32c(const char* data, size_t size, uint32_t crc = 0)
+    {
+        static const auto table = [] {
+            std::array<uint32_t, 256> table;
+            for (uint32_t i = 0; i < 256; i++) {
+                uint32_t value = i;
+                for (int j = 0; j < 8; j++) {
+                    value = (value >> 1) ^ (value & 1 ? 0x82F63B78 : 0);
+                }
+                table[i] = value;
+            }
+            return table;
+        }();
+        crc = ~crc;
+        for (size_t i = 0; i < size; i++) {
+            crc = table[(crc ^ static_cast<uint8_t>(data[i])) & 0xFF] ^ (crc >> 8);
+        }
+        return ~crc;
+    }
+
+    // Mask a checksum the same way leveldb does before storing it.
+    inline uint32_t mask_crc(uint32_t crc)
+    {
+        return ((crc >> 15) | (crc << 17)) + 0xa282ead8;
+    }
+
+    inline void put_fixed(std::string& dst, uint64_t value, size_t size)
+    {
+        for (size_t i = 0; i < size; i++) {
+            dst.push_back(static_cast<char>(value >> (8 * i)));
+        }
+    }
+
+    inline uint64_t decode_fixed64(const char* data)
+    {
+        uint64_t value = 0;
+        for (size_t i = 0; i < 8; i++) {
+            value |= static_cast<uint64_t>(static_cast<uint8_t>(data[i])) << (8 * i);
+        }
+        return value;
+    }
+
+    inline void put_varint(std::string& dst, uint64_t value)
+    {
+        while (value >= 128) {
+            dst.push_back(static_cast<char>(value | 128));
+            value >>= 7;
+        }
+        dst.push_back(static_cast<char>(value));
+    }
+
+    inline void put_length_prefixed(std::string& dst, const leveldb::Slice& value)
+    {
+        put_varint(dst, value.size());
+        dst.append(value.data(), value.size());
+    }
+
+    inline bool get_varint(leveldb::Slice& src, uint64_t& value)
+    {
+        value = 0;
+        for (uint32_t shift = 0; shift <= 63 && !src.empty(); shift += 7) {
+            uint64_t byte = static_cast<uint8_t>(src[0]);
+            src.remove_prefix(1);
+            value |= (byte & 127) << shift;
+            if (byte < 128) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    inline bool get_length_prefixed(leveldb::Slice& src, leveldb::Slice& value)
+    {
+        uint64_t size;
+        if (!get_varint(src, size) || src.size() < size) {
+            return false;
+        }
+        value = leveldb::Slice(src.data(), size);
+        src.remove_prefix(size);
+        return true;
+    }
+
+    // Append the internal key tag to a user key.
+    inline void put_internal_key(std::string& dst, const leveldb::Slice& user_key, uint64_t sequence)
+    {
+        dst.assign(user_key.data(), user_key.size());
+        put_fixed(dst, (sequence << 8) | type_value, 8);
+    }
+
+    inline leveldb::Slice user_key(const leveldb::Slice& internal_key)
+    {
+        return leveldb::Slice(internal_key.data(), internal_key.size() - 8);
+    }
+
+    // Orders internal keys the same way as the database.
+    // Keys are ordered by user key and then by decreasing sequence number.
+    class InternalKeyComparator : public leveldb::Comparator {
+    public:
+        int Compare(const leveldb::Slice& a, const leveldb::Slice& b) const override
+        {
+            int result = user_key(a).compare(user_key(b));
+            if (result == 0) {
+                uint64_t a_tag = decode_fixed64(a.data() + a.size() - 8);
+                uint64_t b_tag = decode_fixed64(b.data() + b.size() - 8);
+                if (a_tag > b_tag) {
+                    result = -1;
+                } else if (a_tag < b_tag) {
+                    result = 1;
+                }
+            }
+            return result;
+        }
+
+        const char* Name() const override
+        {
+            return "leveldb.InternalKeyComparator";
+        }
+
+        // Index keys are not shortened.
+        void FindShortestSeparator(std::string*, const leveldb::Slice&) const override { }
+        void FindShortSuccessor(std::string*) const override { }
+    };
+
+    // Builds the filter from the user keys like the database does.
+    class InternalFilterPolicy : public leveldb::FilterPolicy {
+    private:
+        const leveldb::FilterPolicy* policy;
+
+    public:
+        InternalFilterPolicy(const leveldb::FilterPolicy* policy)
+            : policy(policy)
+        {
+        }
+
+        const char* Name() const override
+        {
+            return policy->Name();
+        }
+
+        void CreateFilter(const leveldb::Slice* keys, int n, std::string* dst) const override
+        {
+            std::vector<leveldb::Slice> user_keys;
+            user_keys.reserve(n);
+            for (int i = 0; i < n; i++) {
+                user_keys.push_back(user_key(keys[i]));
+            }
+            policy->CreateFilter(user_keys.data(), n, dst);
+        }
+
+        bool KeyMayMatch(const leveldb::Slice& key, const leveldb::Slice& filter) const override
+        {
+            return policy->KeyMayMatch(user_key(key), filter);
+        }
+    };
+
+    // The parts of the current version that the loader needs.
+    struct VersionState {
+        uint64_t next_file_number = 2;
+        uint64_t last_sequence = 0;
+        // The user key range of each file in each level.
+        std::array<std::map<uint64_t, std::pair<std::string, std::string>>, level_count> files;
+    };
+
+    // Apply an encoded version edit to the state.
+    inline bool apply_version_edit(VersionState& state, leveldb::Slice src)
+    {
+        uint64_t tag, level, number, value;
+        leveldb::Slice smallest, largest;
+        while (!src.empty()) {
+            if (!get_varint(src, tag)) {
+                return false;
+            }
+            switch (tag) {
+            case EditComparator:
+                if (!get_length_prefixed(src, smallest)) {
+                    return false;
+                }
+                break;
+            case EditLogNumber:
+            case EditPrevLogNumber:
+                if (!get_varint(src, value)) {
+                    return false;
+                }
+                break;
+            case EditNextFileNumber:
+                if (!get_varint(src, state.next_file_number)) {
+                    return false;
+                }
+                break;
+            case EditLastSequence:
+                if (!get_varint(src, state.last_sequence)) {
+                    return false;
+                }
+                break;
+            case EditCompactPointer:
+                if (!get_varint(src, level) || !get_length_prefixed(src, smallest)) {
+                    return false;
+                }
+                break;
+            case EditDeletedFile:
+                if (!get_varint(src, level) || level_count <= level || !get_varint(src, number)) {
+                    return false;
+                }
+                state.files[level].erase(number);
+                break;
+            case EditNewFile:
+                if (
+                    !get_varint(src, level)
+                    || level_count <= level
+                    || !get_varint(src, number)
+                    || !get_varint(src, value)
+                    || !get_length_prefixed(src, smallest)
+                    || smallest.size() < 8
+                    || !get_length_prefixed(src, largest)
+                    || largest.size() < 8) {
+                    return false;
+                }
+                state.files[level][number] = std::make_pair(
+                    user_key(smallest).ToString(),
+                    user_key(largest).ToString());
+                break;
+            default:
+                return false;
+            }
+        }
+        return true;
+    }
+
+    // Read the version state from the contents of a manifest log.
+    inline leveldb::Status read_manifest(const std::string& contents, VersionState& state)
+    {
+        std::string record;
+        bool in_record = false;
+        size_t offset = 0;
+        while (offset < contents.size()) {
+            size_t block_remaining = log_block_size - offset % log_block_size;
+            if (block_remaining < log_header_size) {
+                // The rest of the block is padding.
+                offset += block_remaining;
+                continue;
+            }
+            if (contents.size() - offset < log_header_size) {
+                break;
+            }
+            const char* header = contents.data() + offset;
+            size_t size = static_cast<uint8_t>(header[4]) | (static_cast<size_t>(static_cast<uint8_t>(header[5])) << 8);
+            char type = header[6];
+            if (type == LogZeroType && size == 0) {
+                // Preallocated space.
+                offset += block_remaining;
+                continue;
+            }
+            if (block_remaining - log_header_size < size || contents.size() - offset - log_header_size < size) {
+                return leveldb::Status::Corruption("Bad record length in manifest.");
+            }
+            leveldb::Slice data(header + log_header_size, size);
+            offset += log_header_size + size;
+            switch (type) {
+            case LogFullType:
+                record.assign(data.data(), data.size());
+                in_record = false;
+                break;
+            case LogFirstType:
+                record.assign(data.data(), data.size());
+                in_record = true;
+                continue;
+            case LogMiddleType:
+                if (in_record) {
+                    record.append(data.data(), data.size());
+                }
+                continue;
+            case LogLastType:
+                if (!in_record) {
+                    continue;
+                }
+                record.append(data.data(), data.size());
+                in_record = false;
+                break;
+            default:
+                return leveldb::Status::Corruption("Unknown record type in manifest.");
+            }
+            if (!apply_version_edit(state, record)) {
+                return leveldb::Status::Corruption("Could not parse manifest.");
+            }
+        }
+        return leveldb::Status::OK();
+    }
+
+    // Append a record to the contents of a manifest log.
+    inline void append_log_record(std::string& contents, const leveldb::Slice& record)
+    {
+        const char* data = record.data();
+        size_t remaining = record.size();
+        bool begin = true;
+        do {
+            size_t block_remaining = log_block_size - contents.size() % log_block_size;
+            if (block_remaining < log_header_size) {
+                contents.append(block_remaining, '\0');
+                block_remaining = log_block_size;
+            }
+            size_t fragment_size = std::min(remaining, block_remaining - log_header_size);
+            bool end = fragment_size == remaining;
+            char type = begin && end ? LogFullType
+                : begin              ? LogFirstType
+                : end                ? LogLastType
+                                     : LogMiddleType;
+            uint32_t crc = crc32c(data, fragment_size, crc32c(&type, 1));
+            put_fixed(contents, mask_crc(crc), 4);
+            put_fixed(contents, fragment_size, 2);
+            contents.push_back(type);
+            contents.append(data, fragment_size);
+            data += fragment_size;
+            remaining -= fragment_size;
+            begin = false;
+        } while (remaining);
+    }
+
+    // Write data to a new file and sync it.
+    inline leveldb::Status write_file_sync(leveldb::Env* env, const leveldb::Slice& data, const std::string& file_name)
+    {
+        leveldb::WritableFile* file_ptr;
+        auto status = env->NewWritableFile(file_name, &file_ptr);
+        if (!status.ok()) {
+            return status;
+        }
+        std::unique_ptr<leveldb::WritableFile> file(file_ptr);
+        status = file->Append(data);
+        if (status.ok()) {
+            status = file->Sync();
+        }
+        if (status.ok()) {
+            status = file->Close();
+        }
+        if (!status.ok()) {
+            env->RemoveFile(file_name);
+        }
+        return status;
+    }
+
+    inline std::string make_file_name(const std::string& path, uint64_t number, const char* suffix)
+    {
+        char buffer[100];
+        std::snprintf(buffer, sizeof(buffer), "/%06llu.%s", static_cast<unsigned long long>(number), suffix);
+        return path + buffer;
+    }
+
+    inline std::string make_manifest_name(uint64_t number)
+    {
+        char buffer[100];
+        std::snprintf(buffer, sizeof(buffer), "MANIFEST-%06llu", static_cast<unsigned long long>(number));
+        return buffer;
+    }
+
+} // namespace bulk_loader_detail
+
+// Writes sorted data directly to table files and adds them to a closed database.
+// This skips the log, the memtable and most of the compaction work that normal writes go through.
+// The database lock is held from construction until the loader is finished or abandoned.
+class BulkLoader {
+public:
+    struct FileMetaData {
+        uint64_t number;
+        uint64_t size;
+        std::string smallest;
+        std::string largest;
+    };
+
+private:
+    std::string path;
+    leveldb::Env* env;
+    leveldb::FileLock* lock = nullptr;
+    bulk_loader_detail::InternalKeyComparator comparator;
+    std::unique_ptr<bulk_loader_detail::InternalFilterPolicy> filter_policy;
+    leveldb::Options options;
+    size_t max_file_size;
+    std::string manifest_contents;
+    bulk_loader_detail::VersionState state;
+    uint64_t sequence;
+    uint64_t next_file_number;
+
+    std::unique_ptr<leveldb::WritableFile> file;
+    std::unique_ptr<leveldb::TableBuilder> builder;
+    std::string last_key;
+    std::string internal_key;
+    uint64_t count = 0;
+    std::vector<FileMetaData> files;
+
+    leveldb::Status finish_table()
+    {
+        if (!builder) {
+            return leveldb::Status::OK();
+        }
+        auto status = builder->Finish();
+        auto& meta = files.back();
+        meta.size = builder->FileSize();
+        builder.reset();
+        if (status.ok()) {
+            status = file->Sync();
+        }
+        if (status.ok()) {
+            status = file->Close();
+        }
+        file.reset();
+        return status;
+    }
+
+    void release_lock()
+    {
+        if (lock) {
+            env->UnlockFile(lock);
+            lock = nullptr;
+        }
+    }
+
+    // Find the deepest level the file can be added to.
+    // The new data is newer than all existing data so it must be above any file it overlaps.
+    int pick_level(const FileMetaData& meta)
+    {
+        auto smallest = bulk_loader_detail::user_key(meta.smallest);
+        auto largest = bulk_loader_detail::user_key(meta.largest);
+        int level = 0;
+        for (int i = 0; i < bulk_loader_detail::level_count; i++) {
+            for (const auto& [number, range] : state.files[i]) {
+                if (largest.compare(range.first) >= 0 && smallest.compare(range.second) <= 0) {
+                    return level;
+                }
+            }
+            level = i;
+        }
+        return level;
+    }
+
+public:
+    // Lock the database at path and read its current state.
+    // The database must exist and must have been cleanly closed.
+    // options.comparator and options.filter_policy are replaced.
+    BulkLoader(const std::string& path, const leveldb::Options& options, size_t max_file_size)
+        : path(path)
+        , env(options.env)
+        , options(options)
+        , max_file_size(max_file_size)
+    {
+        this->options.comparator = &comparator;
+        if (options.filter_policy) {
+            filter_policy = std::make_unique<bulk_loader_detail::InternalFilterPolicy>(options.filter_policy);
+        }
+        this->options.filter_policy = filter_policy.get();
+    }
+
+    BulkLoader(const BulkLoader&) = delete;
+    BulkLoader& operator=(const BulkLoader&) = delete;
+
+    ~BulkLoader()
+    {
+        abandon();
+    }
+
+    // Lock the database and read the current version.
+    leveldb::Status open()
+    {
+        auto status = env->LockFile(path + "/LOCK", &lock);
+        if (!status.ok()) {
+            return status;
+        }
+        std::string current;
+        status = leveldb::ReadFileToString(env, path + "/CURRENT", &current);
+        if (status.ok() && (current.empty() || current.back() != '\n')) {
+            status = leveldb::Status::Corruption("CURRENT file does not end with newline");
+        }
+        if (status.ok()) {
+            current.pop_back();
+            status = leveldb::ReadFileToString(env, path + "/" + current, &manifest_contents);
+        }
+        if (status.ok()) {
+            status = bulk_loader_detail::read_manifest(manifest_contents, state);
+        }
+        if (!status.ok()) {
+            release_lock();
+            return status;
+        }
+        sequence = state.last_sequence + 1;
+        next_file_number = state.next_file_number;
+        return status;
+    }
+
+    // Add a key and value.
+    // Keys must be added in strictly increasing order.
+    leveldb::Status add(const leveldb::Slice& key, const leveldb::Slice& value)
+    {
+        if (!lock) {
+            return leveldb::Status::InvalidArgument("The bulk loader has finished.");
+        }
+        if (count && key.compare(last_key) <= 0) {
+            return leveldb::Status::InvalidArgument("Keys must be added in strictly increasing order.");
+        }
+        if (!builder) {
+            files.push_back({ next_file_number++, 0, "", "" });
+            leveldb::WritableFile* new_file;
+            auto status = env->NewWritableFile(bulk_loader_detail::make_file_name(path, files.back().number, "ldb"), &new_file);
+            if (!status.ok()) {
+                return status;
+            }
+            file.reset(new_file);
+            builder = std::make_unique<leveldb::TableBuilder>(options, file.get());
+        }
+        bulk_loader_detail::put_internal_key(internal_key, key, sequence);
+        auto& meta = files.back();
+        if (builder->NumEntries() == 0) {
+            meta.smallest = internal_key;
+        }
+        meta.largest = internal_key;
+        builder->Add(internal_key, value);
+        last_key.assign(key.data(), key.size());
+        count++;
+        auto status = builder->status();
+        if (status.ok() && max_file_size <= builder->FileSize()) {
+            status = finish_table();
+        }
+        return status;
+    }
+
+    // The number of entries that have been added.
+    uint64_t get_count() const
+    {
+        return count;
+    }
+
+    // The tables that have been written.
+    const std::vector<FileMetaData>& get_files() const
+    {
+        return files;
+    }
+
+    // Finish the last table, add the tables to the database and release the lock.
+    leveldb::Status finish()
+    {
+        if (!lock) {
+            return leveldb::Status::InvalidArgument("The bulk loader has finished.");
+        }
+        auto status = finish_table();
+        if (!status.ok() || files.empty()) {
+            abandon();
+            return status;
+        }
+
+        // Write a new manifest with an edit that adds the tables.
+        // CURRENT is switched to it atomically so a failure leaves the database unchanged.
+        uint64_t manifest_number = next_file_number++;
+        std::string edit;
+        bulk_loader_detail::put_varint(edit, bulk_loader_detail::EditNextFileNumber);
+        bulk_loader_detail::put_varint(edit, next_file_number);
+        bulk_loader_detail::put_varint(edit, bulk_loader_detail::EditLastSequence);
+        bulk_loader_detail::put_varint(edit, sequence);
+        for (const auto& meta : files) {
+            bulk_loader_detail::put_varint(edit, bulk_loader_detail::EditNewFile);
+            bulk_loader_detail::put_varint(edit, pick_level(meta));
+            bulk_loader_detail::put_varint(edit, meta.number);
+            bulk_loader_detail::put_varint(edit, meta.size);
+            bulk_loader_detail::put_length_prefixed(edit, meta.smallest);
+            bulk_loader_detail::put_length_prefixed(edit, meta.largest);
+        }
+        bulk_loader_detail::append_log_record(manifest_contents, edit);
+
+        auto manifest_name = bulk_loader_detail::make_manifest_name(manifest_number);
+        status = bulk_loader_detail::write_file_sync(env, manifest_contents, path + "/" + manifest_name);
+        if (status.ok()) {
+            auto temp_name = bulk_loader_detail::make_file_name(path, manifest_number, "dbtmp");
+            status = bulk_loader_detail::write_file_sync(env, manifest_name + "\n", temp_name);
+            if (status.ok()) {
+                status = env->RenameFile(temp_name, path + "/CURRENT");
+            }
+            if (!status.ok()) {
+                env->RemoveFile(temp_name);
+                env->RemoveFile(path + "/" + manifest_name);
+            }
+        }
+        if (!status.ok()) {
+            abandon();
+            return status;
+        }
+        files.clear();
+        release_lock();
+        return status;
+    }
+
+    // Delete the tables that have been written and release the lock.
+    // The database is not modified.
+    void abandon()
+    {
+        if (builder) {
+            builder->Abandon();
+            builder.reset();
+        }
+        if (file) {
+            file->Close();
+            file.reset();
+        }
+        for (const auto& meta : files) {
+            env->RemoveFile(bulk_loader_detail::make_file_name(path, meta.number, "ldb"));
+        }
+        files.clear();
+        release_lock();
+    }
+};
+
+} // namespace Amulet
@@ -0,0 +1,289 @@
+#pragma once
+
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <string_view>
+#include <thread>
+
+#include <leveldb/env.h>
+#include <leveldb/slice.h>
+#include <leveldb/status.h>
+
+namespace Amulet {
+
+// A token bucket that limits the rate of bytes passing through it.
+// The bucket holds up to one second of tokens so short bursts are not delayed.
+class RateLimiter {
+private:
+    using Clock = std::chrono::steady_clock;
+
+    std::mutex mutex;
+    double rate;
+    // This goes negative when a request is larger than the tokens available.
+    double tokens;
+    Clock::time_point last_refill;
+    std::atomic<uint64_t> throttled_ns = 0;
+
+public:
+    // rate is the number of bytes per second.
+    RateLimiter(uint64_t rate)
+        : rate(static_cast<double>(rate))
+        , tokens(static_cast<double>(rate))
+        , last_refill(Clock::now())
+    {
+    }
+
+    // Take tokens for the bytes, sleeping until they are available.
+    void request(size_t bytes)
+    {
+        std::chrono::duration<double> wait(0);
+        {
+            std::lock_guard lock(mutex);
+            auto now = Clock::now();
+            tokens = std::min(rate, tokens + rate * std::chrono::duration<double>(now - last_refill).count());
+            last_refill = now;
+            tokens -= static_cast<double>(bytes);
+            if (tokens < 0) {
+                wait = std::chrono::duration<double>(-tokens / rate);
+            }
+        }
+        if (0 < wait.count()) {
+            auto wait_ns = std::chrono::duration_cast<std::chrono::nanoseconds>(wait);
+            throttled_ns += wait_ns.count();
+            std::this_thread::sleep_for(wait_ns);
+        }
+    }
+
+    uint64_t get_rate()
+    {
+        std::lock_guard lock(mutex);
+        return static_cast<uint64_t>(rate);
+    }
+
+    // The total time spent waiting in seconds.
+    double get_throttled_time() const
+    {
+        return static_cast<double>(throttled_ns) / 1e9;
+    }
+};
+
+// The kinds of file in a database directory.
+enum class DatabaseFileType {
+    Log,
+    Table,
+    Manifest,
+    Other,
+};
+
+static constexpr size_t database_file_type_count = static_cast<size_t>(DatabaseFileType::Other) + 1;
+
+// The name of each file type in the same order as DatabaseFileType.
+static constexpr std::array<const char*, database_file_type_count> database_file_type_names {
+    "log",
+    "table",
+    "manifest",
+    "other",
+};
+
+// An Env that counts the bytes read and written for each type of file
+// and optionally limits the rate that table files are written.
+// Table files are only written by memtable flushes and compactions.
+class IOStatsEnv : public leveldb::EnvWrapper {
+public:
+    struct FileStats {
+        std::atomic<uint64_t> read_bytes = 0;
+        std::atomic<uint64_t> reads = 0;
+        std::atomic<uint64_t> write_bytes = 0;
+        std::atomic<uint64_t> writes = 0;
+        std::atomic<uint64_t> syncs = 0;
+    };
+
+private:
+    class StatsSequentialFile : public leveldb::SequentialFile {
+    private:
+        std::unique_ptr<leveldb::SequentialFile> file;
+        FileStats& stats;
+
+    public:
+        StatsSequentialFile(leveldb::SequentialFile* file, FileStats& stats)
+            : file(file)
+            , stats(stats)
+        {
+        }
+
+        leveldb::Status Read(size_t n, leveldb::Slice* result, char* scratch) override
+        {
+            auto status = file->Read(n, result, scratch);
+            if (status.ok()) {
+                stats.reads++;
+                stats.read_bytes += result->size();
+            }
+            return status;
+        }
+
+        leveldb::Status Skip(uint64_t n) override
+        {
+            return file->Skip(n);
+        }
+    };
+
+    class StatsRandomAccessFile : public leveldb::RandomAccessFile {
+    private:
+        std::unique_ptr<leveldb::RandomAccessFile> file;
+        FileStats& stats;
+
+    public:
+        StatsRandomAccessFile(leveldb::RandomAccessFile* file, FileStats& stats)
+            : file(file)
+            , stats(stats)
+        {
+        }
+
+        leveldb::Status Read(uint64_t offset, size_t n, leveldb::Slice* result, char* scratch) const override
+        {
+            auto status = file->Read(offset, n, result, scratch);
+            if (status.ok()) {
+                stats.reads++;
+                stats.read_bytes += result->size();
+            }
+            return status;
+        }
+    };
+
+    class StatsWritableFile : public leveldb::WritableFile {
+    private:
+        std::unique_ptr<leveldb::WritableFile> file;
+        FileStats& stats;
+        // The rate limiter for this file or nullptr.
+        RateLimiter* limiter;
+
+    public:
+        StatsWritableFile(leveldb::WritableFile* file, FileStats& stats, RateLimiter* limiter)
+            : file(file)
+            , stats(stats)
+            , limiter(limiter)
+        {
+        }
+
+        leveldb::Status Append(const leveldb::Slice& data) override
+        {
+            if (limiter) {
+                limiter->request(data.size());
+            }
+            stats.writes++;
+            stats.write_bytes += data.size();
+            return file->Append(data);
+        }
+
+        leveldb::Status Close() override
+        {
+            return file->Close();
+        }
+
+        leveldb::Status Flush() override
+        {
+            return file->Flush();
+        }
+
+        leveldb::Status Sync() override
+        {
+            stats.syncs++;
+            return file->Sync();
+        }
+    };
+
+    std::array<FileStats, database_file_type_count> file_stats;
+    std::unique_ptr<RateLimiter> table_write_limiter;
+
+    static DatabaseFileType get_file_type(const std::string& fname)
+    {
+        std::string_view name(fname);
+        auto separator = name.find_last_of("/\\");
+        if (separator != std::string_view::npos) {
+            name.remove_prefix(separator + 1);
+        }
+        if (name.ends_with(".log")) {
+            return DatabaseFileType::Log;
+        } else if (name.ends_with(".ldb") || name.ends_with(".sst")) {
+            return DatabaseFileType::Table;
+        } else if (name.starts_with("MANIFEST-")) {
+            return DatabaseFileType::Manifest;
+        }
+        return DatabaseFileType::Other;
+    }
+
+    FileStats& get_file_stats(const std::string& fname)
+    {
+        return file_stats[static_cast<size_t>(get_file_type(fname))];
+    }
+
+    // Wrap a writable file that was opened by the target.
+    leveldb::Status wrap_writable_file(const std::string& fname, leveldb::Status status, leveldb::WritableFile** result)
+    {
+        if (status.ok()) {
+            auto type = get_file_type(fname);
+            *result = new StatsWritableFile(
+                *result,
+                file_stats[static_cast<size_t>(type)],
+                type == DatabaseFileType::Table ? table_write_limiter.get() : nullptr);
+        }
+        return status;
+    }
+
+public:
+    // table_write_rate is the maximum number of bytes per second written to table files. 0 for no limit.
+    IOStatsEnv(leveldb::Env* target, uint64_t table_write_rate)
+        : leveldb::EnvWrapper(target)
+    {
+        if (table_write_rate) {
+            table_write_limiter = std::make_unique<RateLimiter>(table_write_rate);
+        }
+    }
+
+    const FileStats& get_stats(DatabaseFileType type) const
+    {
+        return file_stats[static_cast<size_t>(type)];
+    }
+
+    // Get the rate limiter for table writes or nullptr if there is no limit.
+    RateLimiter* get_table_write_limiter()
+    {
+        return table_write_limiter.get();
+    }
+
+    leveldb::Status NewSequentialFile(const std::string& fname, leveldb::SequentialFile** result) override
+    {
+        auto status = target()->NewSequentialFile(fname, result);
+        if (status.ok()) {
+            *result = new StatsSequentialFile(*result, get_file_stats(fname));
+        }
+        return status;
+    }
+
+    leveldb::Status NewRandomAccessFile(const std::string& fname, leveldb::RandomAccessFile** result) override
+    {
+        auto status = target()->NewRandomAccessFile(fname, result);
+        if (status.ok()) {
+            *result = new StatsRandomAccessFile(*result, get_file_stats(fname));
+        }
+        return status;
+    }
+
+    leveldb::Status NewWritableFile(const std::string& fname, leveldb::WritableFile** result) override
+    {
+        return wrap_writable_file(fname, target()->NewWritableFile(fname, result), result);
+    }
+
+    leveldb::Status NewAppendableFile(const std::string& fname, leveldb::WritableFile** result) override
+    {
+        return wrap_writable_file(fname, target()->NewAppendableFile(fname, result), result);
+    }
+};
+
+} // namespace Amulet
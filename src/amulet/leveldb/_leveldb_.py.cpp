@@ -1,11 +1,26 @@
+#include <pybind11/functional.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/typing.h>
 
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <cstdio>
+#include <cstdlib>
+#include <exception>
 #include <filesystem>
+#include <functional>
+#include <limits>
+#include <mutex>
 #include <optional>
+#include <sstream>
 #include <string>
+#include <thread>
 #include <variant>
+#include <vector>
 
 #include <leveldb/cache.h>
 #include <leveldb/db.h>
@@ -15,10 +30,20 @@
 #include <leveldb/options.h>
 #include <leveldb/write_batch.h>
 
+#include <amulet/pybind11_extensions/builtins.hpp>
+#include <amulet/pybind11_extensions/iterable.hpp>
 #include <amulet/pybind11_extensions/iterator.hpp>
+#include <amulet/pybind11_extensions/sequence.hpp>
 
 #include <amulet/leveldb.hpp>
 
+#include "_block_cache.py.hpp"
+#include "_bulk_loader.py.hpp"
+#include "_io_stats_env.py.hpp"
+#include "_metrics.py.hpp"
+#include "_read_only_env.py.hpp"
+#include "_value_cache.py.hpp"
+
 namespace py = pybind11;
 namespace pyext = Amulet::pybind11_extensions;
 
@@ -54,7 +79,7 @@ namespace detail {
     template <>
     struct type_caster<leveldb::WriteBatch> {
     public:
-        PYBIND11_TYPE_CASTER(leveldb::WriteBatch, const_name("collections.abc.Mapping[bytes, bytes]"));
+        PYBIND11_TYPE_CASTER(leveldb::WriteBatch, const_name("collections.abc.Mapping[bytes, bytes | None]"));
 
         bool load(handle src, bool)
         {
@@ -101,17 +126,183 @@ public:
     void Logv(const char*, va_list) override { }
 };
 
+// The state of a compaction running on a background thread.
+class CompactionTask {
+public:
+    // Guards all other state.
+    std::mutex mutex;
+    // Notified when the compaction makes progress or finishes.
+    std::condition_variable condition;
+    // The number of partitions. This is zero until the range has been partitioned.
+    size_t partition_count = 0;
+    // The number of partitions that have been compacted.
+    size_t compacted_count = 0;
+    bool cancelled = false;
+    bool finished = false;
+    std::optional<std::string> error;
+    // The thread running the compaction. This is joined by the database options.
+    std::thread thread;
+
+    // Stop the compaction after the current partition.
+    void cancel()
+    {
+        std::lock_guard lock(mutex);
+        cancelled = true;
+    }
+
+    bool is_cancelled()
+    {
+        std::lock_guard lock(mutex);
+        return cancelled;
+    }
+};
+
+// What happened while opening a database.
+struct OpenInfo {
+    // The number and combined size of the log files that were replayed into the database.
+    size_t log_files = 0;
+    uint64_t log_bytes = 0;
+    // The number of table files when the database was opened.
+    size_t table_files = 0;
+    // The total time spent in open_leveldb and the time spent in each phase in seconds.
+    double total_time = 0;
+    double open_time = 0;
+    std::optional<double> repair_time;
+};
+
 class LevelDBOptions : public Amulet::LevelDBOptions {
 public:
     NullLogger logger;
     leveldb::DecompressAllocator decompress_allocator;
+    std::unique_ptr<const leveldb::FilterPolicy> filter_policy;
+    std::shared_ptr<leveldb::Cache> block_cache;
+    // The cache if it was passed in by the user.
+    std::shared_ptr<Amulet::ResizableLRUCache> shared_block_cache;
+    size_t block_cache_size = 0;
+    int bloom_filter_bits = 0;
+    // The environment that stops the files being modified if the database was opened in read only mode.
+    std::unique_ptr<Amulet::ReadOnlyEnv> read_only_env;
+    // The environment that counts the bytes read and written. nullptr if disabled.
+    // This wraps read_only_env if the database was opened in read only mode.
+    std::unique_ptr<Amulet::IOStatsEnv> io_stats_env;
+    // The cache of decoded values in front of get and get_many. nullptr if disabled.
+    std::unique_ptr<Amulet::ValueCache> value_cache;
+    // The latency histograms. nullptr if disabled.
+    // This is shared with the iterators because they may outlive the database.
+    std::shared_ptr<Amulet::Metrics> metrics;
+    OpenInfo open_info;
+
+    // Guards compactions.
+    std::mutex compactions_mutex;
+    // The compactions started by compact_async.
+    std::vector<std::shared_ptr<CompactionTask>> compactions;
+
+    // Add a compaction and join the threads of compactions that have finished.
+    void add_compaction(std::shared_ptr<CompactionTask> task)
+    {
+        std::lock_guard lock(compactions_mutex);
+        std::erase_if(compactions, [](const std::shared_ptr<CompactionTask>& other) {
+            bool finished;
+            {
+                std::lock_guard task_lock(other->mutex);
+                finished = other->finished;
+            }
+            if (finished) {
+                other->thread.join();
+            }
+            return finished;
+        });
+        compactions.push_back(std::move(task));
+    }
+
+    // Cancel the running compactions and wait for them to stop.
+    void close() override
+    {
+        std::lock_guard lock(compactions_mutex);
+        for (auto& task : compactions) {
+            task->cancel();
+        }
+        for (auto& task : compactions) {
+            task->thread.join();
+        }
+        compactions.clear();
+    }
 };
 
+// Get the options subclass created by open_leveldb.
+// Returns nullptr if the database was opened by other code.
+static LevelDBOptions* get_options(Amulet::LevelDB& db)
+{
+    return dynamic_cast<LevelDBOptions*>(&db.get_options());
+}
+
+// Get the value cache of the database.
+// Returns nullptr if the value cache is disabled.
+static Amulet::ValueCache* get_value_cache(Amulet::LevelDB& db)
+{
+    auto* options = get_options(db);
+    return options ? options->value_cache.get() : nullptr;
+}
+
+// Get the metrics of the database.
+// Returns nullptr if metrics are disabled or the database is closed.
+static std::shared_ptr<Amulet::Metrics> get_metrics(Amulet::LevelDB& db)
+{
+    if (!db) {
+        return nullptr;
+    }
+    auto* options = get_options(db);
+    return options ? options->metrics : nullptr;
+}
+
+// Raise an exception if the database was opened in read only mode.
+static void check_writable(Amulet::LevelDB& db)
+{
+    auto* options = get_options(db);
+    if (options && options->read_only_env) {
+        throw LevelDBException("The database was opened in read only mode.");
+    }
+}
+
 std::unique_ptr<Amulet::LevelDB> open_leveldb(
     std::string path_str,
     bool create_if_missing = false,
-    leveldb::CompressionType compression_type = leveldb::kZlibRawCompression)
+    leveldb::CompressionType compression_type = leveldb::kZlibRawCompression,
+    size_t block_cache_size = 40 * 1024 * 1024,
+    size_t write_buffer_size = 4 * 1024 * 1024,
+    size_t block_size = 163840,
+    int bloom_filter_bits = 10,
+    int max_open_files = 1000,
+    std::optional<std::shared_ptr<Amulet::ResizableLRUCache>> block_cache = std::nullopt,
+    bool sync = false,
+    bool read_only = false,
+    size_t value_cache_size = 0,
+    bool metrics = false,
+    std::string repair = "auto",
+    bool io_stats = false,
+    size_t compaction_write_rate = 0)
 {
+    using Clock = std::chrono::steady_clock;
+    auto start_time = Clock::now();
+    if (write_buffer_size == 0) {
+        throw py::value_error("write_buffer_size must be greater than 0.");
+    }
+    if (block_size == 0) {
+        throw py::value_error("block_size must be greater than 0.");
+    }
+    if (bloom_filter_bits < 0) {
+        throw py::value_error("bloom_filter_bits must not be negative.");
+    }
+    if (max_open_files < 1) {
+        throw py::value_error("max_open_files must be greater than 0.");
+    }
+    if (read_only && create_if_missing) {
+        throw py::value_error("create_if_missing can not be used in read only mode.");
+    }
+    if (repair != "auto" && repair != "never") {
+        throw py::value_error("repair must be \"auto\" or \"never\".");
+    }
+
     // Expand dots and symbolic links
     auto path = std::filesystem::absolute(path_str);
     // If there is not a directory at the path
@@ -129,30 +320,92 @@ std::unique_ptr<Amulet::LevelDB> open_leveldb(
 
     auto options = std::make_unique<LevelDBOptions>();
     options->options.create_if_missing = create_if_missing;
-    options->options.filter_policy = leveldb::NewBloomFilterPolicy(10);
-    options->options.block_cache = leveldb::NewLRUCache(40 * 1024 * 1024);
-    options->options.write_buffer_size = 4 * 1024 * 1024;
+    options->bloom_filter_bits = bloom_filter_bits;
+    if (bloom_filter_bits) {
+        options->filter_policy.reset(leveldb::NewBloomFilterPolicy(bloom_filter_bits));
+    }
+    options->options.filter_policy = options->filter_policy.get();
+    if (block_cache && *block_cache) {
+        options->shared_block_cache = *block_cache;
+        options->block_cache = std::move(*block_cache);
+    } else {
+        options->block_cache_size = block_cache_size;
+        options->block_cache.reset(leveldb::NewLRUCache(block_cache_size));
+    }
+    options->options.block_cache = options->block_cache.get();
+    options->options.write_buffer_size = write_buffer_size;
     options->options.info_log = &options->logger;
     options->options.compression = compression_type;
-    options->options.block_size = 163840;
+    options->options.block_size = block_size;
+    options->options.max_open_files = max_open_files;
 
     options->read_options.decompress_allocator = &options->decompress_allocator;
 
-    leveldb::DB* _db = NULL;
-    auto status = leveldb::DB::Open(options->options, path.string(), &_db);
-    if (status.ok()) {
+    options->write_options.sync = sync;
+
+    if (value_cache_size) {
+        options->value_cache = std::make_unique<Amulet::ValueCache>(value_cache_size);
+    }
+    if (metrics) {
+        options->metrics = std::make_shared<Amulet::Metrics>();
+    }
+
+    if (read_only) {
+        options->read_only_env = std::make_unique<Amulet::ReadOnlyEnv>(leveldb::Env::Default());
+        options->options.env = options->read_only_env.get();
+        // Recovering the log while opening needs to write files in memory.
+        options->read_only_env->begin_open();
+    }
+    if (io_stats || compaction_write_rate) {
+        options->io_stats_env = std::make_unique<Amulet::IOStatsEnv>(options->options.env, compaction_write_rate);
+        options->options.env = options->io_stats_env.get();
+    }
+    // Find the files that opening will read.
+    auto& open_info = options->open_info;
+    for (const auto& entry : std::filesystem::directory_iterator(path)) {
+        auto extension = entry.path().extension();
+        if (extension == ".log") {
+            open_info.log_files++;
+            open_info.log_bytes += entry.file_size();
+        } else if (extension == ".ldb" || extension == ".sst") {
+            open_info.table_files++;
+        }
+    }
+
+    auto* metrics_ptr = options->metrics.get();
+    auto open_db = [&]() {
+        py::gil_scoped_release nogil;
+        Amulet::MetricsTimer timer(metrics_ptr, Amulet::MetricsOperation::Open);
+        auto phase_start = Clock::now();
+        leveldb::DB* _db = NULL;
+        auto status = leveldb::DB::Open(options->options, path.string(), &_db);
+        open_info.open_time += std::chrono::duration<double>(Clock::now() - phase_start).count();
+        return std::make_pair(status, _db);
+    };
+    auto make_db = [&](leveldb::DB* _db) {
+        open_info.total_time = std::chrono::duration<double>(Clock::now() - start_time).count();
         return std::make_unique<Amulet::LevelDB>(
             std::unique_ptr<leveldb::DB>(_db),
             std::move(options));
-    } else if (status.IsCorruption()) {
-        leveldb::RepairDB(path.string(), options->options);
+    };
+
+    auto [status, _db] = open_db();
+    if (read_only) {
+        options->read_only_env->end_open();
+    }
+    if (status.ok()) {
+        return make_db(_db);
+    } else if (status.IsCorruption() && !read_only && repair == "auto") {
         {
-            auto status2 = leveldb::DB::Open(options->options, path.string(), &_db);
-            if (status2.ok()) {
-                return std::make_unique<Amulet::LevelDB>(
-                    std::unique_ptr<leveldb::DB>(_db),
-                    std::move(options));
-            }
+            py::gil_scoped_release nogil;
+            Amulet::MetricsTimer timer(metrics_ptr, Amulet::MetricsOperation::Repair);
+            auto phase_start = Clock::now();
+            leveldb::RepairDB(path.string(), options->options);
+            open_info.repair_time = std::chrono::duration<double>(Clock::now() - phase_start).count();
+        }
+        auto [status2, _db2] = open_db();
+        if (status2.ok()) {
+            return make_db(_db2);
         }
         throw LevelDBException("Could not recover corrupted database. " + status.ToString());
     } else if (status.IsNotSupportedError()) {
@@ -163,349 +416,2875 @@ std::unique_ptr<Amulet::LevelDB> open_leveldb(
     throw LevelDBException(status.ToString());
 }
 
-class LevelDBKeysIterator {
-private:
-    std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr;
+// Copy the contents of a slice into a new bytes object.
+static py::bytes slice_to_bytes(const leveldb::Slice& slice)
+{
+    return py::bytes(slice.data(), slice.size());
+}
+
+// Lock the mutex of an iterator.
+// If the GIL is held and the mutex is locked by another thread the GIL is released while waiting.
+// Threads may acquire the GIL while holding the mutex so all lockers that hold the GIL must use this.
+static std::unique_lock<std::mutex> lock_iterator_mutex(Amulet::LevelDBIterator& iterator)
+{
+    std::unique_lock lock(iterator.get_mutex(), std::try_to_lock);
+    if (!lock) {
+        if (PyGILState_Check()) {
+            py::gil_scoped_release nogil;
+            lock.lock();
+        } else {
+            lock.lock();
+        }
+    }
+    return lock;
+}
+
+// Lock an iterator so that the database can not destroy it while it is in use.
+// The GIL may be acquired while the lock is held. See lock_iterator_mutex.
+// Raises an exception if the iterator has been destroyed.
+static std::unique_lock<std::mutex> lock_iterator(Amulet::LevelDBIterator& iterator)
+{
+    auto lock = lock_iterator_mutex(iterator);
+    if (!iterator) {
+        throw std::runtime_error("LevelDBIterator has been deleted.");
+    }
+    return lock;
+}
 
+// An immutable buffer that owns a value read from the database.
+// This is exposed to python through the buffer protocol.
+class ValueBuffer {
 public:
-    LevelDBKeysIterator(
-        std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr)
-        : iterator_ptr(std::move(iterator_ptr))
+    std::string data;
+};
+
+// A group of writes that are applied to the database atomically.
+// This wraps leveldb::WriteBatch because that does not expose the number of operations.
+class WriteBatch {
+public:
+    leveldb::WriteBatch batch;
+    size_t count = 0;
+    // Guards batch and count.
+    // Writing to the database happens without the GIL so this is needed to stop concurrent modification.
+    // This must be locked without the GIL so that a thread holding it can not wait for the GIL.
+    std::mutex mutex;
+};
+
+// The bounds and direction of an iteration.
+class KeyRange {
+public:
+    std::optional<std::string> start;
+    std::optional<std::string> end;
+    bool start_inclusive = true;
+    bool end_inclusive = false;
+    bool reverse = false;
+
+    // Get the range of keys that start with the prefix.
+    static KeyRange from_prefix(std::string prefix, bool reverse)
     {
+        KeyRange range;
+        range.reverse = reverse;
+        // The end is the shortest key greater than all keys with the prefix.
+        std::string end = prefix;
+        while (!end.empty() && static_cast<unsigned char>(end.back()) == 0xFF) {
+            end.pop_back();
+        }
+        if (!end.empty()) {
+            end.back()++;
+            range.end = std::move(end);
+        }
+        if (!prefix.empty()) {
+            range.start = std::move(prefix);
+        }
+        return range;
     }
 
-    py::bytes next()
+    // Move the iterator to the first key in the range.
+    void seek(leveldb::Iterator& iterator) const
     {
-        auto& iterator = *iterator_ptr;
-        if (!iterator) {
-            throw std::runtime_error("LevelDBIterator has been deleted.");
+        if (reverse) {
+            if (end) {
+                iterator.Seek(*end);
+                if (!iterator.Valid()) {
+                    iterator.SeekToLast();
+                } else if (!end_inclusive || 0 < iterator.key().compare(*end)) {
+                    iterator.Prev();
+                }
+            } else {
+                iterator.SeekToLast();
+            }
+        } else {
+            if (start) {
+                iterator.Seek(*start);
+                if (!start_inclusive && iterator.Valid() && iterator.key() == *start) {
+                    iterator.Next();
+                }
+            } else {
+                iterator.SeekToFirst();
+            }
         }
-        if (!iterator->Valid()) {
-            throw py::stop_iteration();
+    }
+
+    // Has the iterator not yet passed the far bound.
+    // The near bound is handled by seek.
+    bool contains(const leveldb::Slice& key) const
+    {
+        if (reverse) {
+            if (start) {
+                int cmp = key.compare(*start);
+                return start_inclusive ? 0 <= cmp : 0 < cmp;
+            }
+        } else if (end) {
+            int cmp = key.compare(*end);
+            return end_inclusive ? cmp <= 0 : cmp < 0;
+        }
+        return true;
+    }
+
+    // Move the iterator one step in the direction of iteration.
+    void advance(leveldb::Iterator& iterator) const
+    {
+        if (reverse) {
+            iterator.Prev();
+        } else {
+            iterator.Next();
         }
-        // Get value.
-        auto key = py::bytes(iterator->key().ToString());
-        // Increment for next time.
-        iterator->Next();
-        // Return value
-        return key;
     }
 };
 
-class LevelDBValuesIterator {
+// What each iteration yields.
+enum class IterateMode {
+    Items,
+    Keys,
+    Values,
+};
+
+template <IterateMode mode>
+using IterateResult = std::conditional_t<mode == IterateMode::Items, py::typing::Tuple<py::bytes, py::bytes>, py::bytes>;
+
+template <IterateMode mode>
+class LevelDBRangeIterator {
 private:
     std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr;
+    KeyRange range;
+    // The number of items left to return.
+    std::optional<size_t> limit;
+    std::shared_ptr<Amulet::Metrics> metrics;
 
 public:
-    LevelDBValuesIterator(
-        std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr)
+    LevelDBRangeIterator(
+        std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr,
+        KeyRange range,
+        std::optional<size_t> limit,
+        std::shared_ptr<Amulet::Metrics> metrics)
         : iterator_ptr(std::move(iterator_ptr))
+        , range(std::move(range))
+        , limit(limit)
+        , metrics(std::move(metrics))
     {
     }
 
-    py::bytes next()
+    IterateResult<mode> next()
     {
-        auto& iterator = *iterator_ptr;
-        if (!iterator) {
-            throw std::runtime_error("LevelDBIterator has been deleted.");
-        }
-        if (!iterator->Valid()) {
+        auto lock = lock_iterator(*iterator_ptr);
+        auto& iterator = iterator_ptr->get_iterator();
+        if (!iterator.Valid() || limit == 0) {
             throw py::stop_iteration();
         }
         // Get value.
-        auto value = py::bytes(iterator->value().ToString());
-        // Increment for next time.
-        iterator->Next();
+        auto key = iterator.key();
+        if (!range.contains(key)) {
+            throw py::stop_iteration();
+        }
+        IterateResult<mode> result;
+        if constexpr (mode == IterateMode::Items) {
+            result = py::make_tuple(
+                slice_to_bytes(key),
+                slice_to_bytes(iterator.value()));
+        } else if constexpr (mode == IterateMode::Keys) {
+            result = slice_to_bytes(key);
+        } else {
+            result = slice_to_bytes(iterator.value());
+        }
+        if (limit) {
+            (*limit)--;
+        }
+        if (limit != 0) {
+            // Increment for next time.
+            // This may read and decompress a block so release the GIL.
+            // The lock must be released before the GIL is acquired.
+            py::gil_scoped_release nogil;
+            {
+                Amulet::MetricsTimer timer(metrics.get(), Amulet::MetricsOperation::Next);
+                range.advance(iterator);
+            }
+            lock.unlock();
+        }
         // Return value
-        return value;
+        return result;
     }
 };
 
-class LevelDBItemsIterator {
+template <IterateMode mode>
+class LevelDBBatchIterator {
 private:
     std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr;
+    KeyRange range;
+    size_t batch_size;
+    std::optional<size_t> max_bytes;
+    std::shared_ptr<Amulet::Metrics> metrics;
 
 public:
-    LevelDBItemsIterator(
-        std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr)
+    LevelDBBatchIterator(
+        std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr,
+        KeyRange range,
+        size_t batch_size,
+        std::optional<size_t> max_bytes,
+        std::shared_ptr<Amulet::Metrics> metrics = nullptr)
         : iterator_ptr(std::move(iterator_ptr))
+        , range(std::move(range))
+        , batch_size(batch_size)
+        , max_bytes(max_bytes)
+        , metrics(std::move(metrics))
     {
     }
 
-    py::typing::Tuple<py::bytes, py::bytes> next()
+    py::typing::List<IterateResult<mode>> next()
     {
-        auto& iterator = *iterator_ptr;
-        if (!iterator) {
-            throw std::runtime_error("LevelDBIterator has been deleted.");
+        std::vector<std::string> keys;
+        std::vector<std::string> values;
+        {
+            // Read the batch without the GIL.
+            py::gil_scoped_release nogil;
+            auto& iterator = *iterator_ptr;
+            auto lock = lock_iterator(iterator);
+            Amulet::MetricsTimer timer(metrics.get(), Amulet::MetricsOperation::NextBatch);
+            size_t byte_count = 0;
+            while (keys.size() < batch_size && iterator->Valid()) {
+                auto key = iterator->key();
+                if (!range.contains(key)) {
+                    break;
+                }
+                leveldb::Slice value;
+                if constexpr (mode == IterateMode::Items) {
+                    value = iterator->value();
+                }
+                byte_count += key.size() + value.size();
+                if (max_bytes && *max_bytes < byte_count && !keys.empty()) {
+                    break;
+                }
+                keys.push_back(key.ToString());
+                if constexpr (mode == IterateMode::Items) {
+                    values.push_back(value.ToString());
+                }
+                range.advance(*iterator);
+            }
         }
-        if (!iterator->Valid()) {
+        if (keys.empty()) {
             throw py::stop_iteration();
         }
-        // Get value.
-        auto item = py::make_tuple(
-            py::bytes(iterator->key().ToString()),
-            py::bytes(iterator->value().ToString()));
-        // Increment for next time.
-        iterator->Next();
-        // Return value
-        return item;
+        py::list batch(keys.size());
+        for (size_t i = 0; i < keys.size(); i++) {
+            if constexpr (mode == IterateMode::Items) {
+                batch[i] = py::make_tuple(py::bytes(keys[i]), py::bytes(values[i]));
+                std::string().swap(values[i]);
+            } else {
+                batch[i] = py::bytes(keys[i]);
+            }
+            // Free the memory as we go to reduce the peak usage.
+            std::string().swap(keys[i]);
+        }
+        return batch;
     }
 };
 
-class LevelDBItemsRangeIterator {
+// A sequence of python keys and views into their buffers.
+// The python objects are kept alive so that the slices remain valid.
+class KeySlices {
 private:
-    std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr;
-    std::optional<std::string> end;
+    std::vector<py::bytes> objects;
 
 public:
-    LevelDBItemsRangeIterator(
-        std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr,
-        std::string end)
-        : iterator_ptr(std::move(iterator_ptr))
-        , end(end)
-    {
-    }
+    std::vector<leveldb::Slice> slices;
 
-    py::typing::Tuple<py::bytes, py::bytes> next()
+    KeySlices(const pyext::collections::Sequence<py::bytes>& keys)
     {
-        auto& iterator = *iterator_ptr;
-        if (!iterator) {
-            throw std::runtime_error("LevelDBIterator has been deleted.");
+        auto size = keys.size();
+        if (size < 0) {
+            throw py::error_already_set();
         }
-        if (!iterator->Valid()) {
-            throw py::stop_iteration();
+        objects.reserve(size);
+        slices.reserve(size);
+        for (py::bytes key : keys) {
+            char* buffer;
+            Py_ssize_t length;
+            if (PyBytes_AsStringAndSize(key.ptr(), &buffer, &length)) {
+                throw py::error_already_set();
+            }
+            slices.emplace_back(buffer, length);
+            objects.push_back(std::move(key));
         }
-        // Get value.
-        std::string key = iterator->key().ToString();
-        if (end <= key) {
-            throw py::stop_iteration();
+    }
+};
+
+// Convert the result of DB::Get to a bytes object.
+static py::bytes get_result(const leveldb::Status& status, const std::string& value, const leveldb::Slice& key)
+{
+    if (status.ok()) {
+        return py::bytes(value);
+    } else if (status.IsNotFound()) {
+        throw py::key_error(key.ToString());
+    } else {
+        throw LevelDBException(status.ToString());
+    }
+}
+
+// Read the values for many keys.
+// found is set to true for each key that exists.
+// This should be called without the GIL.
+static void read_many(
+    leveldb::DB& db,
+    const leveldb::ReadOptions& read_options,
+    const std::vector<leveldb::Slice>& keys,
+    std::vector<std::string>& values,
+    std::vector<bool>& found)
+{
+    values.resize(keys.size());
+    found.assign(keys.size(), false);
+    for (size_t i = 0; i < keys.size(); i++) {
+        auto status = db.Get(read_options, keys[i], &values[i]);
+        if (status.ok()) {
+            found[i] = true;
+        } else if (!status.IsNotFound()) {
+            throw LevelDBException(status.ToString());
         }
-        auto item = py::make_tuple(
-            py::bytes(key),
-            py::bytes(iterator->value().ToString()));
-        // Increment for next time.
-        iterator->Next();
-        // Return value
-        return item;
+    }
+}
+
+// Convert the values read by read_many to a python list.
+static py::list make_value_list(std::vector<std::string>& values, const std::vector<bool>& found, const py::object& default_)
+{
+    py::list result(values.size());
+    for (size_t i = 0; i < values.size(); i++) {
+        if (found[i]) {
+            result[i] = py::bytes(values[i]);
+            // Free the memory as we go to reduce the peak usage.
+            std::string().swap(values[i]);
+        } else {
+            result[i] = default_;
+        }
+    }
+    return result;
+}
+
+// Create a python iterator through the items between start and end.
+static KeyRange make_key_range(
+    const std::optional<py::bytes>& start,
+    const std::optional<py::bytes>& end,
+    bool start_inclusive,
+    bool end_inclusive,
+    bool reverse)
+{
+    KeyRange range;
+    if (start) {
+        range.start = start->cast<std::string>();
+    }
+    if (end) {
+        range.end = end->cast<std::string>();
+    }
+    range.start_inclusive = start_inclusive;
+    range.end_inclusive = end_inclusive;
+    range.reverse = reverse;
+    return range;
+}
+
+// Seek the iterator to the start of the range and create an iterator over the range.
+template <IterateMode mode>
+static pyext::collections::Iterator<IterateResult<mode>> make_range_iterator(
+    std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr,
+    KeyRange range,
+    std::optional<size_t> limit = std::nullopt,
+    std::shared_ptr<Amulet::Metrics> metrics = nullptr)
+{
+    {
+        py::gil_scoped_release nogil;
+        auto& iterator = *iterator_ptr;
+        auto lock = lock_iterator(iterator);
+        Amulet::MetricsTimer timer(metrics.get(), Amulet::MetricsOperation::Seek);
+        range.seek(*iterator);
+    }
+    return pyext::make_iterator(
+        LevelDBRangeIterator<mode>(std::move(iterator_ptr), std::move(range), limit, std::move(metrics)));
+}
+
+// Seek the iterator to the start of the range and create an iterator over batches of the range.
+template <IterateMode mode>
+static pyext::collections::Iterator<py::typing::List<IterateResult<mode>>> make_batch_iterator(
+    std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr,
+    KeyRange range,
+    size_t batch_size,
+    std::optional<size_t> max_bytes,
+    std::shared_ptr<Amulet::Metrics> metrics = nullptr)
+{
+    if (batch_size == 0) {
+        throw py::value_error("batch_size must be greater than 0.");
+    }
+    {
+        py::gil_scoped_release nogil;
+        auto& iterator = *iterator_ptr;
+        auto lock = lock_iterator(iterator);
+        Amulet::MetricsTimer timer(metrics.get(), Amulet::MetricsOperation::Seek);
+        range.seek(*iterator);
+    }
+    return pyext::make_iterator(
+        LevelDBBatchIterator<mode>(std::move(iterator_ptr), std::move(range), batch_size, max_bytes, std::move(metrics)));
+}
+
+// Get the write options for a write.
+// If sync is given it overrides the database default.
+// Raises LevelDBException if the database is read only.
+static leveldb::WriteOptions get_write_options(Amulet::LevelDB& db, std::optional<bool> sync)
+{
+    check_writable(db);
+    auto write_options = db.get_write_options();
+    if (sync) {
+        write_options.sync = *sync;
+    }
+    return write_options;
+}
+
+// Removes the keys in a write batch from a value cache.
+class ValueCacheInvalidator : public leveldb::WriteBatch::Handler {
+private:
+    Amulet::ValueCache& cache;
+
+public:
+    ValueCacheInvalidator(Amulet::ValueCache& cache)
+        : cache(cache)
+    {
+    }
+
+    void Put(const leveldb::Slice& key, const leveldb::Slice&) override
+    {
+        cache.erase(key);
+    }
+
+    void Delete(const leveldb::Slice& key) override
+    {
+        cache.erase(key);
     }
 };
 
-static std::unique_ptr<Amulet::LevelDBIterator> get_start_iterator(Amulet::LevelDB& db)
+// Write a batch to the database.
+// The modified keys are removed from the value cache.
+static void write_batch(Amulet::LevelDB& db, const leveldb::WriteOptions& write_options, leveldb::WriteBatch& batch)
+{
+    leveldb::Status status;
+    {
+        Amulet::MetricsTimer timer(get_metrics(db).get(), Amulet::MetricsOperation::Write);
+        status = db->Write(write_options, &batch);
+    }
+    if (auto* value_cache = get_value_cache(db)) {
+        // Invalidate even if the write failed because part of it may have been applied.
+        ValueCacheInvalidator invalidator(*value_cache);
+        if (!batch.Iterate(&invalidator).ok()) {
+            value_cache->clear();
+        }
+    }
+    if (!status.ok()) {
+        throw LevelDBException(status.ToString());
+    }
+}
+
+// Delete the keys in the range in batches of approximately max_batch_size bytes.
+// Only the last batch uses the requested sync option. Syncing it also syncs the earlier batches.
+// The range is compacted afterwards if compact is true.
+// This must be called without the GIL.
+// Returns the number of keys that were deleted.
+static uint64_t delete_range(
+    Amulet::LevelDB& db,
+    const KeyRange& range,
+    size_t max_batch_size,
+    std::optional<bool> sync,
+    bool compact)
 {
-    py::gil_scoped_release nogil;
     if (!db) {
         throw std::runtime_error("The LevelDB database has been closed.");
     }
-    auto iterator_ptr = db.create_iterator();
-    auto& iterator = *iterator_ptr;
-    iterator->SeekToFirst();
-    return iterator_ptr;
+    auto write_options = get_write_options(db, sync);
+    auto batch_write_options = write_options;
+    batch_write_options.sync = false;
+    // Don't fill the block cache with blocks that are about to be deleted.
+    auto read_options = db.get_read_options();
+    read_options.fill_cache = false;
+
+    uint64_t count = 0;
+    leveldb::WriteBatch batch;
+    {
+        // The iterator reads an implicit snapshot so it does not see the deletions.
+        auto iterator_ptr = db.create_iterator(read_options);
+        auto& iterator = iterator_ptr->get_iterator();
+        for (range.seek(iterator); iterator.Valid() && range.contains(iterator.key()); range.advance(iterator)) {
+            batch.Delete(iterator.key());
+            count++;
+            if (max_batch_size <= batch.ApproximateSize()) {
+                write_batch(db, batch_write_options, batch);
+                batch.Clear();
+            }
+        }
+        auto status = iterator.status();
+        if (!status.ok()) {
+            throw LevelDBException(status.ToString());
+        }
+    }
+    write_batch(db, write_options, batch);
+
+    if (compact && count) {
+        leveldb::Slice start = range.start ? leveldb::Slice(*range.start) : leveldb::Slice();
+        leveldb::Slice end = range.end ? leveldb::Slice(*range.end) : leveldb::Slice();
+        db->CompactRange(range.start ? &start : nullptr, range.end ? &end : nullptr);
+    }
+    return count;
 }
 
-} // namespace
+// Buffers writes into large batches to import data quickly.
+class BulkImport {
+private:
+    Amulet::LevelDB& db;
+    size_t max_batch_size;
+    bool compact;
+    leveldb::WriteBatch batch;
+    // The range of keys that have been written.
+    std::optional<std::string> min_key;
+    std::optional<std::string> max_key;
+    bool finished = false;
 
-void init_amulet_leveldb(py::module m)
-{
-    std::string module_name = m.attr("__name__").cast<std::string>();
+    // Extend a range of keys to include the key.
+    static void extend_range(std::optional<std::string>& min, std::optional<std::string>& max, const leveldb::Slice& key)
+    {
+        if (!min || key.compare(*min) < 0) {
+            min = key.ToString();
+        }
+        if (!max || max->compare(0, std::string::npos, key.data(), key.size()) < 0) {
+            max = key.ToString();
+        }
+    }
 
-    py::register_local_exception<LevelDBException>(m, "LevelDBException");
-    py::register_local_exception<LevelDBEncrypted>(m, "LevelDBEncrypted");
+    // Check that operations can be added.
+    // The mutex must be locked.
+    void check_state()
+    {
+        if (finished) {
+            throw std::runtime_error("The bulk import has finished.");
+        }
+        if (!db) {
+            throw std::runtime_error("The LevelDB database has been closed.");
+        }
+    }
 
-    py::classh<Amulet::LevelDBIterator> LevelDBIterator(m, "LevelDBIterator", py::release_gil_before_calling_cpp_dtor());
-    LevelDBIterator.def(
-        "valid",
-        [](Amulet::LevelDBIterator& self) {
-            return self && self->Valid();
-        },
-        py::doc(
-            "Is the iterator at a valid entry.\n"
-            "If False, calls to other methods may error."));
-    LevelDBIterator.def(
-        "seek_to_first",
-        [](Amulet::LevelDBIterator& self) {
-            if (!self) {
-                throw std::runtime_error("LevelDBIterator has been deleted.");
-            }
+    // Check the state and track the key.
+    // The mutex must be locked.
+    void add_key(const leveldb::Slice& key)
+    {
+        check_state();
+        extend_range(min_key, max_key, key);
+    }
+
+    // Add the operations from a batch covering the given key range.
+    // This must be called without the GIL.
+    void append(const leveldb::WriteBatch& other, const std::string& other_min_key, const std::string& other_max_key)
+    {
+        std::lock_guard lock(mutex);
+        check_state();
+        extend_range(min_key, max_key, other_min_key);
+        extend_range(min_key, max_key, other_max_key);
+        batch.Append(other);
+        write_if_full();
+    }
+
+    // Write the buffered operations if they exceed the maximum size.
+    // The mutex must be locked and this must be called without the GIL.
+    void write_if_full()
+    {
+        if (max_batch_size <= batch.ApproximateSize()) {
+            auto write_options = db.get_write_options();
+            write_options.sync = false;
+            write_batch(db, write_options, batch);
+            batch.Clear();
+        }
+    }
+
+public:
+    // Guards all other state.
+    std::mutex mutex;
+
+    BulkImport(Amulet::LevelDB& db, size_t max_batch_size, bool compact)
+        : db(db)
+        , max_batch_size(max_batch_size)
+        , compact(compact)
+    {
+    }
+
+    // Add a put operation.
+    // This must be called without the GIL.
+    void put(const leveldb::Slice& key, const leveldb::Slice& value)
+    {
+        std::lock_guard lock(mutex);
+        add_key(key);
+        batch.Put(key, value);
+        write_if_full();
+    }
+
+    // Add a delete operation.
+    // This must be called without the GIL.
+    void del(const leveldb::Slice& key)
+    {
+        std::lock_guard lock(mutex);
+        add_key(key);
+        batch.Delete(key);
+        write_if_full();
+    }
+
+    // Add a put operation for each pair.
+    // This must be called with the GIL.
+    void put_many(pyext::collections::Iterable<py::typing::Tuple<py::bytes, py::bytes>> pairs)
+    {
+        // Iterating may run python code that uses this import so this must not hold the mutex.
+        // The pairs are buffered into a local batch that is appended each time it is full.
+        leveldb::WriteBatch local_batch;
+        std::optional<std::string> local_min_key;
+        std::optional<std::string> local_max_key;
+        auto flush = [&] {
+            {
+                // Other threads may hold the mutex without the GIL.
+                py::gil_scoped_release nogil;
+                append(local_batch, *local_min_key, *local_max_key);
+            }
+            local_batch.Clear();
+            local_min_key.reset();
+            local_max_key.reset();
+        };
+        py::detail::make_caster<std::pair<leveldb::Slice, leveldb::Slice>> caster;
+        for (py::handle item : static_cast<py::object&>(pairs)) {
+            if (!caster.load(item, true)) {
+                throw py::type_error("Each item must be a pair of bytes.");
+            }
+            auto [key, value] = py::detail::cast_op<std::pair<leveldb::Slice, leveldb::Slice>>(caster);
+            extend_range(local_min_key, local_max_key, key);
+            local_batch.Put(key, value);
+            if (max_batch_size <= local_batch.ApproximateSize()) {
+                flush();
+            }
+        }
+        if (local_min_key) {
+            flush();
+        }
+    }
+
+    // Write the remaining operations with sync enabled and compact the modified range if requested.
+    // Does nothing if the import has already finished.
+    // This must be called without the GIL.
+    void finish(bool allow_compact = true)
+    {
+        std::lock_guard lock(mutex);
+        if (finished) {
+            return;
+        }
+        finished = true;
+        if (!db) {
+            throw std::runtime_error("The LevelDB database has been closed.");
+        }
+        auto write_options = db.get_write_options();
+        write_options.sync = true;
+        write_batch(db, write_options, batch);
+        batch.Clear();
+        if (compact && allow_compact && min_key) {
+            leveldb::Slice begin(*min_key);
+            leveldb::Slice end(*max_key);
+            db->CompactRange(&begin, &end);
+        }
+    }
+};
+
+// Buffers larger than this are freed after use rather than reused.
+static constexpr size_t large_value_buffer_size = 1024 * 1024;
+
+// Check if a key exists in the database.
+// DB::Get checks the bloom filter of each table before reading a block, which an iterator seek does not,
+// so it is the cheapest existence check the public API allows.
+// The value is read into the given buffer so that its memory can be reused between calls.
+static bool contains(Amulet::LevelDB& db, const leveldb::ReadOptions& read_options, const leveldb::Slice& key, std::string& buffer)
+{
+    return db->Get(read_options, key, &buffer).ok();
+}
+
+// Hold a snapshot of the database for the lifetime of this object.
+// The database must outlive this object.
+class ScopedSnapshot {
+private:
+    leveldb::DB& db;
+
+public:
+    leveldb::ReadOptions read_options;
+
+    ScopedSnapshot(Amulet::LevelDB& db)
+        : db(db.get_database())
+        , read_options(db.get_read_options())
+    {
+        read_options.snapshot = this->db.GetSnapshot();
+    }
+
+    ScopedSnapshot(const ScopedSnapshot&) = delete;
+    ScopedSnapshot& operator=(const ScopedSnapshot&) = delete;
+
+    ~ScopedSnapshot()
+    {
+        db.ReleaseSnapshot(read_options.snapshot);
+    }
+};
+
+// Read the values for many keys using the value cache.
+// The keys that are not cached are read from one snapshot and added to the cache.
+// This should be called without the GIL.
+static void read_many_cached(
+    Amulet::LevelDB& db,
+    Amulet::ValueCache& value_cache,
+    const std::vector<leveldb::Slice>& keys,
+    std::vector<std::string>& values,
+    std::vector<bool>& found)
+{
+    values.resize(keys.size());
+    found.assign(keys.size(), false);
+    std::vector<size_t> missed;
+    for (size_t i = 0; i < keys.size(); i++) {
+        if (auto cached_value = value_cache.lookup(keys[i])) {
+            values[i] = std::move(*cached_value);
+            found[i] = true;
+        } else {
+            missed.push_back(i);
+        }
+    }
+    if (missed.empty()) {
+        return;
+    }
+    auto generation = value_cache.get_generation();
+    ScopedSnapshot snapshot(db);
+    for (auto i : missed) {
+        auto status = db->Get(snapshot.read_options, keys[i], &values[i]);
+        if (status.ok()) {
+            found[i] = true;
+            value_cache.insert(keys[i], values[i], generation);
+        } else if (!status.IsNotFound()) {
+            throw LevelDBException(status.ToString());
+        }
+    }
+}
+
+// Get a key approximately the given fraction of the way from a to b in byte-wise order.
+// a must be less than b.
+static std::string interpolate_key(const std::string& a, const std::string& b, double fraction)
+{
+    size_t prefix_size = 0;
+    while (prefix_size < a.size() && prefix_size < b.size() && a[prefix_size] == b[prefix_size]) {
+        prefix_size++;
+    }
+    // Interpret the next 8 bytes after the common prefix as big endian integers.
+    auto read = [prefix_size](const std::string& key) {
+        uint64_t value = 0;
+        for (size_t i = 0; i < 8; i++) {
+            value <<= 8;
+            if (prefix_size + i < key.size()) {
+                value |= static_cast<unsigned char>(key[prefix_size + i]);
+            }
+        }
+        return value;
+    };
+    uint64_t a_value = read(a);
+    uint64_t b_value = read(b);
+    uint64_t value = a_value + static_cast<uint64_t>(static_cast<double>(b_value - a_value) * fraction);
+    std::string key = a.substr(0, prefix_size);
+    for (size_t i = 0; i < 8; i++) {
+        key.push_back(static_cast<char>(value >> (8 * (7 - i))));
+    }
+    while (key.size() > prefix_size && key.back() == '\0') {
+        key.pop_back();
+    }
+    return key;
+}
+
+// Get a key that is greater than all keys in the database.
+static std::string get_end_key(leveldb::Iterator& iterator)
+{
+    iterator.SeekToLast();
+    if (!iterator.Valid()) {
+        return std::string();
+    }
+    auto key = iterator.key().ToString();
+    key.push_back('\0');
+    return key;
+}
+
+// Get the approximate size in bytes of the table data for the keys in [start, end).
+static uint64_t get_approximate_size(leveldb::DB& db, const leveldb::Slice& start, const leveldb::Slice& end)
+{
+    if (end.compare(start) <= 0) {
+        return 0;
+    }
+    leveldb::Range range(start, end);
+    uint64_t size = 0;
+    db.GetApproximateSizes(&range, 1, &size);
+    return size;
+}
+
+// Find the smallest key in (start, end] where the approximate size of [start, key) is at least target_size.
+// The size only changes at block boundaries so the key is approximately the start of a block.
+// This bisects the key space so it only reads the table indexes.
+static std::string find_key_at_size(
+    leveldb::DB& db,
+    const std::string& start,
+    const std::string& end,
+    uint64_t target_size)
+{
+    std::string low = start;
+    std::string high = end;
+    for (int i = 0; i < 64; i++) {
+        std::string middle = interpolate_key(low, high, 0.5);
+        if (middle <= low || high <= middle) {
+            break;
+        }
+        if (get_approximate_size(db, start, middle) < target_size) {
+            low = std::move(middle);
+        } else {
+            high = std::move(middle);
+        }
+    }
+    return high;
+}
+
+// Get the keys that split [start, end) into count ranges with approximately equal amounts of table data.
+// Fewer keys are returned if the range is too small to split.
+static std::vector<std::string> get_split_keys(
+    leveldb::DB& db,
+    const std::string& start,
+    const std::string& end,
+    uint64_t count)
+{
+    std::vector<std::string> keys;
+    uint64_t size = get_approximate_size(db, start, end);
+    if (size == 0) {
+        return keys;
+    }
+    for (uint64_t i = 1; i < count; i++) {
+        auto key = find_key_at_size(db, start, end, size / count * i);
+        if ((keys.empty() ? start : keys.back()) < key && key < end) {
+            keys.push_back(std::move(key));
+        }
+    }
+    return keys;
+}
+
+// Split the range into at most count ranges with approximately equal amounts of table data.
+// The ranges are in order and together cover the original range.
+// This must be called without the GIL.
+static std::vector<KeyRange> split_key_range(Amulet::LevelDB& db, const KeyRange& range, size_t count)
+{
+    std::string start_key = range.start.value_or(std::string());
+    std::string end_key = range.end ? *range.end : get_end_key(db.create_iterator()->get_iterator());
+    auto keys = get_split_keys(db.get_database(), start_key, end_key, count);
+    std::vector<KeyRange> ranges(keys.size() + 1, range);
+    for (size_t i = 0; i < keys.size(); i++) {
+        ranges[i].end = keys[i];
+        ranges[i].end_inclusive = false;
+        ranges[i + 1].start = std::move(keys[i]);
+        ranges[i + 1].start_inclusive = true;
+    }
+    return ranges;
+}
+
+// Compact the keys in [start, end) in partitions of approximately partition_size bytes.
+// This runs on a background thread and stops between partitions if the task is cancelled.
+// The database must not be closed until this returns.
+static void run_compaction(
+    leveldb::DB& db,
+    leveldb::ReadOptions read_options,
+    Amulet::Metrics* metrics,
+    CompactionTask& task,
+    std::optional<std::string> start,
+    std::optional<std::string> end,
+    uint64_t partition_size)
+{
+    try {
+        std::string start_key = start.value_or(std::string());
+        std::string end_key;
+        if (end) {
+            end_key = *end;
+        } else {
+            std::unique_ptr<leveldb::Iterator> iterator(db.NewIterator(read_options));
+            end_key = get_end_key(*iterator);
+        }
+        uint64_t size = get_approximate_size(db, start_key, end_key);
+        auto boundaries = get_split_keys(db, start_key, end_key, (size + partition_size - 1) / partition_size);
+        {
+            std::lock_guard lock(task.mutex);
+            task.partition_count = boundaries.size() + 1;
+        }
+        task.condition.notify_all();
+
+        for (size_t i = 0; i <= boundaries.size(); i++) {
+            if (task.is_cancelled()) {
+                break;
+            }
+            // CompactRange includes the end key so adjacent partitions share one key.
+            const std::string* begin = i ? &boundaries[i - 1] : (start ? &*start : nullptr);
+            const std::string* limit = i < boundaries.size() ? &boundaries[i] : (end ? &*end : nullptr);
+            leveldb::Slice begin_slice = begin ? leveldb::Slice(*begin) : leveldb::Slice();
+            leveldb::Slice limit_slice = limit ? leveldb::Slice(*limit) : leveldb::Slice();
+            {
+                Amulet::MetricsTimer timer(metrics, Amulet::MetricsOperation::Compact);
+                db.CompactRange(begin ? &begin_slice : nullptr, limit ? &limit_slice : nullptr);
+            }
+            {
+                std::lock_guard lock(task.mutex);
+                task.compacted_count++;
+            }
+            task.condition.notify_all();
+        }
+    } catch (const std::exception& e) {
+        std::lock_guard lock(task.mutex);
+        task.error = e.what();
+    }
+    {
+        std::lock_guard lock(task.mutex);
+        task.finished = true;
+    }
+    task.condition.notify_all();
+}
+
+// Estimate the number of keys in [start, end).
+// If the range has at most sample_size keys they are counted exactly.
+// Otherwise the first keys are counted exactly and the key density of the rest of the range
+// is sampled at points spread evenly through its data and scaled by its approximate size.
+static uint64_t estimate_count(
+    Amulet::LevelDB& db,
+    const std::optional<std::string>& start,
+    const std::optional<std::string>& end,
+    size_t sample_size)
+{
+    // The number of points in the range to sample.
+    static constexpr size_t probe_count = 16;
+
+    auto read_options = db.get_read_options();
+    read_options.fill_cache = false;
+    auto iterator_ptr = db.create_iterator(read_options);
+    auto& iterator = iterator_ptr->get_iterator();
+    auto at_end = [&] {
+        return !iterator.Valid() || (end && 0 <= iterator.key().compare(*end));
+    };
+    // Count the keys from the iterator position up to limit keys.
+    auto count_keys = [&](uint64_t limit) {
+        uint64_t count = 0;
+        while (count < limit && !at_end()) {
+            count++;
+            iterator.Next();
+        }
+        return count;
+    };
+
+    if (start) {
+        iterator.Seek(*start);
+    } else {
+        iterator.SeekToFirst();
+    }
+    if (at_end()) {
+        return 0;
+    }
+    std::string first_key = iterator.key().ToString();
+    auto& raw_db = db.get_database();
+    std::string end_key = end ? *end : get_end_key(iterator);
+    auto size_to = [&](const leveldb::Slice& key) {
+        return get_approximate_size(raw_db, first_key, key);
+    };
+    // Count keys up to limit and then up to the next block boundary.
+    // Returns the number of keys and the offset of the end position.
+    auto count_to_boundary = [&](uint64_t limit) {
+        uint64_t count = count_keys(limit);
+        if (at_end()) {
+            return std::make_pair(count, size_to(end_key));
+        }
+        // The sizes only change at block boundaries.
+        std::string boundary = find_key_at_size(raw_db, first_key, end_key, size_to(iterator.key()) + 1);
+        while (!at_end() && iterator.key().compare(boundary) < 0) {
+            count++;
+            iterator.Next();
+        }
+        return std::make_pair(count, at_end() ? size_to(end_key) : size_to(iterator.key()));
+    };
+
+    iterator.Seek(first_key);
+    auto [count, offset] = count_to_boundary(sample_size);
+    if (at_end()) {
+        return count;
+    }
+    uint64_t total_size = size_to(end_key);
+    if (total_size <= offset) {
+        // The rest of the range is too small to sample.
+        return count + count_keys(std::numeric_limits<uint64_t>::max());
+    }
+
+    uint64_t sample_count = 0;
+    uint64_t sample_bytes = 0;
+    uint64_t probe_size = std::max<uint64_t>(1, sample_size / probe_count);
+    uint64_t rest_size = total_size - offset;
+    for (size_t i = 0; i < probe_count; i++) {
+        // Space the probes evenly through the data rather than the key space.
+        // Each probe starts and ends on a block boundary so the sizes are not skewed.
+        iterator.Seek(find_key_at_size(raw_db, first_key, end_key, offset + rest_size * (2 * i + 1) / (2 * probe_count)));
+        if (at_end()) {
+            continue;
+        }
+        uint64_t probe_offset = size_to(iterator.key());
+        auto [probe_keys, probe_end] = count_to_boundary(probe_size);
+        sample_count += probe_keys;
+        sample_bytes += probe_end - probe_offset;
+    }
+
+    if (sample_bytes == 0) {
+        // The probes did not cross any blocks. Count the rest.
+        iterator.Seek(first_key);
+        return count_keys(std::numeric_limits<uint64_t>::max());
+    }
+    return count + static_cast<uint64_t>(static_cast<double>(rest_size) * sample_count / sample_bytes);
+}
+
+// The number of partitions each parallel_scan worker processes on average.
+// More partitions balance the work better when the data is unevenly distributed.
+static constexpr size_t partitions_per_worker = 4;
+
+// Call fn with batches of the items in the range from several threads.
+// The range is split into partitions that are read from the same snapshot by worker threads.
+// The workers read without the GIL and hold the GIL while calling fn.
+// The first exception stops the scan and is raised in the calling thread.
+static void parallel_scan(
+    Amulet::LevelDB& db,
+    const KeyRange& range,
+    const std::function<void(py::typing::List<py::typing::Tuple<py::bytes, py::bytes>>)>& fn,
+    size_t workers,
+    size_t batch_size)
+{
+    std::exception_ptr error;
+    {
+        py::gil_scoped_release nogil;
+        if (!db) {
+            throw std::runtime_error("The LevelDB database has been closed.");
+        }
+        ScopedSnapshot snapshot(db);
+        auto metrics = get_metrics(db);
+        auto ranges = split_key_range(db, range, workers * partitions_per_worker);
+        std::atomic<size_t> next_range = 0;
+        std::atomic<bool> failed = false;
+        std::mutex error_mutex;
+
+        auto work = [&] {
+            py::gil_scoped_acquire gil;
+            try {
+                for (size_t i = next_range++; !failed && i < ranges.size(); i = next_range++) {
+                    std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr;
+                    {
+                        py::gil_scoped_release nogil;
+                        iterator_ptr = db.create_iterator(snapshot.read_options);
+                        auto lock = lock_iterator(*iterator_ptr);
+                        Amulet::MetricsTimer timer(metrics.get(), Amulet::MetricsOperation::Seek);
+                        ranges[i].seek(iterator_ptr->get_iterator());
+                    }
+                    LevelDBBatchIterator<IterateMode::Items> iterator(std::move(iterator_ptr), ranges[i], batch_size, std::nullopt, metrics);
+                    while (!failed) {
+                        py::typing::List<py::typing::Tuple<py::bytes, py::bytes>> batch;
+                        try {
+                            batch = iterator.next();
+                        } catch (const py::stop_iteration&) {
+                            break;
+                        }
+                        fn(std::move(batch));
+                    }
+                }
+            } catch (...) {
+                std::lock_guard lock(error_mutex);
+                if (!error) {
+                    error = std::current_exception();
+                }
+                failed = true;
+            }
+        };
+
+        std::vector<std::thread> threads;
+        try {
+            for (size_t i = 0; i < std::min(workers, ranges.size()); i++) {
+                threads.emplace_back(work);
+            }
+        } catch (...) {
+            failed = true;
+            for (auto& thread : threads) {
+                thread.join();
+            }
+            throw;
+        }
+        for (auto& thread : threads) {
+            thread.join();
+        }
+    }
+    if (error) {
+        std::rethrow_exception(error);
+    }
+}
+
+// The number of levels in the database.
+static constexpr int level_count = 7;
+
+// Statistics about one level of the database.
+struct LevelStats {
+    uint64_t files = 0;
+    uint64_t size = 0;
+    // Compaction statistics since the database was opened.
+    double compaction_time = 0;
+    double compaction_read_mb = 0;
+    double compaction_write_mb = 0;
+};
+
+// Statistics about the database.
+struct DatabaseStats {
+    std::array<LevelStats, level_count> levels;
+    uint64_t memory_usage = 0;
+    size_t block_cache_usage = 0;
+    std::optional<size_t> block_cache_capacity;
+    size_t value_cache_usage = 0;
+    size_t value_cache_capacity = 0;
+    uint64_t value_cache_hits = 0;
+    uint64_t value_cache_misses = 0;
+};
+
+static std::optional<std::string> get_property(leveldb::DB& db, const std::string& name)
+{
+    std::string value;
+    if (db.GetProperty(name, &value)) {
+        return value;
+    }
+    return std::nullopt;
+}
+
+static DatabaseStats get_stats(Amulet::LevelDB& db)
+{
+    auto& raw_db = db.get_database();
+    DatabaseStats stats;
+
+    // Each table is listed under its level as " number:size[smallest .. largest]".
+    if (auto sstables = get_property(raw_db, "leveldb.sstables")) {
+        std::istringstream stream(*sstables);
+        std::string line;
+        int level = -1;
+        while (std::getline(stream, line)) {
+            unsigned long long number, size;
+            if (std::sscanf(line.c_str(), "--- level %d ---", &level) == 1) {
+                continue;
+            }
+            if (0 <= level && level < level_count && std::sscanf(line.c_str(), " %llu:%llu[", &number, &size) == 2) {
+                stats.levels[level].files++;
+                stats.levels[level].size += size;
+            }
+        }
+    }
+
+    // The compaction stats are a table with a row for each level that has been used.
+    if (auto stats_str = get_property(raw_db, "leveldb.stats")) {
+        std::istringstream stream(*stats_str);
+        std::string line;
+        while (std::getline(stream, line)) {
+            int level;
+            unsigned long long files;
+            double size, time, read, write;
+            if (
+                std::sscanf(line.c_str(), "%d %llu %lf %lf %lf %lf", &level, &files, &size, &time, &read, &write) == 6
+                && 0 <= level && level < level_count) {
+                stats.levels[level].compaction_time = time;
+                stats.levels[level].compaction_read_mb = read;
+                stats.levels[level].compaction_write_mb = write;
+            }
+        }
+    }
+
+    if (auto memory_usage = get_property(raw_db, "leveldb.approximate-memory-usage")) {
+        stats.memory_usage = std::strtoull(memory_usage->c_str(), nullptr, 10);
+    }
+
+    if (auto* block_cache = db.get_options().options.block_cache) {
+        stats.block_cache_usage = block_cache->TotalCharge();
+    }
+    if (auto* ext_options = get_options(db)) {
+        if (ext_options->shared_block_cache) {
+            stats.block_cache_capacity = ext_options->shared_block_cache->get_capacity();
+        } else {
+            stats.block_cache_capacity = ext_options->block_cache_size;
+        }
+    }
+    if (auto* value_cache = get_value_cache(db)) {
+        stats.value_cache_usage = value_cache->get_usage();
+        stats.value_cache_capacity = value_cache->get_capacity();
+        stats.value_cache_hits = value_cache->get_hits();
+        stats.value_cache_misses = value_cache->get_misses();
+    }
+    return stats;
+}
+
+// Writes sorted data directly to table files.
+class BulkLoader {
+private:
+    // The number of bytes of pairs that add_many copies before adding them.
+    static constexpr size_t add_many_chunk_size = 4 * 1024 * 1024;
+
+    std::unique_ptr<const leveldb::FilterPolicy> filter_policy;
+    std::unique_ptr<Amulet::BulkLoader> loader;
+    bool finished = false;
+
+    static void check_status(const leveldb::Status& status)
+    {
+        if (status.IsInvalidArgument()) {
+            throw py::value_error(status.ToString());
+        } else if (!status.ok()) {
+            throw LevelDBException(status.ToString());
+        }
+    }
+
+    // The mutex must be locked.
+    void check_finished()
+    {
+        if (finished) {
+            throw std::runtime_error("The bulk loader has finished.");
+        }
+    }
+
+public:
+    // Guards all other state.
+    std::mutex mutex;
+
+    BulkLoader(
+        const std::string& path,
+        leveldb::CompressionType compression_type,
+        size_t block_size,
+        int bloom_filter_bits,
+        size_t max_file_size)
+    {
+        leveldb::Options options;
+        options.compression = compression_type;
+        options.block_size = block_size;
+        if (bloom_filter_bits) {
+            filter_policy.reset(leveldb::NewBloomFilterPolicy(bloom_filter_bits));
+        }
+        options.filter_policy = filter_policy.get();
+        loader = std::make_unique<Amulet::BulkLoader>(path, options, max_file_size);
+        check_status(loader->open());
+    }
+
+    // This must be called without the GIL.
+    void add(const leveldb::Slice& key, const leveldb::Slice& value)
+    {
+        std::lock_guard lock(mutex);
+        check_finished();
+        check_status(loader->add(key, value));
+    }
+
+    // This must be called with the GIL.
+    void add_many(pyext::collections::Iterable<py::typing::Tuple<py::bytes, py::bytes>> pairs)
+    {
+        // Iterating may run python code that uses this loader so this must not hold the mutex.
+        // The pairs are copied in chunks that are added with the mutex locked.
+        std::vector<std::pair<std::string, std::string>> chunk;
+        size_t chunk_size = 0;
+        auto flush = [&] {
+            {
+                // Other threads may hold the mutex without the GIL.
+                py::gil_scoped_release nogil;
+                std::lock_guard lock(mutex);
+                check_finished();
+                for (const auto& [key, value] : chunk) {
+                    check_status(loader->add(key, value));
+                }
+            }
+            chunk.clear();
+            chunk_size = 0;
+        };
+        py::detail::make_caster<std::pair<leveldb::Slice, leveldb::Slice>> caster;
+        for (py::handle item : static_cast<py::object&>(pairs)) {
+            if (!caster.load(item, true)) {
+                throw py::type_error("Each item must be a pair of bytes.");
+            }
+            auto [key, value] = py::detail::cast_op<std::pair<leveldb::Slice, leveldb::Slice>>(caster);
+            chunk.emplace_back(key.ToString(), value.ToString());
+            chunk_size += key.size() + value.size();
+            if (add_many_chunk_size <= chunk_size) {
+                flush();
+            }
+        }
+        if (!chunk.empty()) {
+            flush();
+        }
+    }
+
+    // This must be called without the GIL.
+    size_t get_count()
+    {
+        std::lock_guard lock(mutex);
+        return loader->get_count();
+    }
+
+    // This must be called without the GIL.
+    void finish()
+    {
+        std::lock_guard lock(mutex);
+        check_finished();
+        finished = true;
+        check_status(loader->finish());
+    }
+
+    // This must be called without the GIL.
+    void abandon()
+    {
+        std::lock_guard lock(mutex);
+        finished = true;
+        loader->abandon();
+    }
+
+    // Finish if successful otherwise abandon.
+    // Does nothing if already finished.
+    // This must be called without the GIL.
+    void exit(bool success)
+    {
+        std::lock_guard lock(mutex);
+        if (finished) {
+            return;
+        }
+        finished = true;
+        if (success) {
+            check_status(loader->finish());
+        } else {
+            loader->abandon();
+        }
+    }
+};
+
+} // namespace
+
+void init_amulet_leveldb(py::module m)
+{
+    std::string module_name = m.attr("__name__").cast<std::string>();
+
+    py::register_local_exception<LevelDBException>(m, "LevelDBException");
+    py::register_local_exception<LevelDBEncrypted>(m, "LevelDBEncrypted");
+
+    py::classh<Amulet::LevelDBIterator> LevelDBIterator(m, "LevelDBIterator", py::release_gil_before_calling_cpp_dtor());
+    LevelDBIterator.def(
+        "valid",
+        [](Amulet::LevelDBIterator& self) {
+            auto lock = lock_iterator_mutex(self);
+            return self && self->Valid();
+        },
+        py::doc(
+            "Is the iterator at a valid entry.\n"
+            "If False, calls to other methods may error."));
+    LevelDBIterator.def(
+        "seek_to_first",
+        [](Amulet::LevelDBIterator& self) {
+            auto lock = lock_iterator(self);
             self->SeekToFirst();
         },
-        py::doc("Seek to the first entry in the database."));
-    LevelDBIterator.def(
-        "seek_to_last",
-        [](Amulet::LevelDBIterator& self) {
+        py::doc("Seek to the first entry in the database."),
+        py::call_guard<py::gil_scoped_release>());
+    LevelDBIterator.def(
+        "seek_to_last",
+        [](Amulet::LevelDBIterator& self) {
+            auto lock = lock_iterator(self);
+            self->SeekToLast();
+        },
+        py::doc("Seek to the last entry in the database."),
+        py::call_guard<py::gil_scoped_release>());
+    LevelDBIterator.def(
+        "seek",
+        [](Amulet::LevelDBIterator& self, leveldb::Slice target) {
+            auto lock = lock_iterator(self);
+            self->Seek(target);
+        },
+        py::arg("target"),
+        py::doc(
+            "Seek to the given entry in the database.\n"
+            "If the entry does not exist it will seek to the location after."),
+        py::call_guard<py::gil_scoped_release>());
+    LevelDBIterator.def(
+        "next",
+        [](Amulet::LevelDBIterator& self) {
+            auto lock = lock_iterator(self);
+            self->Next();
+        },
+        py::doc(
+            "Seek to the next entry in the database."),
+        py::call_guard<py::gil_scoped_release>());
+    LevelDBIterator.def(
+        "prev",
+        [](Amulet::LevelDBIterator& self) {
+            auto lock = lock_iterator(self);
+            self->Prev();
+        },
+        py::doc(
+            "Seek to the previous entry in the database."),
+        py::call_guard<py::gil_scoped_release>());
+    LevelDBIterator.def(
+        "key",
+        [](Amulet::LevelDBIterator& self) {
+            auto lock = lock_iterator(self);
+            if (!self->Valid()) {
+                throw std::runtime_error("LevelDBIterator does not point to a valid value.");
+            }
+            return py::bytes(self->key().data(), self->key().size());
+        },
+        py::doc(
+            "Get the key of the current entry in the database.\n"
+            ":raises: runtime_error if iterator is not valid."));
+    LevelDBIterator.def(
+        "value",
+        [](Amulet::LevelDBIterator& self) {
+            auto lock = lock_iterator(self);
+            if (!self->Valid()) {
+                throw std::runtime_error("LevelDBIterator does not point to a valid value.");
+            }
+            return py::bytes(self->value().data(), self->value().size());
+        },
+        py::doc(
+            "Get the value of the current entry in the database.\n"
+            ":raises: runtime_error if iterator is not valid."));
+
+    py::enum_<leveldb::CompressionType> CompressionType(m, "CompressionType");
+    CompressionType.value(
+        "NoCompression",
+        leveldb::CompressionType::kNoCompression,
+        "No compression.");
+    CompressionType.value(
+        "SnappyCompression",
+        leveldb::CompressionType::kSnappyCompression,
+        "Snappy compression.");
+    CompressionType.value(
+        "ZstdCompression",
+        leveldb::CompressionType::kZstdCompression,
+        "Zstd compression.");
+    CompressionType.value(
+        "ZlibRawCompression",
+        leveldb::CompressionType::kZlibRawCompression,
+        "Zlib raw compression.");
+    CompressionType.attr("__repr__") = py::cpp_function(
+        [module_name, CompressionType](const py::object& arg) -> py::str {
+            return py::str("{}.{}").format(module_name, CompressionType.attr("__str__")(arg));
+        },
+        py::name("__repr__"),
+        py::is_method(CompressionType));
+
+    py::classh<Amulet::ResizableLRUCache> BlockCache(m, "BlockCache", py::release_gil_before_calling_cpp_dtor(),
+        "A cache of uncompressed blocks that can be shared between databases.\n"
+        "\n"
+        "Sharing one cache puts a single bound on the block cache memory used by all databases that use it.");
+    BlockCache.def(
+        py::init<size_t>(),
+        py::arg("capacity"),
+        py::doc(
+            "Construct a new block cache.\n"
+            "\n"
+            ":param capacity: The maximum size of the cache in bytes."));
+    BlockCache.def_property(
+        "capacity",
+        &Amulet::ResizableLRUCache::get_capacity,
+        &Amulet::ResizableLRUCache::set_capacity,
+        py::doc(
+            "The maximum size of the cache in bytes.\n"
+            "Reducing the capacity evicts unused blocks until the cache fits."),
+        py::call_guard<py::gil_scoped_release>());
+    BlockCache.def_property_readonly(
+        "usage",
+        &Amulet::ResizableLRUCache::TotalCharge,
+        py::doc("The combined size of the blocks in the cache in bytes."),
+        py::call_guard<py::gil_scoped_release>());
+
+    py::classh<Amulet::LevelDBSnapshot> Snapshot(m, "Snapshot", py::release_gil_before_calling_cpp_dtor(),
+        "A consistent read-only view of a LevelDB database at a point in time.");
+    Snapshot.def(
+        "release",
+        &Amulet::LevelDBSnapshot::release,
+        py::doc(
+            "Release the snapshot.\n"
+            "Other methods will error after this is called."),
+        py::call_guard<py::gil_scoped_release>());
+    Snapshot.def(
+        "__enter__",
+        [](pyext::PyObjectCpp<Amulet::LevelDBSnapshot> self) {
+            return self;
+        });
+    Snapshot.def(
+        "__exit__",
+        [](Amulet::LevelDBSnapshot& self, py::object, py::object, py::object) {
+            py::gil_scoped_release nogil;
+            self.release();
+        },
+        py::arg("exc_type"), py::arg("exc_val"), py::arg("exc_tb"));
+    Snapshot.def(
+        "get",
+        [](Amulet::LevelDBSnapshot& self, leveldb::Slice key) {
+            std::string value;
+            leveldb::Status status;
+            {
+                py::gil_scoped_release gil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB snapshot has been released.");
+                }
+                status = self.get_database().Get(self.get_read_options(), key, &value);
+            }
+            return get_result(status, value, key);
+        },
+        py::arg("key"),
+        py::doc(
+            "Get a key from the snapshot.\n"
+            "\n"
+            ":param key: The key to get from the snapshot.\n"
+            ":return: The data stored behind the given key.\n"
+            ":raises: KeyError if the requested key is not present.\n"
+            ":raises: LevelDBException on other error."));
+    Snapshot.def(
+        "get_many",
+        [](
+            Amulet::LevelDBSnapshot& self,
+            pyext::collections::Sequence<py::bytes> keys,
+            py::object default_) -> py::typing::List<py::object> {
+            KeySlices key_slices(keys);
+            std::vector<std::string> values;
+            std::vector<bool> found;
+            {
+                py::gil_scoped_release nogil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB snapshot has been released.");
+                }
+                read_many(self.get_database(), self.get_read_options(), key_slices.slices, values, found);
+            }
+            return make_value_list(values, found, default_);
+        },
+        py::arg("keys"),
+        py::arg("default") = py::none(),
+        py::doc(
+            "Get the values for many keys from the snapshot without holding the GIL.\n"
+            "\n"
+            ":param keys: The keys to get from the snapshot.\n"
+            ":param default: The value to use for keys that are not present.\n"
+            ":return: A list of the values in the same order as the keys.\n"
+            ":raises: LevelDBException on other error."));
+    Snapshot.def(
+        "create_iterator",
+        [](Amulet::LevelDBSnapshot& self) {
+            if (!self) {
+                throw std::runtime_error("The LevelDB snapshot has been released.");
+            }
+            return self.create_iterator();
+        },
+        py::doc("Create a new leveldb Iterator over the snapshot."),
+        py::call_guard<py::gil_scoped_release>());
+    auto create_snapshot_iterator = [](Amulet::LevelDBSnapshot& self) {
+        py::gil_scoped_release nogil;
+        if (!self) {
+            throw std::runtime_error("The LevelDB snapshot has been released.");
+        }
+        return self.create_iterator();
+    };
+    Snapshot.def(
+        "iterate",
+        [create_snapshot_iterator](
+            Amulet::LevelDBSnapshot& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            bool start_inclusive,
+            bool end_inclusive,
+            bool reverse,
+            std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Items>(
+                create_snapshot_iterator(self),
+                make_key_range(start, end, start_inclusive, end_inclusive, reverse),
+                limit);
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("start_inclusive") = true,
+        py::arg("end_inclusive") = false,
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through all keys and data in the snapshot that exist between the given keys.\n"
+            "\n"
+            ":param start: The key to start at. Leave as None to start at the beginning.\n"
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param start_inclusive: Include the start key if it exists.\n"
+            ":param end_inclusive: Include the end key if it exists.\n"
+            ":param reverse: Iterate from the end of the range to the start.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit.\n"
+            ":return: An iterator of key, value tuples."));
+    Snapshot.def(
+        "iterate_keys",
+        [create_snapshot_iterator](
+            Amulet::LevelDBSnapshot& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            bool start_inclusive,
+            bool end_inclusive,
+            bool reverse,
+            std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Keys>(
+                create_snapshot_iterator(self),
+                make_key_range(start, end, start_inclusive, end_inclusive, reverse),
+                limit);
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("start_inclusive") = true,
+        py::arg("end_inclusive") = false,
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through all keys in the snapshot that exist between the given keys.\n"
+            "\n"
+            ":param start: The key to start at. Leave as None to start at the beginning.\n"
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param start_inclusive: Include the start key if it exists.\n"
+            ":param end_inclusive: Include the end key if it exists.\n"
+            ":param reverse: Iterate from the end of the range to the start.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit.\n"
+            ":return: An iterator of keys."));
+    Snapshot.def(
+        "iterate_values",
+        [create_snapshot_iterator](
+            Amulet::LevelDBSnapshot& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            bool start_inclusive,
+            bool end_inclusive,
+            bool reverse,
+            std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Values>(
+                create_snapshot_iterator(self),
+                make_key_range(start, end, start_inclusive, end_inclusive, reverse),
+                limit);
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("start_inclusive") = true,
+        py::arg("end_inclusive") = false,
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through the data of all keys in the snapshot that exist between the given keys.\n"
+            "\n"
+            ":param start: The key to start at. Leave as None to start at the beginning.\n"
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param start_inclusive: Include the start key if it exists.\n"
+            ":param end_inclusive: Include the end key if it exists.\n"
+            ":param reverse: Iterate from the end of the range to the start.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit.\n"
+            ":return: An iterator of values."));
+    Snapshot.def(
+        "iterate_prefix",
+        [create_snapshot_iterator](Amulet::LevelDBSnapshot& self, py::bytes prefix, bool reverse, std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Items>(
+                create_snapshot_iterator(self),
+                KeyRange::from_prefix(prefix.cast<std::string>(), reverse),
+                limit);
+        },
+        py::arg("prefix"),
+        py::kw_only(),
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through all keys and data in the snapshot where the key starts with the prefix.\n"
+            "\n"
+            ":param prefix: The prefix to match.\n"
+            ":param reverse: Iterate in descending key order.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit."));
+    Snapshot.def(
+        "iterate_keys_prefix",
+        [create_snapshot_iterator](Amulet::LevelDBSnapshot& self, py::bytes prefix, bool reverse, std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Keys>(
+                create_snapshot_iterator(self),
+                KeyRange::from_prefix(prefix.cast<std::string>(), reverse),
+                limit);
+        },
+        py::arg("prefix"),
+        py::kw_only(),
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through all keys in the snapshot that start with the prefix.\n"
+            "\n"
+            ":param prefix: The prefix to match.\n"
+            ":param reverse: Iterate in descending key order.\n"
+            ":param limit: The maximum number of keys to yield. Leave as None for no limit."));
+
+    py::classh<WriteBatch> WriteBatch_(m, "WriteBatch",
+        "A group of put and delete operations that are applied to a database atomically.\n"
+        "\n"
+        "Operations are applied in the order they were added.\n"
+        "Write the batch to a database with :meth:`LevelDB.write`.");
+    WriteBatch_.def(py::init<>());
+    WriteBatch_.def(
+        "put",
+        [](WriteBatch& self, leveldb::Slice key, leveldb::Slice value) {
+            std::lock_guard lock(self.mutex);
+            self.batch.Put(key, value);
+            self.count++;
+        },
+        py::arg("key"), py::arg("value"),
+        py::doc("Add an operation to set a value."),
+        py::call_guard<py::gil_scoped_release>());
+    WriteBatch_.def(
+        "put_many",
+        [](WriteBatch& self, pyext::collections::Iterable<py::typing::Tuple<py::bytes, py::bytes>> pairs) {
+            // Iterating may run python code that switches threads so this must not hold the mutex.
+            leveldb::WriteBatch batch;
+            size_t count = 0;
+            py::detail::make_caster<std::pair<leveldb::Slice, leveldb::Slice>> caster;
+            for (py::handle item : static_cast<py::object&>(pairs)) {
+                if (!caster.load(item, true)) {
+                    throw py::type_error("Each item must be a pair of bytes.");
+                }
+                auto [key, value] = py::detail::cast_op<std::pair<leveldb::Slice, leveldb::Slice>>(caster);
+                batch.Put(key, value);
+                count++;
+            }
+            // Other threads may hold the mutex without the GIL.
+            py::gil_scoped_release nogil;
+            std::lock_guard lock(self.mutex);
+            self.batch.Append(batch);
+            self.count += count;
+        },
+        py::arg("pairs"),
+        py::doc(
+            "Add an operation to set a value for each key, value pair.\n"
+            "\n"
+            ":param pairs: An iterable of key, value pairs. Eg. dict.items()"));
+    WriteBatch_.def(
+        "delete",
+        [](WriteBatch& self, leveldb::Slice key) {
+            std::lock_guard lock(self.mutex);
+            self.batch.Delete(key);
+            self.count++;
+        },
+        py::arg("key"),
+        py::doc("Add an operation to delete a key."),
+        py::call_guard<py::gil_scoped_release>());
+    WriteBatch_.def(
+        "clear",
+        [](WriteBatch& self) {
+            std::lock_guard lock(self.mutex);
+            self.batch.Clear();
+            self.count = 0;
+        },
+        py::doc("Remove all operations from the batch."),
+        py::call_guard<py::gil_scoped_release>());
+    WriteBatch_.def(
+        "append",
+        [](WriteBatch& self, WriteBatch& other) {
+            if (&self == &other) {
+                std::lock_guard lock(self.mutex);
+                leveldb::WriteBatch copy = self.batch;
+                self.batch.Append(copy);
+                self.count *= 2;
+            } else {
+                std::scoped_lock lock(self.mutex, other.mutex);
+                self.batch.Append(other.batch);
+                self.count += other.count;
+            }
+        },
+        py::arg("other"),
+        py::doc("Add the operations from another batch to the end of this batch."),
+        py::call_guard<py::gil_scoped_release>());
+    WriteBatch_.def(
+        "approximate_size",
+        [](WriteBatch& self) {
+            std::lock_guard lock(self.mutex);
+            return self.batch.ApproximateSize();
+        },
+        py::doc("The size of the serialised batch in bytes."),
+        py::call_guard<py::gil_scoped_release>());
+    WriteBatch_.def(
+        "__len__",
+        [](WriteBatch& self) {
+            std::lock_guard lock(self.mutex);
+            return self.count;
+        },
+        py::doc("The number of operations in the batch."),
+        py::call_guard<py::gil_scoped_release>());
+
+    py::classh<BulkImport> BulkImport_(m, "BulkImport", py::release_gil_before_calling_cpp_dtor(),
+        "Buffers writes into large unsynchronised batches to import data quickly.\n"
+        "\n"
+        "Create this with :meth:`LevelDB.bulk_import`.\n"
+        "Writes are not atomic and may not be visible until they are flushed.\n"
+        "If the process crashes before :meth:`finish` is called some of the writes may be lost.");
+    BulkImport_.def(
+        "put",
+        &BulkImport::put,
+        py::arg("key"), py::arg("value"),
+        py::doc("Set a value in the database."),
+        py::call_guard<py::gil_scoped_release>());
+    BulkImport_.def(
+        "put_many",
+        &BulkImport::put_many,
+        py::arg("pairs"),
+        py::doc(
+            "Set a value in the database for each key, value pair.\n"
+            "\n"
+            ":param pairs: An iterable of key, value pairs. Eg. dict.items()"));
+    BulkImport_.def(
+        "delete",
+        &BulkImport::del,
+        py::arg("key"),
+        py::doc("Delete a key from the database."),
+        py::call_guard<py::gil_scoped_release>());
+    BulkImport_.def(
+        "finish",
+        [](BulkImport& self) {
+            self.finish();
+        },
+        py::doc(
+            "Write the remaining data, sync it to disk and compact the modified range if enabled.\n"
+            "Other methods will error after this is called."),
+        py::call_guard<py::gil_scoped_release>());
+    BulkImport_.def(
+        "__enter__",
+        [](pyext::PyObjectCpp<BulkImport> self) {
+            return self;
+        });
+    BulkImport_.def(
+        "__exit__",
+        [](BulkImport& self, py::object exc_type, py::object, py::object) {
+            // Don't compact if an exception was raised.
+            bool allow_compact = exc_type.is_none();
+            py::gil_scoped_release nogil;
+            self.finish(allow_compact);
+        },
+        py::arg("exc_type"), py::arg("exc_val"), py::arg("exc_tb"));
+
+    py::classh<BulkLoader> BulkLoader_(m, "BulkLoader", py::release_gil_before_calling_cpp_dtor(),
+        "Writes sorted data directly to table files and adds them to a database.\n"
+        "\n"
+        "This skips the log, the memtable and the compaction work that normal writes go through,\n"
+        "which makes it much faster than :meth:`LevelDB.put_batch` for importing large amounts of data.\n"
+        "Each table is added to the deepest level that does not overlap existing data.\n"
+        "\n"
+        "The database is locked until the loader is finished or abandoned so it cannot be opened in the mean time.\n"
+        "Loaded values replace existing values with the same key.\n"
+        "The database is only modified when :meth:`finish` is called.\n"
+        "\n"
+        ">>> with BulkLoader(path, True) as loader:\n"
+        ">>>     loader.add_many(sorted(data.items()))\n"
+        ">>> db = LevelDB(path)");
+    BulkLoader_.def(
+        py::init([](
+                     std::string path,
+                     bool create_if_missing,
+                     leveldb::CompressionType compression_type,
+                     size_t block_size,
+                     int bloom_filter_bits,
+                     size_t max_file_size) {
+            if (max_file_size == 0) {
+                throw py::value_error("max_file_size must be greater than 0.");
+            }
+            // Open and close the database to create it, repair it if needed and flush the log to a table.
+            open_leveldb(path, create_if_missing, compression_type, 0, 4 * 1024 * 1024, block_size, bloom_filter_bits)->close();
+            py::gil_scoped_release nogil;
+            return std::make_unique<BulkLoader>(
+                std::filesystem::absolute(path).string(),
+                compression_type,
+                block_size,
+                bloom_filter_bits,
+                max_file_size);
+        }),
+        py::arg("path"),
+        py::arg("create_if_missing") = false,
+        py::kw_only(),
+        py::arg("compression_type") = leveldb::kZlibRawCompression,
+        py::arg("block_size") = 163840,
+        py::arg("bloom_filter_bits") = 10,
+        py::arg("max_file_size") = 2 * 1024 * 1024,
+        py::doc(
+            "Lock a closed database and prepare to load data into it.\n"
+            "\n"
+            ":param path: The path to the database directory.\n"
+            ":param create_if_missing: If True and there is no database at the given path a new database will be created.\n"
+            ":param compression_type: The compression used for the new tables.\n"
+            ":param block_size: The approximate size of uncompressed data per block in bytes.\n"
+            ":param bloom_filter_bits: The number of bits per key in the bloom filter. 0 disables the filter. "
+            "This should match the value used to open the database.\n"
+            ":param max_file_size: The approximate size of each table file in bytes.\n"
+            ":raises: LevelDBException if the database does not exist or is open."));
+    BulkLoader_.def(
+        "add",
+        &BulkLoader::add,
+        py::arg("key"), py::arg("value"),
+        py::doc(
+            "Add a key and value.\n"
+            "\n"
+            ":raises: ValueError if the key is not greater than the previous key."),
+        py::call_guard<py::gil_scoped_release>());
+    BulkLoader_.def(
+        "add_many",
+        &BulkLoader::add_many,
+        py::arg("pairs"),
+        py::doc(
+            "Add each key, value pair.\n"
+            "\n"
+            ":param pairs: An iterable of key, value pairs in strictly increasing key order.\n"
+            ":raises: ValueError if the keys are not in strictly increasing order."));
+    BulkLoader_.def(
+        "__len__",
+        &BulkLoader::get_count,
+        py::call_guard<py::gil_scoped_release>());
+    BulkLoader_.def(
+        "finish",
+        &BulkLoader::finish,
+        py::doc(
+            "Add the tables to the database and unlock it.\n"
+            "Other methods will error after this is called."),
+        py::call_guard<py::gil_scoped_release>());
+    BulkLoader_.def(
+        "abandon",
+        &BulkLoader::abandon,
+        py::doc(
+            "Delete the tables that have been written and unlock the database without modifying it.\n"
+            "This is called automatically if the loader is destroyed before it is finished."),
+        py::call_guard<py::gil_scoped_release>());
+    BulkLoader_.def(
+        "__enter__",
+        [](pyext::PyObjectCpp<BulkLoader> self) {
+            return self;
+        });
+    BulkLoader_.def(
+        "__exit__",
+        [](BulkLoader& self, py::object exc_type, py::object, py::object) {
+            bool success = exc_type.is_none();
+            py::gil_scoped_release nogil;
+            self.exit(success);
+        },
+        py::arg("exc_type"), py::arg("exc_val"), py::arg("exc_tb"));
+
+    py::classh<CompactionTask> Compaction(m, "Compaction", py::release_gil_before_calling_cpp_dtor(),
+        "A compaction running on a background thread.\n"
+        "\n"
+        "Create this with :meth:`LevelDB.compact_async`.\n"
+        "The range is compacted in partitions so that it can be cancelled between partitions.\n"
+        "Closing the database cancels the compaction and waits for the current partition to finish.");
+    Compaction.def_property_readonly(
+        "progress",
+        [](CompactionTask& self) {
+            std::lock_guard lock(self.mutex);
+            if (self.partition_count == 0) {
+                return 0.0;
+            }
+            return static_cast<double>(self.compacted_count) / static_cast<double>(self.partition_count);
+        },
+        py::doc("The fraction of the partitions that have been compacted from 0.0 to 1.0."),
+        py::call_guard<py::gil_scoped_release>());
+    Compaction.def_property_readonly(
+        "done",
+        [](CompactionTask& self) {
+            std::lock_guard lock(self.mutex);
+            return self.finished;
+        },
+        py::doc("Has the compaction stopped. This is true if it completed, was cancelled or failed."),
+        py::call_guard<py::gil_scoped_release>());
+    Compaction.def_property_readonly(
+        "cancelled",
+        &CompactionTask::is_cancelled,
+        py::doc("Has the compaction been cancelled."),
+        py::call_guard<py::gil_scoped_release>());
+    Compaction.def(
+        "cancel",
+        &CompactionTask::cancel,
+        py::doc(
+            "Stop the compaction after the current partition.\n"
+            "The partitions that have already been compacted stay compacted."),
+        py::call_guard<py::gil_scoped_release>());
+    Compaction.def(
+        "wait",
+        [](CompactionTask& self, std::optional<double> timeout) {
+            std::unique_lock lock(self.mutex);
+            auto is_finished = [&self] { return self.finished; };
+            if (timeout) {
+                self.condition.wait_for(lock, std::chrono::duration<double>(*timeout), is_finished);
+            } else {
+                self.condition.wait(lock, is_finished);
+            }
+            if (self.error) {
+                throw LevelDBException(*self.error);
+            }
+            return self.finished;
+        },
+        py::arg("timeout") = py::none(),
+        py::doc(
+            "Wait for the compaction to stop.\n"
+            "\n"
+            ":param timeout: The maximum number of seconds to wait. None to wait indefinitely.\n"
+            ":return: True if the compaction has stopped, False if the timeout expired.\n"
+            ":raises: LevelDBException if the compaction failed."),
+        py::call_guard<py::gil_scoped_release>());
+
+    py::classh<Amulet::LevelDB> LevelDB(m, "LevelDB", py::release_gil_before_calling_cpp_dtor(),
+        "A LevelDB database");
+    LevelDB.def(
+        py::init(&open_leveldb),
+        py::arg("path"),
+        py::arg("create_if_missing") = false,
+        py::arg("compression_type") = leveldb::kZlibRawCompression,
+        py::kw_only(),
+        py::arg("block_cache_size") = 40 * 1024 * 1024,
+        py::arg("write_buffer_size") = 4 * 1024 * 1024,
+        py::arg("block_size") = 163840,
+        py::arg("bloom_filter_bits") = 10,
+        py::arg("max_open_files") = 1000,
+        py::arg("block_cache") = py::none(),
+        py::arg("sync") = false,
+        py::arg("read_only") = false,
+        py::arg("value_cache_size") = 0,
+        py::arg("metrics") = false,
+        py::arg("repair") = "auto",
+        py::arg("io_stats") = false,
+        py::arg("compaction_write_rate") = 0,
+        py::doc(
+            "Construct a new :class :`LevelDB` instance from the database at the given path.\n"
+            "\n"
+            "A leveldb database is like a dictionary that only contains bytes as the keys and values and exists entirely on the disk.\n"
+            "\n"
+            ":param path: The path to the database directory.\n"
+            ":param create_if_missing: If True a new database will be created if one does not exist at the given path.\n"
+            ":param compression_type: The compression type to use when writing data to the database. Defaults to zlib raw.\n"
+            ":param block_cache_size: The size of the cache of uncompressed blocks in bytes. Defaults to 40 MiB.\n"
+            ":param write_buffer_size: The amount of data to build up in memory before writing it to disk in bytes. Defaults to 4 MiB.\n"
+            ":param block_size: The approximate size of the uncompressed data in each block in bytes. Defaults to 160 KiB.\n"
+            ":param bloom_filter_bits: The number of bits per key in the bloom filter. 0 disables the filter. Defaults to 10.\n"
+            ":param max_open_files: The maximum number of files the database may keep open. Defaults to 1000.\n"
+            ":param block_cache: A block cache to share with other databases. If given, block_cache_size is ignored.\n"
+            ":param sync: The default for the sync argument of write methods. "
+            "If True, writes are flushed from the operating system buffer cache before returning. Defaults to False.\n"
+            ":param read_only: Open the database without modifying or locking its files. "
+            "Many processes can open a database in read only mode at the same time. "
+            "The database shows the data as it was when it was opened. "
+            "A read only database is not protected from a writer in another process or object. "
+            "Compactions in the writer delete table files that the read only database may still need, "
+            "after which reads may raise LevelDBException. Reopen the database to see the current files. "
+            "Methods that write to the database raise LevelDBException. "
+            "Corrupt databases are not repaired. Defaults to False.\n"
+            ":param value_cache_size: The size of the cache of decoded values used by get and get_many in bytes. "
+            "Repeated reads of a cached key skip the database. Writes through this object remove the modified keys. "
+            "0 disables the cache. Defaults to 0.\n"
+            ":param metrics: Record the latency of each operation. See :meth:`metrics`. Defaults to False.\n"
+            ":param repair: What to do if the database is corrupt. "
+            "\"auto\" repairs it, which may take several minutes for a large database. "
+            "\"never\" raises LevelDBException so that the caller can run :meth:`repair` at a better time. "
+            "Defaults to \"auto\".\n"
+            ":param io_stats: Count the bytes read and written to each type of file. See :meth:`io_stats`. Defaults to False.\n"
+            ":param compaction_write_rate: The maximum number of bytes per second written to table files by compactions and memtable flushes. "
+            "This stops background compactions using all of the disk bandwidth. "
+            "Writes slow down if the flushes fall behind. 0 for no limit. Defaults to 0.\n"
+            ":raises: LevelDBException if create_if_missing is False and the db does not exist."));
+
+    LevelDB.def_static(
+        "repair",
+        [](std::string path, leveldb::CompressionType compression_type, size_t block_size, int bloom_filter_bits) {
+            if (block_size == 0) {
+                throw py::value_error("block_size must be greater than 0.");
+            }
+            if (bloom_filter_bits < 0) {
+                throw py::value_error("bloom_filter_bits must not be negative.");
+            }
+            auto abs_path = std::filesystem::absolute(path);
+            if (!std::filesystem::is_directory(abs_path)) {
+                throw LevelDBException("No database exists to repair at " + abs_path.string());
+            }
+            NullLogger logger;
+            std::unique_ptr<const leveldb::FilterPolicy> filter_policy;
+            if (bloom_filter_bits) {
+                filter_policy.reset(leveldb::NewBloomFilterPolicy(bloom_filter_bits));
+            }
+            leveldb::Options options;
+            options.info_log = &logger;
+            options.compression = compression_type;
+            options.block_size = block_size;
+            options.filter_policy = filter_policy.get();
+            auto status = leveldb::RepairDB(abs_path.string(), options);
+            if (!status.ok()) {
+                throw LevelDBException(status.ToString());
+            }
+        },
+        py::arg("path"),
+        py::kw_only(),
+        py::arg("compression_type") = leveldb::kZlibRawCompression,
+        py::arg("block_size") = 163840,
+        py::arg("bloom_filter_bits") = 10,
+        py::doc(
+            "Repair a closed database.\n"
+            "\n"
+            "This rebuilds the database from its table and log files and may take several minutes for a large database.\n"
+            "It runs without the GIL so it can be run on a worker thread. "
+            "Eg. after opening with repair=\"never\" failed.\n"
+            "\n"
+            ":param path: The path to the database directory.\n"
+            ":param compression_type: The compression used for the rebuilt tables.\n"
+            ":param block_size: The approximate size of uncompressed data per block in bytes.\n"
+            ":param bloom_filter_bits: The number of bits per key in the bloom filter. 0 disables the filter.\n"
+            ":raises: LevelDBException if the database could not be repaired or is open."),
+        py::call_guard<py::gil_scoped_release>());
+
+    LevelDB.def(
+        "open_info",
+        [](Amulet::LevelDB& self) -> py::typing::Dict<py::str, py::object> {
             if (!self) {
-                throw std::runtime_error("LevelDBIterator has been deleted.");
+                throw std::runtime_error("The LevelDB database has been closed.");
             }
-            self->SeekToLast();
+            py::dict result;
+            if (auto* ext_options = get_options(self)) {
+                const auto& open_info = ext_options->open_info;
+                result["log_files"] = open_info.log_files;
+                result["log_bytes"] = open_info.log_bytes;
+                result["table_files"] = open_info.table_files;
+                result["total_time"] = open_info.total_time;
+                result["open_time"] = open_info.open_time;
+                result["repaired"] = open_info.repair_time.has_value();
+                result["repair_time"] = open_info.repair_time;
+            }
+            return result;
         },
-        py::doc("Seek to the last entry in the database."));
-    LevelDBIterator.def(
-        "seek",
-        [](Amulet::LevelDBIterator& self, leveldb::Slice target) {
+        py::doc(
+            "Get information about opening the database.\n"
+            "\n"
+            "The returned dictionary contains:\n"
+            "\n"
+            "* log_files: The number of log files that were replayed. Writes that had not been written to a table are replayed from the logs.\n"
+            "* log_bytes: The combined size of the log files in bytes.\n"
+            "* table_files: The number of table files. Tables are opened when they are first read rather than when the database is opened.\n"
+            "* total_time: The time taken to construct this object in seconds.\n"
+            "* open_time: The time spent opening the database, including replaying the logs, in seconds.\n"
+            "* repaired: True if the database was corrupt and has been repaired.\n"
+            "* repair_time: The time spent repairing the database in seconds or None if it was not repaired.\n"
+            "\n"
+            ":return: A new dictionary of information."));
+
+    LevelDB.def(
+        "get_config",
+        [](Amulet::LevelDB& self) -> py::typing::Dict<py::str, py::object> {
             if (!self) {
-                throw std::runtime_error("LevelDBIterator has been deleted.");
+                throw std::runtime_error("The LevelDB database has been closed.");
             }
-            self->Seek(target);
+            const auto& options = self.get_options().options;
+            py::dict config;
+            config["compression_type"] = options.compression;
+            config["write_buffer_size"] = options.write_buffer_size;
+            config["block_size"] = options.block_size;
+            config["max_open_files"] = options.max_open_files;
+            config["sync"] = self.get_write_options().sync;
+            if (auto* ext_options = get_options(self)) {
+                config["read_only"] = static_cast<bool>(ext_options->read_only_env);
+                if (ext_options->shared_block_cache) {
+                    config["block_cache_size"] = ext_options->shared_block_cache->get_capacity();
+                    config["block_cache"] = ext_options->shared_block_cache;
+                } else {
+                    config["block_cache_size"] = ext_options->block_cache_size;
+                    config["block_cache"] = py::none();
+                }
+                config["bloom_filter_bits"] = ext_options->bloom_filter_bits;
+                config["value_cache_size"] = ext_options->value_cache ? ext_options->value_cache->get_capacity() : 0;
+                config["metrics"] = static_cast<bool>(ext_options->metrics);
+                config["io_stats"] = static_cast<bool>(ext_options->io_stats_env);
+                auto* limiter = ext_options->io_stats_env ? ext_options->io_stats_env->get_table_write_limiter() : nullptr;
+                config["compaction_write_rate"] = limiter ? limiter->get_rate() : 0;
+            }
+            return config;
         },
-        py::arg("target"),
         py::doc(
-            "Seek to the given entry in the database.\n"
-            "If the entry does not exist it will seek to the location after."));
-    LevelDBIterator.def(
-        "next",
-        [](Amulet::LevelDBIterator& self) {
+            "Get the configuration the database was opened with.\n"
+            "\n"
+            ":return: A new dictionary mapping the option names accepted by :meth:`__init__` to their values."));
+
+    LevelDB.def(
+        "get_property",
+        [](Amulet::LevelDB& self, std::string name) {
             if (!self) {
-                throw std::runtime_error("LevelDBIterator has been deleted.");
+                throw std::runtime_error("The LevelDB database has been closed.");
             }
-            self->Next();
+            return get_property(self.get_database(), name);
         },
+        py::arg("name"),
         py::doc(
-            "Seek to the next entry in the database."));
-    LevelDBIterator.def(
-        "prev",
-        [](Amulet::LevelDBIterator& self) {
+            "Get the value of a leveldb property.\n"
+            "\n"
+            "Supported properties include\n"
+            "\"leveldb.num-files-at-level<N>\", \"leveldb.stats\", \"leveldb.sstables\" and \"leveldb.approximate-memory-usage\".\n"
+            "\n"
+            ":param name: The name of the property.\n"
+            ":return: The value of the property or None if the property is not known."),
+        py::call_guard<py::gil_scoped_release>());
+
+    LevelDB.def(
+        "stats",
+        [](Amulet::LevelDB& self) -> py::typing::Dict<py::str, py::object> {
+            DatabaseStats stats;
+            {
+                py::gil_scoped_release nogil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB database has been closed.");
+                }
+                stats = get_stats(self);
+            }
+            py::list levels;
+            uint64_t total_files = 0;
+            uint64_t total_size = 0;
+            size_t read_amplification = 0;
+            double total_read_mb = 0;
+            double total_write_mb = 0;
+            for (size_t level = 0; level < stats.levels.size(); level++) {
+                const auto& level_stats = stats.levels[level];
+                py::dict level_dict;
+                level_dict["files"] = level_stats.files;
+                level_dict["size"] = level_stats.size;
+                level_dict["compaction_time"] = level_stats.compaction_time;
+                level_dict["compaction_read_mb"] = level_stats.compaction_read_mb;
+                level_dict["compaction_write_mb"] = level_stats.compaction_write_mb;
+                levels.append(level_dict);
+                total_files += level_stats.files;
+                total_size += level_stats.size;
+                // A read may check every level 0 file and one file in each other level.
+                read_amplification += level == 0 ? level_stats.files : level_stats.files != 0;
+                total_read_mb += level_stats.compaction_read_mb;
+                total_write_mb += level_stats.compaction_write_mb;
+            }
+            py::dict result;
+            result["levels"] = levels;
+            result["files"] = total_files;
+            result["size"] = total_size;
+            result["read_amplification"] = read_amplification;
+            // Flushes write without reading so the data written by flushes is about the total written minus the total read.
+            double flushed_mb = total_write_mb - total_read_mb;
+            if (0 < flushed_mb) {
+                result["write_amplification"] = total_write_mb / flushed_mb;
+            } else {
+                result["write_amplification"] = py::none();
+            }
+            result["memory_usage"] = stats.memory_usage;
+            result["block_cache_usage"] = stats.block_cache_usage;
+            result["block_cache_capacity"] = stats.block_cache_capacity;
+            result["value_cache_usage"] = stats.value_cache_usage;
+            result["value_cache_capacity"] = stats.value_cache_capacity;
+            result["value_cache_hits"] = stats.value_cache_hits;
+            result["value_cache_misses"] = stats.value_cache_misses;
+            return result;
+        },
+        py::doc(
+            "Get statistics about the database.\n"
+            "\n"
+            "The returned dictionary contains:\n"
+            "\n"
+            "* levels: A list with a dictionary for each level containing the number of files, their size in bytes "
+            "and the time in seconds, MiB read and MiB written by compactions into the level since the database was opened.\n"
+            "* files: The total number of table files.\n"
+            "* size: The total size of the table files in bytes.\n"
+            "* read_amplification: The maximum number of table files a read may need to check. "
+            "A high value means level 0 files are piling up.\n"
+            "* write_amplification: An estimate of the number of times each byte written has been rewritten by flushes and compactions "
+            "since the database was opened. None if nothing has been written.\n"
+            "* memory_usage: The approximate memory used by the memtables and the block cache in bytes.\n"
+            "* block_cache_usage: The size of the blocks in the block cache in bytes.\n"
+            "* block_cache_capacity: The capacity of the block cache in bytes or None if unknown.\n"
+            "* value_cache_usage: The approximate size of the values in the value cache in bytes.\n"
+            "* value_cache_capacity: The capacity of the value cache in bytes. 0 if it is disabled.\n"
+            "* value_cache_hits: The number of reads served from the value cache since the database was opened.\n"
+            "* value_cache_misses: The number of reads that missed the value cache since the database was opened.\n"
+            "\n"
+            ":return: A new dictionary of statistics."));
+
+    LevelDB.def(
+        "metrics",
+        [](Amulet::LevelDB& self) -> py::typing::Dict<py::str, py::typing::Dict<py::str, py::object>> {
             if (!self) {
-                throw std::runtime_error("LevelDBIterator has been deleted.");
+                throw std::runtime_error("The LevelDB database has been closed.");
             }
-            self->Prev();
+            py::dict result;
+            auto metrics = get_metrics(self);
+            if (!metrics) {
+                return result;
+            }
+            for (size_t i = 0; i < Amulet::metrics_operation_count; i++) {
+                Amulet::LatencyHistogram::Summary summary;
+                {
+                    py::gil_scoped_release nogil;
+                    summary = metrics->get_histogram(static_cast<Amulet::MetricsOperation>(i)).get_summary();
+                }
+                auto to_seconds = [](uint64_t nanoseconds) {
+                    return static_cast<double>(nanoseconds) / 1e9;
+                };
+                py::dict operation;
+                operation["count"] = summary.count;
+                operation["total"] = to_seconds(summary.total);
+                if (summary.count) {
+                    operation["min"] = to_seconds(summary.min);
+                    operation["max"] = to_seconds(summary.max);
+                    operation["mean"] = to_seconds(summary.total) / static_cast<double>(summary.count);
+                    operation["p50"] = to_seconds(summary.get_percentile(0.5));
+                    operation["p90"] = to_seconds(summary.get_percentile(0.9));
+                    operation["p99"] = to_seconds(summary.get_percentile(0.99));
+                    operation["p999"] = to_seconds(summary.get_percentile(0.999));
+                } else {
+                    for (const char* key : { "min", "max", "mean", "p50", "p90", "p99", "p999" }) {
+                        operation[key] = py::none();
+                    }
+                }
+                result[Amulet::metrics_operation_names[i]] = operation;
+            }
+            return result;
         },
         py::doc(
-            "Seek to the previous entry in the database."));
-    LevelDBIterator.def(
-        "key",
-        [](Amulet::LevelDBIterator& self) {
+            "Get the latency of the operations on the database.\n"
+            "\n"
+            "The database must be opened with metrics=True. Otherwise this returns an empty dictionary.\n"
+            "The returned dictionary maps each operation to a dictionary containing the number of calls, "
+            "the total time and the min, max, mean, p50, p90, p99 and p999 latency in seconds. "
+            "The latencies are None if the operation has not been called.\n"
+            "The percentiles are accurate to about 6%.\n"
+            "\n"
+            "The operations are:\n"
+            "\n"
+            "* open: Opening the database.\n"
+            "* repair: Repairing a corrupt database while opening it.\n"
+            "* get: :meth:`get`.\n"
+            "* get_many: :meth:`get_many`.\n"
+            "* put: :meth:`put`.\n"
+            "* delete: :meth:`delete`.\n"
+            "* write: Writing a batch. This includes :meth:`put_batch`, :meth:`write` and the batches written by "
+            ":meth:`delete_range` and :meth:`bulk_import`.\n"
+            "* seek: Moving an iterator created by the iteration methods to the start of its range.\n"
+            "* next: Moving an iterator created by the iteration methods to the next item.\n"
+            "* next_batch: Reading a batch in :meth:`iterate_batches`, :meth:`iterate_key_batches` and :meth:`parallel_scan`.\n"
+            "* compact: :meth:`compact`, :meth:`compact_range` and each partition of :meth:`compact_async`.\n"
+            "\n"
+            ":return: A new dictionary of metrics."));
+
+    LevelDB.def(
+        "io_stats",
+        [](Amulet::LevelDB& self) -> py::typing::Dict<py::str, py::object> {
             if (!self) {
-                throw std::runtime_error("LevelDBIterator has been deleted.");
+                throw std::runtime_error("The LevelDB database has been closed.");
             }
-            if (!self->Valid()) {
-                throw std::runtime_error("LevelDBIterator does not point to a valid value.");
+            py::dict result;
+            auto* ext_options = get_options(self);
+            if (!ext_options || !ext_options->io_stats_env) {
+                return result;
             }
-            return py::bytes(self->key().data(), self->key().size());
+            auto& env = *ext_options->io_stats_env;
+            for (size_t i = 0; i < Amulet::database_file_type_count; i++) {
+                const auto& stats = env.get_stats(static_cast<Amulet::DatabaseFileType>(i));
+                py::dict file_stats;
+                file_stats["read_bytes"] = stats.read_bytes.load();
+                file_stats["reads"] = stats.reads.load();
+                file_stats["write_bytes"] = stats.write_bytes.load();
+                file_stats["writes"] = stats.writes.load();
+                file_stats["syncs"] = stats.syncs.load();
+                result[Amulet::database_file_type_names[i]] = file_stats;
+            }
+            auto* limiter = env.get_table_write_limiter();
+            result["throttled_time"] = limiter ? limiter->get_throttled_time() : 0.0;
+            return result;
         },
         py::doc(
-            "Get the key of the current entry in the database.\n"
-            ":raises: runtime_error if iterator is not valid."));
-    LevelDBIterator.def(
-        "value",
-        [](Amulet::LevelDBIterator& self) {
+            "Get the amount of data read from and written to the database files since the database was opened.\n"
+            "\n"
+            "The database must be opened with io_stats=True or a compaction_write_rate. Otherwise this returns an empty dictionary.\n"
+            "The returned dictionary has a dictionary for each type of file, "
+            "\"log\", \"table\", \"manifest\" and \"other\", containing:\n"
+            "\n"
+            "* read_bytes: The number of bytes read.\n"
+            "* reads: The number of reads.\n"
+            "* write_bytes: The number of bytes written.\n"
+            "* writes: The number of writes.\n"
+            "* syncs: The number of times the files were flushed to disk.\n"
+            "\n"
+            "It also contains throttled_time, the total time in seconds that table writes waited for the compaction_write_rate.\n"
+            "Table reads served from the block cache do not read from the files.\n"
+            "\n"
+            ":return: A new dictionary of statistics."));
+
+    LevelDB.def(
+        "reset_metrics",
+        [](Amulet::LevelDB& self) {
             if (!self) {
-                throw std::runtime_error("LevelDBIterator has been deleted.");
+                throw std::runtime_error("The LevelDB database has been closed.");
             }
-            if (!self->Valid()) {
-                throw std::runtime_error("LevelDBIterator does not point to a valid value.");
+            if (auto metrics = get_metrics(self)) {
+                metrics->reset();
             }
-            return py::bytes(self->value().data(), self->value().size());
         },
+        py::doc("Clear the metrics returned by :meth:`metrics`."),
+        py::call_guard<py::gil_scoped_release>());
+
+    LevelDB.def(
+        "close",
+        &Amulet::LevelDB::close,
         py::doc(
-            "Get the value of the current entry in the database.\n"
-            ":raises: runtime_error if iterator is not valid."));
+            "Close the leveldb database.\n"
+            "Only the owner of the database may close it.\n"
+            "If needed, an external lock must be used to ensure that no other threads are accessing the database."),
+        py::call_guard<py::gil_scoped_release>());
 
-    py::enum_<leveldb::CompressionType> CompressionType(m, "CompressionType");
-    CompressionType.value(
-        "NoCompression",
-        leveldb::CompressionType::kNoCompression,
-        "No compression.");
-    CompressionType.value(
-        "SnappyCompression",
-        leveldb::CompressionType::kSnappyCompression,
-        "Snappy compression.");
-    CompressionType.value(
-        "ZstdCompression",
-        leveldb::CompressionType::kZstdCompression,
-        "Zstd compression.");
-    CompressionType.value(
-        "ZlibRawCompression",
-        leveldb::CompressionType::kZlibRawCompression,
-        "Zlib raw compression.");
-    CompressionType.attr("__repr__") = py::cpp_function(
-        [module_name, CompressionType](const py::object& arg) -> py::str {
-            return py::str("{}.{}").format(module_name, CompressionType.attr("__str__")(arg));
+    LevelDB.def(
+        "compact",
+        [](Amulet::LevelDB& self) {
+            if (!self) {
+                throw std::runtime_error("The LevelDB database has been closed.");
+            }
+            check_writable(self);
+            Amulet::MetricsTimer timer(get_metrics(self).get(), Amulet::MetricsOperation::Compact);
+            self->CompactRange(nullptr, nullptr);
+        },
+        py::doc("Remove deleted entries from the database to reduce its size."),
+        py::call_guard<py::gil_scoped_release>());
+
+    LevelDB.def(
+        "compact_range",
+        [](Amulet::LevelDB& self, std::optional<py::bytes> start, std::optional<py::bytes> end) {
+            std::optional<std::string> start_str;
+            std::optional<std::string> end_str;
+            if (start) {
+                start_str = start->cast<std::string>();
+            }
+            if (end) {
+                end_str = end->cast<std::string>();
+            }
+            py::gil_scoped_release nogil;
+            if (!self) {
+                throw std::runtime_error("The LevelDB database has been closed.");
+            }
+            check_writable(self);
+            leveldb::Slice start_slice = start_str ? leveldb::Slice(*start_str) : leveldb::Slice();
+            leveldb::Slice end_slice = end_str ? leveldb::Slice(*end_str) : leveldb::Slice();
+            Amulet::MetricsTimer timer(get_metrics(self).get(), Amulet::MetricsOperation::Compact);
+            self->CompactRange(start_str ? &start_slice : nullptr, end_str ? &end_slice : nullptr);
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::doc(
+            "Compact the keys in [start, end).\n"
+            "\n"
+            "This only rewrites the tables that overlap the range, "
+            "which is much faster than :meth:`compact` after editing a small region.\n"
+            "The end key may also be compacted.\n"
+            "\n"
+            ":param start: The first key in the range. None for the start of the database.\n"
+            ":param end: The end of the range. None for the end of the database."));
+
+    LevelDB.def(
+        "compact_async",
+        [](Amulet::LevelDB& self, std::optional<py::bytes> start, std::optional<py::bytes> end, uint64_t partition_size) {
+            if (partition_size == 0) {
+                throw py::value_error("partition_size must be greater than 0.");
+            }
+            std::optional<std::string> start_str;
+            std::optional<std::string> end_str;
+            if (start) {
+                start_str = start->cast<std::string>();
+            }
+            if (end) {
+                end_str = end->cast<std::string>();
+            }
+            py::gil_scoped_release nogil;
+            if (!self) {
+                throw std::runtime_error("The LevelDB database has been closed.");
+            }
+            check_writable(self);
+            auto* options = get_options(self);
+            if (!options) {
+                throw std::runtime_error("Background compaction is not supported by this database.");
+            }
+            auto task = std::make_shared<CompactionTask>();
+            task->thread = std::thread(
+                run_compaction,
+                std::ref(self.get_database()),
+                self.get_read_options(),
+                options->metrics.get(),
+                std::ref(*task),
+                std::move(start_str),
+                std::move(end_str),
+                partition_size);
+            options->add_compaction(task);
+            return task;
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("partition_size") = 64 * 1024 * 1024,
+        py::doc(
+            "Compact the keys in [start, end) on a background thread.\n"
+            "\n"
+            "The range is split into partitions of approximately partition_size bytes of table data "
+            "which are compacted in order.\n"
+            "The compaction can be cancelled between partitions.\n"
+            "Closing the database cancels the compaction and waits for the current partition.\n"
+            "\n"
+            ">>> compaction = db.compact_async(b\"start\", b\"end\")\n"
+            ">>> compaction.wait()\n"
+            "\n"
+            ":param start: The first key in the range. None for the start of the database.\n"
+            ":param end: The end of the range. None for the end of the database.\n"
+            ":param partition_size: The approximate size of each partition in bytes.\n"
+            ":return: A :class:`Compaction` handle to monitor or cancel the compaction."));
+
+    LevelDB.def(
+        "approximate_size",
+        [](Amulet::LevelDB& self, std::optional<py::bytes> start, std::optional<py::bytes> end) {
+            std::string start_str = start ? start->cast<std::string>() : std::string();
+            std::optional<std::string> end_str;
+            if (end) {
+                end_str = end->cast<std::string>();
+            }
+            py::gil_scoped_release nogil;
+            if (!self) {
+                throw std::runtime_error("The LevelDB database has been closed.");
+            }
+            if (!end_str) {
+                end_str = get_end_key(self.create_iterator()->get_iterator());
+            }
+            return get_approximate_size(self.get_database(), start_str, *end_str);
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::doc(
+            "Get the approximate size on disk of the data in a range of keys.\n"
+            "\n"
+            "This is computed from the table file indexes without reading the data.\n"
+            "Recently written data that is still in memory is not included.\n"
+            "\n"
+            ":param start: The first key in the range. Leave as None to start at the beginning.\n"
+            ":param end: The key after the range. Leave as None to finish at the end.\n"
+            ":return: The approximate size in bytes."));
+    LevelDB.def(
+        "approximate_sizes",
+        [](Amulet::LevelDB& self, std::vector<std::pair<std::optional<py::bytes>, std::optional<py::bytes>>> ranges) {
+            std::vector<std::string> starts;
+            std::vector<std::optional<std::string>> ends;
+            starts.reserve(ranges.size());
+            ends.reserve(ranges.size());
+            for (const auto& [start, end] : ranges) {
+                starts.push_back(start ? start->cast<std::string>() : std::string());
+                ends.push_back(end ? std::optional<std::string>(end->cast<std::string>()) : std::nullopt);
+            }
+            std::vector<uint64_t> sizes(ranges.size());
+            {
+                py::gil_scoped_release nogil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB database has been closed.");
+                }
+                std::optional<std::string> end_key;
+                std::vector<leveldb::Range> leveldb_ranges;
+                std::vector<size_t> indexes;
+                for (size_t i = 0; i < starts.size(); i++) {
+                    if (!ends[i]) {
+                        if (!end_key) {
+                            end_key = get_end_key(self.create_iterator()->get_iterator());
+                        }
+                        ends[i] = *end_key;
+                    }
+                    if (leveldb::Slice(starts[i]).compare(*ends[i]) < 0) {
+                        leveldb_ranges.emplace_back(starts[i], *ends[i]);
+                        indexes.push_back(i);
+                    }
+                }
+                std::vector<uint64_t> leveldb_sizes(leveldb_ranges.size());
+                self->GetApproximateSizes(leveldb_ranges.data(), static_cast<int>(leveldb_ranges.size()), leveldb_sizes.data());
+                for (size_t i = 0; i < indexes.size(); i++) {
+                    sizes[indexes[i]] = leveldb_sizes[i];
+                }
+            }
+            return sizes;
         },
-        py::name("__repr__"),
-        py::is_method(CompressionType));
-
-    py::classh<Amulet::LevelDB> LevelDB(m, "LevelDB", py::release_gil_before_calling_cpp_dtor(),
-        "A LevelDB database");
+        py::arg("ranges"),
+        py::doc(
+            "Get the approximate size on disk of the data in each range of keys.\n"
+            "\n"
+            ":param ranges: A sequence of start, end pairs. See :meth:`approximate_size`.\n"
+            ":return: The approximate size in bytes of each range."));
     LevelDB.def(
-        py::init(&open_leveldb),
-        py::arg("path"),
-        py::arg("create_if_missing") = false,
-        py::arg("compression_type") = leveldb::kZlibRawCompression,
+        "split_range",
+        [](Amulet::LevelDB& self, std::optional<py::bytes> start, std::optional<py::bytes> end, size_t count) {
+            if (count == 0) {
+                throw py::value_error("count must be greater than 0.");
+            }
+            auto range = make_key_range(start, end, true, false, false);
+            std::vector<KeyRange> ranges;
+            {
+                py::gil_scoped_release nogil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB database has been closed.");
+                }
+                ranges = split_key_range(self, range, count);
+            }
+            std::vector<std::pair<std::optional<py::bytes>, std::optional<py::bytes>>> result;
+            for (const auto& sub_range : ranges) {
+                result.emplace_back(
+                    sub_range.start ? std::optional<py::bytes>(*sub_range.start) : std::nullopt,
+                    sub_range.end ? std::optional<py::bytes>(*sub_range.end) : std::nullopt);
+            }
+            return result;
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::arg("count") = 16,
         py::doc(
-            "Construct a new :class :`LevelDB` instance from the database at the given path.\n"
+            "Split the keys in [start, end) into ranges with approximately equal amounts of data.\n"
             "\n"
-            "A leveldb database is like a dictionary that only contains bytes as the keys and values and exists entirely on the disk.\n"
+            "This only reads the table indexes so it is fast on large databases.\n"
+            "Data that has not been written to a table yet is not counted.\n"
+            "The ranges can be processed in parallel. Eg. with :meth:`iterate_batches` on a thread pool.\n"
             "\n"
-            ":param path: The path to the database directory.\n"
-            ":param create_if_missing: If True a new database will be created if one does not exist at the given path.\n"
-            ":param compression_type: The compression type to use when writing data to the database. Defaults to zlib raw.\n"
-            ":raises: LevelDBException if create_if_missing is False and the db does not exist."));
-
+            ":param start: The first key in the range. None for the start of the database.\n"
+            ":param end: The end of the range. None for the end of the database.\n"
+            ":param count: The maximum number of ranges. Fewer are returned if the range is too small to split.\n"
+            ":return: A list of start, end pairs in order that together cover the range."));
     LevelDB.def(
-        "close",
-        &Amulet::LevelDB::close,
+        "parallel_scan",
+        [](
+            Amulet::LevelDB& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            std::function<void(py::typing::List<py::typing::Tuple<py::bytes, py::bytes>>)> fn,
+            std::optional<size_t> workers,
+            size_t batch_size) {
+            if (workers && *workers == 0) {
+                throw py::value_error("workers must be greater than 0.");
+            }
+            if (batch_size == 0) {
+                throw py::value_error("batch_size must be greater than 0.");
+            }
+            parallel_scan(
+                self,
+                make_key_range(start, end, true, false, false),
+                fn,
+                workers.value_or(std::max<size_t>(1, std::thread::hardware_concurrency())),
+                batch_size);
+        },
+        py::arg("start"),
+        py::arg("end"),
+        py::arg("fn"),
+        py::kw_only(),
+        py::arg("workers") = py::none(),
+        py::arg("batch_size") = 1000,
         py::doc(
-            "Close the leveldb database.\n"
-            "Only the owner of the database may close it.\n"
-            "If needed, an external lock must be used to ensure that no other threads are accessing the database."),
-        py::call_guard<py::gil_scoped_release>());
-
+            "Call a function with batches of the items in [start, end) from several threads.\n"
+            "\n"
+            "The range is split into partitions with :meth:`split_range` and read from one snapshot by worker threads.\n"
+            "Reading and decompressing the data is done without the GIL so it runs in parallel.\n"
+            "The function is called with the GIL so it should do as little work as possible.\n"
+            "The batches are passed in no particular order.\n"
+            "If the function raises an exception the scan stops and the exception is raised here.\n"
+            "\n"
+            ">>> counts = collections.Counter()\n"
+            ">>> db.parallel_scan(None, None, lambda batch: counts.update(key[:8] for key, _ in batch))\n"
+            "\n"
+            ":param start: The first key in the range. None for the start of the database.\n"
+            ":param end: The end of the range. None for the end of the database.\n"
+            ":param fn: The function to call with each list of key, value tuples.\n"
+            ":param workers: The number of threads. None to use the number of processors.\n"
+            ":param batch_size: The maximum number of items in each batch."));
     LevelDB.def(
-        "compact",
-        [](Amulet::LevelDB& self) {
+        "estimate_count",
+        [](Amulet::LevelDB& self, std::optional<py::bytes> start, std::optional<py::bytes> end, size_t sample_size) {
+            if (sample_size == 0) {
+                throw py::value_error("sample_size must be greater than 0.");
+            }
+            std::optional<std::string> start_str;
+            if (start) {
+                start_str = start->cast<std::string>();
+            }
+            std::optional<std::string> end_str;
+            if (end) {
+                end_str = end->cast<std::string>();
+            }
+            py::gil_scoped_release nogil;
             if (!self) {
                 throw std::runtime_error("The LevelDB database has been closed.");
             }
-            self->CompactRange(nullptr, nullptr);
+            return estimate_count(self, start_str, end_str, sample_size);
         },
-        py::doc("Remove deleted entries from the database to reduce its size."),
-        py::call_guard<py::gil_scoped_release>());
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("sample_size") = 10000,
+        py::doc(
+            "Estimate the number of keys in a range without reading the whole range.\n"
+            "\n"
+            "If the range contains at most sample_size keys they are counted exactly.\n"
+            "Otherwise the first sample_size keys are counted and about sample_size more keys are read "
+            "from points spread evenly through the data in the rest of the range. "
+            "Their density is scaled by the approximate size of the rest of the range.\n"
+            "The estimate is less accurate if the size of entries varies a lot through the range.\n"
+            "\n"
+            ":param start: The first key in the range. Leave as None to start at the beginning.\n"
+            ":param end: The key after the range. Leave as None to finish at the end.\n"
+            ":param sample_size: The number of keys to read.\n"
+            ":return: The estimated number of keys."));
 
-    auto put = [](Amulet::LevelDB& self, leveldb::Slice key, leveldb::Slice value) {
+    auto put = [](Amulet::LevelDB& self, leveldb::Slice key, leveldb::Slice value, std::optional<bool> sync) {
         if (!self) {
             throw std::runtime_error("The LevelDB database has been closed.");
         }
-        auto status = self->Put(self.get_write_options(), key, value);
+        auto write_options = get_write_options(self, sync);
+        leveldb::Status status;
+        {
+            Amulet::MetricsTimer timer(get_metrics(self).get(), Amulet::MetricsOperation::Put);
+            status = self->Put(write_options, key, value);
+        }
+        if (auto* value_cache = get_value_cache(self)) {
+            value_cache->erase(key);
+        }
         if (!status.ok()) {
             throw LevelDBException(status.ToString());
         }
     };
     LevelDB.def(
         "put", put,
-        py::arg("key"), py::arg("value"),
-        py::doc("Set a value in the database."),
+        py::arg("key"), py::arg("value"), py::arg("sync") = py::none(),
+        py::doc(
+            "Set a value in the database.\n"
+            "\n"
+            ":param key: The key to set.\n"
+            ":param value: The value to set.\n"
+            ":param sync: If True the write is flushed from the operating system buffer cache before returning. "
+            "Leave as None to use the database default."),
         py::call_guard<py::gil_scoped_release>());
     LevelDB.def(
-        "__setitem__", put,
+        "__setitem__",
+        [put](Amulet::LevelDB& self, leveldb::Slice key, leveldb::Slice value) {
+            put(self, key, value, std::nullopt);
+        },
         py::arg("key"), py::arg("value"),
         py::call_guard<py::gil_scoped_release>());
 
     LevelDB.def(
         "put_batch",
-        [](Amulet::LevelDB& self, leveldb::WriteBatch batch) {
+        [](Amulet::LevelDB& self, leveldb::WriteBatch batch, std::optional<bool> sync) {
             if (!self) {
                 throw std::runtime_error("The LevelDB database has been closed.");
             }
-            leveldb::Status status = self->Write(self.get_write_options(), &batch);
-            if (!status.ok()) {
-                throw LevelDBException(status.ToString());
+            write_batch(self, get_write_options(self, sync), batch);
+        },
+        py::arg("batch"),
+        py::arg("sync") = py::none(),
+        py::doc(
+            "Set a group of values in the database.\n"
+            "\n"
+            ":param batch: A mapping of keys to values. A value of None deletes the key.\n"
+            ":param sync: If True the write is flushed from the operating system buffer cache before returning. "
+            "Leave as None to use the database default."),
+        py::call_guard<py::gil_scoped_release>());
+
+    LevelDB.def(
+        "write",
+        [](Amulet::LevelDB& self, WriteBatch& batch, std::optional<bool> sync) {
+            if (!self) {
+                throw std::runtime_error("The LevelDB database has been closed.");
             }
+            std::lock_guard lock(batch.mutex);
+            write_batch(self, get_write_options(self, sync), batch.batch);
         },
         py::arg("batch"),
-        py::doc("Set a group of values in the database."),
+        py::arg("sync") = py::none(),
+        py::doc(
+            "Apply the operations in a batch to the database atomically.\n"
+            "\n"
+            ":param batch: The batch to write. It is not cleared.\n"
+            ":param sync: If True the write is flushed from the operating system buffer cache before returning. "
+            "Leave as None to use the database default."),
         py::call_guard<py::gil_scoped_release>());
 
+    LevelDB.def(
+        "bulk_import",
+        [](Amulet::LevelDB& self, size_t max_batch_size, bool compact) {
+            if (!self) {
+                throw std::runtime_error("The LevelDB database has been closed.");
+            }
+            check_writable(self);
+            return std::make_unique<BulkImport>(self, max_batch_size, compact);
+        },
+        py::arg("max_batch_size") = 4 * 1024 * 1024,
+        py::arg("compact") = true,
+        py::keep_alive<0, 1>(),
+        py::doc(
+            "Start a bulk import.\n"
+            "\n"
+            "Writes are buffered into large batches that are written without syncing, "
+            "which amortises the per-write logging overhead.\n"
+            "When the import finishes the data is synced to disk and the modified key range is compacted.\n"
+            "\n"
+            ">>> with db.bulk_import() as bulk:\n"
+            ">>>     bulk.put_many(data.items())\n"
+            "\n"
+            ":param max_batch_size: The approximate size of each batch in bytes.\n"
+            ":param compact: Compact the modified key range when the import finishes.\n"
+            ":return: A :class:`BulkImport` context manager that finishes the import on exit."));
+
     LevelDB.def(
         "__contains__",
         [](Amulet::LevelDB& self, leveldb::Slice key) {
             if (!self) {
                 throw std::runtime_error("The LevelDB database has been closed.");
             }
-            std::string value;
-            return self->Get(self.get_read_options(), key, &value).ok();
+            thread_local std::string buffer;
+            auto found = contains(self, self.get_read_options(), key, buffer);
+            if (large_value_buffer_size < buffer.capacity()) {
+                // Don't hold on to large buffers indefinitely.
+                std::string().swap(buffer);
+            }
+            return found;
         },
         py::arg("key"),
         py::call_guard<py::gil_scoped_release>());
 
+    LevelDB.def(
+        "contains_many",
+        [](Amulet::LevelDB& self, pyext::collections::Sequence<py::bytes> keys) -> py::typing::List<bool> {
+            KeySlices key_slices(keys);
+            auto& slices = key_slices.slices;
+            std::vector<bool> found(slices.size(), false);
+            {
+                py::gil_scoped_release nogil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB database has been closed.");
+                }
+                ScopedSnapshot snapshot(self);
+                std::string buffer;
+                for (size_t i = 0; i < slices.size(); i++) {
+                    found[i] = contains(self, snapshot.read_options, slices[i], buffer);
+                }
+            }
+            py::list result(slices.size());
+            for (size_t i = 0; i < slices.size(); i++) {
+                result[i] = py::bool_(found[i]);
+            }
+            return result;
+        },
+        py::arg("keys"),
+        py::doc(
+            "Check if many keys exist in the database.\n"
+            "\n"
+            "All keys are checked against the same snapshot of the database without holding the GIL.\n"
+            "\n"
+            ":param keys: The keys to look for.\n"
+            ":return: A list of bools in the same order as the keys."));
+
     auto get = [](Amulet::LevelDB& self, leveldb::Slice key) {
         std::string value;
         leveldb::Status status;
@@ -514,15 +3293,23 @@ void init_amulet_leveldb(py::module m)
             if (!self) {
                 throw std::runtime_error("The LevelDB database has been closed.");
             }
-            status = self->Get(self.get_read_options(), key, &value);
-        }
-        if (status.ok()) {
-            return py::bytes(value);
-        } else if (status.IsNotFound()) {
-            throw py::key_error(key.ToString());
-        } else {
-            throw LevelDBException(status.ToString());
+            Amulet::MetricsTimer timer(get_metrics(self).get(), Amulet::MetricsOperation::Get);
+            auto* value_cache = get_value_cache(self);
+            if (value_cache) {
+                if (auto cached_value = value_cache->lookup(key)) {
+                    value = std::move(*cached_value);
+                } else {
+                    auto generation = value_cache->get_generation();
+                    status = self->Get(self.get_read_options(), key, &value);
+                    if (status.ok()) {
+                        value_cache->insert(key, value, generation);
+                    }
+                }
+            } else {
+                status = self->Get(self.get_read_options(), key, &value);
+            }
         }
+        return get_result(status, value, key);
     };
     LevelDB.def(
         "get",
@@ -537,11 +3324,102 @@ void init_amulet_leveldb(py::module m)
             ":raises: LevelDBException on other error."));
     LevelDB.def("__getitem__", get, py::arg("key"));
 
-    auto del = [](Amulet::LevelDB& self, leveldb::Slice key) {
+    py::class_<ValueBuffer>(py::handle(), "ValueBuffer", py::module_local(), py::buffer_protocol())
+        .def_buffer([](ValueBuffer& self) {
+            return py::buffer_info(
+                self.data.data(),
+                1,
+                "B",
+                1,
+                { static_cast<py::ssize_t>(self.data.size()) },
+                { 1 },
+                true);
+        });
+
+    LevelDB.def(
+        "get_view",
+        [](Amulet::LevelDB& self, leveldb::Slice key) -> py::memoryview {
+            ValueBuffer buffer;
+            leveldb::Status status;
+            {
+                py::gil_scoped_release gil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB database has been closed.");
+                }
+                status = self->Get(self.get_read_options(), key, &buffer.data);
+            }
+            if (status.ok()) {
+                return py::memoryview(py::cast(std::move(buffer)));
+            } else if (status.IsNotFound()) {
+                throw py::key_error(key.ToString());
+            } else {
+                throw LevelDBException(status.ToString());
+            }
+        },
+        py::arg("key"),
+        py::doc(
+            "Get a key from the database as a read-only memoryview.\n"
+            "\n"
+            "This avoids the copy into a bytes object that :meth:`get` makes.\n"
+            "The memoryview owns the data so it stays valid after the database is modified or closed.\n"
+            "\n"
+            ":param key: The key to get from the database.\n"
+            ":return: A read-only memoryview of the data stored behind the given key.\n"
+            ":raises: KeyError if the requested key is not present.\n"
+            ":raises: LevelDBException on other error."));
+
+    LevelDB.def(
+        "get_many",
+        [](
+            Amulet::LevelDB& self,
+            pyext::collections::Sequence<py::bytes> keys,
+            py::object default_) -> py::typing::List<py::object> {
+            KeySlices key_slices(keys);
+            std::vector<std::string> values;
+            std::vector<bool> found;
+            {
+                py::gil_scoped_release nogil;
+                if (!self) {
+                    throw std::runtime_error("The LevelDB database has been closed.");
+                }
+                Amulet::MetricsTimer timer(get_metrics(self).get(), Amulet::MetricsOperation::GetMany);
+                auto* value_cache = get_value_cache(self);
+                if (value_cache) {
+                    read_many_cached(self, *value_cache, key_slices.slices, values, found);
+                } else {
+                    ScopedSnapshot snapshot(self);
+                    read_many(*self, snapshot.read_options, key_slices.slices, values, found);
+                }
+            }
+            return make_value_list(values, found, default_);
+        },
+        py::arg("keys"),
+        py::arg("default") = py::none(),
+        py::doc(
+            "Get the values for many keys from the database.\n"
+            "\n"
+            "All keys are read from the same snapshot of the database without holding the GIL.\n"
+            "If the value cache is enabled, cached values are used for the keys that hit "
+            "so values written by other threads during the call may be newer than the snapshot.\n"
+            "\n"
+            ":param keys: The keys to get from the database.\n"
+            ":param default: The value to use for keys that are not present.\n"
+            ":return: A list of the values in the same order as the keys.\n"
+            ":raises: LevelDBException on other error."));
+
+    auto del = [](Amulet::LevelDB& self, leveldb::Slice key, std::optional<bool> sync) {
         if (!self) {
             throw std::runtime_error("The LevelDB database has been closed.");
         }
-        auto status = self->Delete(self.get_write_options(), key);
+        auto write_options = get_write_options(self, sync);
+        leveldb::Status status;
+        {
+            Amulet::MetricsTimer timer(get_metrics(self).get(), Amulet::MetricsOperation::Delete);
+            status = self->Delete(write_options, key);
+        }
+        if (auto* value_cache = get_value_cache(self)) {
+            value_cache->erase(key);
+        }
         if (!status.ok()) {
             throw LevelDBException(status.ToString());
         }
@@ -550,86 +3428,329 @@ void init_amulet_leveldb(py::module m)
         "delete",
         del,
         py::arg("key"),
+        py::arg("sync") = py::none(),
         py::doc(
             "Delete a key from the database.\n"
             "\n"
-            ":param key: The key to delete from the database."),
+            ":param key: The key to delete from the database.\n"
+            ":param sync: If True the write is flushed from the operating system buffer cache before returning. "
+            "Leave as None to use the database default."),
         py::call_guard<py::gil_scoped_release>());
     LevelDB.def(
-        "__delitem__", del,
+        "__delitem__",
+        [del](Amulet::LevelDB& self, leveldb::Slice key) {
+            del(self, key, std::nullopt);
+        },
         py::arg("key"),
         py::call_guard<py::gil_scoped_release>());
 
+    LevelDB.def(
+        "delete_range",
+        [](Amulet::LevelDB& self, std::optional<py::bytes> start, std::optional<py::bytes> end, bool compact, size_t max_batch_size, std::optional<bool> sync) {
+            if (max_batch_size == 0) {
+                throw py::value_error("max_batch_size must be greater than 0.");
+            }
+            auto range = make_key_range(start, end, true, false, false);
+            py::gil_scoped_release nogil;
+            return delete_range(self, range, max_batch_size, sync, compact);
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("compact") = false,
+        py::arg("max_batch_size") = 4 * 1024 * 1024,
+        py::arg("sync") = py::none(),
+        py::doc(
+            "Delete all keys in [start, end).\n"
+            "\n"
+            "The keys are deleted in batches so the deletion is not atomic.\n"
+            "\n"
+            ":param start: The first key to delete. None for the start of the database.\n"
+            ":param end: The end of the range. None for the end of the database.\n"
+            ":param compact: Compact the range afterwards to reclaim the disk space.\n"
+            ":param max_batch_size: The approximate size of each write batch in bytes.\n"
+            ":param sync: If True the last batch is flushed from the operating system buffer cache before returning. "
+            "Leave as None to use the database default.\n"
+            ":return: The number of keys that were deleted."));
+    LevelDB.def(
+        "delete_prefix",
+        [](Amulet::LevelDB& self, py::bytes prefix, bool compact, size_t max_batch_size, std::optional<bool> sync) {
+            if (max_batch_size == 0) {
+                throw py::value_error("max_batch_size must be greater than 0.");
+            }
+            auto range = KeyRange::from_prefix(prefix.cast<std::string>(), false);
+            py::gil_scoped_release nogil;
+            return delete_range(self, range, max_batch_size, sync, compact);
+        },
+        py::arg("prefix"),
+        py::kw_only(),
+        py::arg("compact") = false,
+        py::arg("max_batch_size") = 4 * 1024 * 1024,
+        py::arg("sync") = py::none(),
+        py::doc(
+            "Delete all keys that start with the prefix.\n"
+            "\n"
+            "The keys are deleted in batches so the deletion is not atomic.\n"
+            "\n"
+            ":param prefix: The prefix of the keys to delete.\n"
+            ":param compact: Compact the range afterwards to reclaim the disk space.\n"
+            ":param max_batch_size: The approximate size of each write batch in bytes.\n"
+            ":param sync: If True the last batch is flushed from the operating system buffer cache before returning. "
+            "Leave as None to use the database default.\n"
+            ":return: The number of keys that were deleted."));
+
     LevelDB.def(
         "create_iterator",
-        &Amulet::LevelDB::create_iterator,
+        py::overload_cast<>(&Amulet::LevelDB::create_iterator),
         py::doc("Create a new leveldb Iterator."),
         py::call_guard<py::gil_scoped_release>());
 
+    auto create_db_iterator = [](Amulet::LevelDB& self) {
+        py::gil_scoped_release nogil;
+        if (!self) {
+            throw std::runtime_error("The LevelDB database has been closed.");
+        }
+        return self.create_iterator();
+    };
     LevelDB.def(
         "iterate",
-        [](
+        [create_db_iterator](
             Amulet::LevelDB& self,
             std::optional<py::bytes> start,
-            std::optional<py::bytes> end) {
-            if (!self) {
-                throw std::runtime_error("The LevelDB database has been closed.");
-            }
-            std::unique_ptr<Amulet::LevelDBIterator> iterator_ptr;
-            {
-                py::gil_scoped_release nogil;
-                iterator_ptr = self.create_iterator();
-            }
-            auto& iterator = *iterator_ptr;
-            if (start) {
-                iterator->Seek(start->cast<std::string>());
-            } else {
-                iterator->SeekToFirst();
-            }
-
-            if (end) {
-                return pyext::make_iterator(
-                    LevelDBItemsRangeIterator(std::move(iterator_ptr), end->cast<std::string>()));
-            } else {
-                return pyext::make_iterator(
-                    LevelDBItemsIterator(std::move(iterator_ptr)));
-            }
+            std::optional<py::bytes> end,
+            bool start_inclusive,
+            bool end_inclusive,
+            bool reverse,
+            std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Items>(
+                create_db_iterator(self),
+                make_key_range(start, end, start_inclusive, end_inclusive, reverse),
+                limit,
+                get_metrics(self));
         },
         py::arg("start") = py::none(),
         py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("start_inclusive") = true,
+        py::arg("end_inclusive") = false,
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
         py::doc(
             "Iterate through all keys and data that exist between the given keys.\n"
             "\n"
             ":param start: The key to start at. Leave as None to start at the beginning.\n"
-            ":param end: The key to end at. Leave as None to finish at the end."));
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param start_inclusive: Include the start key if it exists.\n"
+            ":param end_inclusive: Include the end key if it exists.\n"
+            ":param reverse: Iterate from the end of the range to the start.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit.\n"
+            ":return: An iterator of key, value tuples."));
+    LevelDB.def(
+        "iterate_keys",
+        [create_db_iterator](
+            Amulet::LevelDB& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            bool start_inclusive,
+            bool end_inclusive,
+            bool reverse,
+            std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Keys>(
+                create_db_iterator(self),
+                make_key_range(start, end, start_inclusive, end_inclusive, reverse),
+                limit,
+                get_metrics(self));
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("start_inclusive") = true,
+        py::arg("end_inclusive") = false,
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through all keys that exist between the given keys.\n"
+            "\n"
+            ":param start: The key to start at. Leave as None to start at the beginning.\n"
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param start_inclusive: Include the start key if it exists.\n"
+            ":param end_inclusive: Include the end key if it exists.\n"
+            ":param reverse: Iterate from the end of the range to the start.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit.\n"
+            ":return: An iterator of keys."));
+    LevelDB.def(
+        "iterate_values",
+        [create_db_iterator](
+            Amulet::LevelDB& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            bool start_inclusive,
+            bool end_inclusive,
+            bool reverse,
+            std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Values>(
+                create_db_iterator(self),
+                make_key_range(start, end, start_inclusive, end_inclusive, reverse),
+                limit,
+                get_metrics(self));
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::kw_only(),
+        py::arg("start_inclusive") = true,
+        py::arg("end_inclusive") = false,
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through the data of all keys that exist between the given keys.\n"
+            "\n"
+            ":param start: The key to start at. Leave as None to start at the beginning.\n"
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param start_inclusive: Include the start key if it exists.\n"
+            ":param end_inclusive: Include the end key if it exists.\n"
+            ":param reverse: Iterate from the end of the range to the start.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit.\n"
+            ":return: An iterator of values."));
+    LevelDB.def(
+        "iterate_prefix",
+        [create_db_iterator](Amulet::LevelDB& self, py::bytes prefix, bool reverse, std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Items>(
+                create_db_iterator(self),
+                KeyRange::from_prefix(prefix.cast<std::string>(), reverse),
+                limit,
+                get_metrics(self));
+        },
+        py::arg("prefix"),
+        py::kw_only(),
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through all keys and data where the key starts with the prefix.\n"
+            "\n"
+            ":param prefix: The prefix to match.\n"
+            ":param reverse: Iterate in descending key order.\n"
+            ":param limit: The maximum number of entries to yield. Leave as None for no limit."));
+    LevelDB.def(
+        "iterate_keys_prefix",
+        [create_db_iterator](Amulet::LevelDB& self, py::bytes prefix, bool reverse, std::optional<size_t> limit) {
+            return make_range_iterator<IterateMode::Keys>(
+                create_db_iterator(self),
+                KeyRange::from_prefix(prefix.cast<std::string>(), reverse),
+                limit,
+                get_metrics(self));
+        },
+        py::arg("prefix"),
+        py::kw_only(),
+        py::arg("reverse") = false,
+        py::arg("limit") = py::none(),
+        py::doc(
+            "Iterate through all keys that start with the prefix.\n"
+            "\n"
+            ":param prefix: The prefix to match.\n"
+            ":param reverse: Iterate in descending key order.\n"
+            ":param limit: The maximum number of keys to yield. Leave as None for no limit."));
 
     LevelDB.def(
-        "__iter__",
+        "iterate_batches",
+        [create_db_iterator](
+            Amulet::LevelDB& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            size_t batch_size,
+            std::optional<size_t> max_bytes) {
+            return make_batch_iterator<IterateMode::Items>(
+                create_db_iterator(self),
+                make_key_range(start, end, true, false, false),
+                batch_size,
+                max_bytes,
+                get_metrics(self));
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::arg("batch_size") = 1000,
+        py::arg("max_bytes") = py::none(),
+        py::doc(
+            "Iterate through all keys and data that exist between the given keys in batches.\n"
+            "\n"
+            "Each batch is read without holding the GIL.\n"
+            "\n"
+            ":param start: The key to start at. Leave as None to start at the beginning.\n"
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param batch_size: The maximum number of items in each batch.\n"
+            ":param max_bytes: The maximum combined size of the keys and values in each batch. "
+            "A batch always contains at least one item. Leave as None for no limit.\n"
+            ":return: An iterator of lists of key, value tuples."));
+
+    LevelDB.def(
+        "iterate_key_batches",
+        [create_db_iterator](
+            Amulet::LevelDB& self,
+            std::optional<py::bytes> start,
+            std::optional<py::bytes> end,
+            size_t batch_size,
+            std::optional<size_t> max_bytes) {
+            return make_batch_iterator<IterateMode::Keys>(
+                create_db_iterator(self),
+                make_key_range(start, end, true, false, false),
+                batch_size,
+                max_bytes,
+                get_metrics(self));
+        },
+        py::arg("start") = py::none(),
+        py::arg("end") = py::none(),
+        py::arg("batch_size") = 1000,
+        py::arg("max_bytes") = py::none(),
+        py::doc(
+            "Iterate through all keys that exist between the given keys in batches.\n"
+            "\n"
+            "Each batch is read without holding the GIL.\n"
+            "\n"
+            ":param start: The key to start at. Leave as None to start at the beginning.\n"
+            ":param end: The key to end at. Leave as None to finish at the end.\n"
+            ":param batch_size: The maximum number of keys in each batch.\n"
+            ":param max_bytes: The maximum combined size of the keys in each batch. "
+            "A batch always contains at least one key. Leave as None for no limit.\n"
+            ":return: An iterator of lists of keys."));
+
+    LevelDB.def(
+        "snapshot",
         [](Amulet::LevelDB& self) {
-            return pyext::make_iterator(
-                LevelDBKeysIterator(get_start_iterator(self)));
+            if (!self) {
+                throw std::runtime_error("The LevelDB database has been closed.");
+            }
+            return self.create_snapshot();
+        },
+        py::doc(
+            "Create a snapshot of the current state of the database.\n"
+            "\n"
+            "Reads from the snapshot are not affected by later writes.\n"
+            "The snapshot is released when it is used as a context manager and the block exits, "
+            "when :meth:`Snapshot.release` is called or when the database is closed."),
+        py::call_guard<py::gil_scoped_release>());
+
+    LevelDB.def(
+        "__iter__",
+        [create_db_iterator](Amulet::LevelDB& self) {
+            return make_range_iterator<IterateMode::Keys>(create_db_iterator(self), KeyRange(), std::nullopt, get_metrics(self));
         });
     LevelDB.def(
         "keys",
-        [](Amulet::LevelDB& self) {
-            return pyext::make_iterator(
-                LevelDBKeysIterator(get_start_iterator(self)));
+        [create_db_iterator](Amulet::LevelDB& self) {
+            return make_range_iterator<IterateMode::Keys>(create_db_iterator(self), KeyRange(), std::nullopt, get_metrics(self));
         },
         py::doc("An iterable of all keys in the database."));
 
     LevelDB.def(
         "values",
-        [](Amulet::LevelDB& self) {
-            return pyext::make_iterator(
-                LevelDBValuesIterator(get_start_iterator(self)));
+        [create_db_iterator](Amulet::LevelDB& self) {
+            return make_range_iterator<IterateMode::Values>(create_db_iterator(self), KeyRange(), std::nullopt, get_metrics(self));
         },
         py::doc("An iterable of all values in the database."));
 
     LevelDB.def(
         "items",
-        [](Amulet::LevelDB& self) {
-            return pyext::make_iterator(
-                LevelDBItemsIterator(get_start_iterator(self)));
+        [create_db_iterator](Amulet::LevelDB& self) {
+            return make_range_iterator<IterateMode::Items>(create_db_iterator(self), KeyRange(), std::nullopt, get_metrics(self));
         },
         py::doc("An iterable of all items in the database."));
 }
@@ -0,0 +1,208 @@
+#pragma once
+
+#include <algorithm>
+#include <array>
+#include <atomic>
+#include <bit>
+#include <chrono>
+#include <cstdint>
+#include <limits>
+
+namespace Amulet {
+
+// A histogram of durations in nanoseconds that can be recorded from many threads without locking.
+// Durations are grouped into buckets with a relative width of 1/16 like an HDR histogram
+// so the percentiles are accurate to about 6% at any scale.
+class LatencyHistogram {
+private:
+    static constexpr size_t sub_bucket_bits = 4;
+    static constexpr size_t sub_bucket_count = size_t(1) << sub_bucket_bits;
+    static constexpr size_t bucket_count = (64 - sub_bucket_bits + 1) * sub_bucket_count;
+
+    std::array<std::atomic<uint64_t>, bucket_count> counts {};
+    std::atomic<uint64_t> total = 0;
+    std::atomic<uint64_t> min = std::numeric_limits<uint64_t>::max();
+    std::atomic<uint64_t> max = 0;
+
+    static size_t get_index(uint64_t value)
+    {
+        if (value < sub_bucket_count) {
+            return value;
+        }
+        size_t shift = std::bit_width(value) - 1 - sub_bucket_bits;
+        return (shift + 1) * sub_bucket_count + ((value >> shift) & (sub_bucket_count - 1));
+    }
+
+    // Get the smallest value in a bucket.
+    static uint64_t get_lower_bound(size_t index)
+    {
+        if (index < sub_bucket_count) {
+            return index;
+        }
+        size_t shift = index / sub_bucket_count - 1;
+        return (sub_bucket_count + index % sub_bucket_count) << shift;
+    }
+
+    // Get the number of values in a bucket.
+    static uint64_t get_width(size_t index)
+    {
+        if (index < sub_bucket_count) {
+            return 1;
+        }
+        return uint64_t(1) << (index / sub_bucket_count - 1);
+    }
+
+public:
+    // A copy of the state of a histogram.
+    struct Summary {
+        uint64_t count = 0;
+        uint64_t total = 0;
+        uint64_t min = 0;
+        uint64_t max = 0;
+        std::array<uint64_t, bucket_count> counts {};
+
+        // Get the approximate value below which the given fraction of the values fall.
+        uint64_t get_percentile(double fraction) const
+        {
+            if (count == 0) {
+                return 0;
+            }
+            uint64_t target = std::max<uint64_t>(1, static_cast<uint64_t>(fraction * static_cast<double>(count) + 0.5));
+            uint64_t seen = 0;
+            for (size_t i = 0; i < bucket_count; i++) {
+                seen += counts[i];
+                if (target <= seen) {
+                    // Use the middle of the bucket, limited to the recorded range.
+                    uint64_t value = get_lower_bound(i) + get_width(i) / 2;
+                    return std::clamp(value, min, max);
+                }
+            }
+            return max;
+        }
+    };
+
+    void record(uint64_t value)
+    {
+        counts[get_index(value)].fetch_add(1, std::memory_order_relaxed);
+        total.fetch_add(value, std::memory_order_relaxed);
+        uint64_t current = min.load(std::memory_order_relaxed);
+        while (value < current && !min.compare_exchange_weak(current, value, std::memory_order_relaxed)) { }
+        current = max.load(std::memory_order_relaxed);
+        while (current < value && !max.compare_exchange_weak(current, value, std::memory_order_relaxed)) { }
+    }
+
+    // Copy the state of the histogram.
+    // Values recorded during the copy may be partially included.
+    Summary get_summary() const
+    {
+        Summary summary;
+        for (size_t i = 0; i < bucket_count; i++) {
+            summary.counts[i] = counts[i].load(std::memory_order_relaxed);
+            summary.count += summary.counts[i];
+        }
+        summary.total = total.load(std::memory_order_relaxed);
+        if (summary.count) {
+            summary.min = min.load(std::memory_order_relaxed);
+            summary.max = max.load(std::memory_order_relaxed);
+        }
+        return summary;
+    }
+
+    void reset()
+    {
+        for (auto& bucket : counts) {
+            bucket.store(0, std::memory_order_relaxed);
+        }
+        total.store(0, std::memory_order_relaxed);
+        min.store(std::numeric_limits<uint64_t>::max(), std::memory_order_relaxed);
+        max.store(0, std::memory_order_relaxed);
+    }
+};
+
+// The operations that are measured.
+enum class MetricsOperation {
+    Open,
+    Repair,
+    Get,
+    GetMany,
+    Put,
+    Delete,
+    Write,
+    Seek,
+    Next,
+    NextBatch,
+    Compact,
+};
+
+static constexpr size_t metrics_operation_count = static_cast<size_t>(MetricsOperation::Compact) + 1;
+
+// The name of each operation in the same order as MetricsOperation.
+static constexpr std::array<const char*, metrics_operation_count> metrics_operation_names {
+    "open",
+    "repair",
+    "get",
+    "get_many",
+    "put",
+    "delete",
+    "write",
+    "seek",
+    "next",
+    "next_batch",
+    "compact",
+};
+
+// A latency histogram for each operation on a database.
+class Metrics {
+private:
+    std::array<LatencyHistogram, metrics_operation_count> histograms;
+
+public:
+    void record(MetricsOperation operation, std::chrono::steady_clock::duration duration)
+    {
+        histograms[static_cast<size_t>(operation)].record(
+            std::chrono::duration_cast<std::chrono::nanoseconds>(duration).count());
+    }
+
+    const LatencyHistogram& get_histogram(MetricsOperation operation) const
+    {
+        return histograms[static_cast<size_t>(operation)];
+    }
+
+    void reset()
+    {
+        for (auto& histogram : histograms) {
+            histogram.reset();
+        }
+    }
+};
+
+// Record the time from construction to destruction.
+// Does nothing if metrics is nullptr so that disabled metrics cost one branch.
+class MetricsTimer {
+private:
+    Metrics* metrics;
+    MetricsOperation operation;
+    std::chrono::steady_clock::time_point start;
+
+public:
+    MetricsTimer(Metrics* metrics, MetricsOperation operation)
+        : metrics(metrics)
+        , operation(operation)
+    {
+        if (metrics) {
+            start = std::chrono::steady_clock::now();
+        }
+    }
+
+    MetricsTimer(const MetricsTimer&) = delete;
+    MetricsTimer& operator=(const MetricsTimer&) = delete;
+
+    ~MetricsTimer()
+    {
+        if (metrics) {
+            metrics->record(operation, std::chrono::steady_clock::now() - start);
+        }
+    }
+};
+
+} // namespace Amulet
@@ -0,0 +1,311 @@
+#pragma once
+
+#include <algorithm>
+#include <cstring>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <optional>
+#include <set>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include <leveldb/env.h>
+#include <leveldb/slice.h>
+#include <leveldb/status.h>
+
+namespace Amulet {
+
+// An Env that never modifies the files on disk.
+// Files created by the database are stored in memory and shadow the files on disk.
+// Removing and renaming files only changes the in memory view.
+// The lock file is not locked so other processes can open the database at the same time.
+// A writer is not stopped from deleting table files that the read only database still references.
+// New files can only be created by the thread that is opening the database.
+// This allows the log to be recovered while opening but stops background compactions from
+// writing tables to memory after the database has been opened.
+class ReadOnlyEnv : public leveldb::EnvWrapper {
+private:
+    struct MemoryFile {
+        std::mutex mutex;
+        std::string data;
+    };
+
+    class MemorySequentialFile : public leveldb::SequentialFile {
+    private:
+        std::shared_ptr<MemoryFile> file;
+        size_t position = 0;
+
+    public:
+        MemorySequentialFile(std::shared_ptr<MemoryFile> file)
+            : file(std::move(file))
+        {
+        }
+
+        leveldb::Status Read(size_t n, leveldb::Slice* result, char* scratch) override
+        {
+            std::lock_guard lock(file->mutex);
+            n = std::min(n, file->data.size() - std::min(position, file->data.size()));
+            std::memcpy(scratch, file->data.data() + position, n);
+            position += n;
+            *result = leveldb::Slice(scratch, n);
+            return leveldb::Status::OK();
+        }
+
+        leveldb::Status Skip(uint64_t n) override
+        {
+            position += n;
+            return leveldb::Status::OK();
+        }
+    };
+
+    class MemoryRandomAccessFile : public leveldb::RandomAccessFile {
+    private:
+        std::shared_ptr<MemoryFile> file;
+
+    public:
+        MemoryRandomAccessFile(std::shared_ptr<MemoryFile> file)
+            : file(std::move(file))
+        {
+        }
+
+        leveldb::Status Read(uint64_t offset, size_t n, leveldb::Slice* result, char* scratch) const override
+        {
+            std::lock_guard lock(file->mutex);
+            if (file->data.size() < offset) {
+                return leveldb::Status::IOError("Read past the end of the file.");
+            }
+            n = std::min<uint64_t>(n, file->data.size() - offset);
+            std::memcpy(scratch, file->data.data() + offset, n);
+            *result = leveldb::Slice(scratch, n);
+            return leveldb::Status::OK();
+        }
+    };
+
+    class MemoryWritableFile : public leveldb::WritableFile {
+    private:
+        std::shared_ptr<MemoryFile> file;
+
+    public:
+        MemoryWritableFile(std::shared_ptr<MemoryFile> file)
+            : file(std::move(file))
+        {
+        }
+
+        leveldb::Status Append(const leveldb::Slice& data) override
+        {
+            std::lock_guard lock(file->mutex);
+            file->data.append(data.data(), data.size());
+            return leveldb::Status::OK();
+        }
+
+        leveldb::Status Close() override { return leveldb::Status::OK(); }
+        leveldb::Status Flush() override { return leveldb::Status::OK(); }
+        leveldb::Status Sync() override { return leveldb::Status::OK(); }
+    };
+
+    class NullFileLock : public leveldb::FileLock { };
+
+    // Guards all other state.
+    std::mutex mutex;
+    // The files that have been created in memory.
+    std::map<std::string, std::shared_ptr<MemoryFile>> files;
+    // The files on disk that have been removed from the view.
+    std::set<std::string> removed;
+    // The thread that may create files.
+    std::optional<std::thread::id> writer;
+
+    // Get the file in memory or nullptr if it is not in memory.
+    // The mutex must be locked.
+    std::shared_ptr<MemoryFile> find(const std::string& fname)
+    {
+        auto it = files.find(fname);
+        return it == files.end() ? nullptr : it->second;
+    }
+
+    static leveldb::Status not_found(const std::string& fname)
+    {
+        return leveldb::Status::NotFound(fname, "The file has been removed.");
+    }
+
+    static leveldb::Status read_only(const std::string& fname)
+    {
+        return leveldb::Status::IOError(fname, "The database is read only.");
+    }
+
+public:
+    ReadOnlyEnv(leveldb::Env* target)
+        : leveldb::EnvWrapper(target)
+    {
+    }
+
+    // Allow the calling thread to create files until end_open is called.
+    void begin_open()
+    {
+        std::lock_guard lock(mutex);
+        writer = std::this_thread::get_id();
+    }
+
+    // Stop all threads from creating files.
+    void end_open()
+    {
+        std::lock_guard lock(mutex);
+        writer.reset();
+    }
+
+    leveldb::Status NewSequentialFile(const std::string& fname, leveldb::SequentialFile** result) override
+    {
+        {
+            std::lock_guard lock(mutex);
+            if (auto file = find(fname)) {
+                *result = new MemorySequentialFile(std::move(file));
+                return leveldb::Status::OK();
+            }
+            if (removed.contains(fname)) {
+                *result = nullptr;
+                return not_found(fname);
+            }
+        }
+        return target()->NewSequentialFile(fname, result);
+    }
+
+    leveldb::Status NewRandomAccessFile(const std::string& fname, leveldb::RandomAccessFile** result) override
+    {
+        {
+            std::lock_guard lock(mutex);
+            if (auto file = find(fname)) {
+                *result = new MemoryRandomAccessFile(std::move(file));
+                return leveldb::Status::OK();
+            }
+            if (removed.contains(fname)) {
+                *result = nullptr;
+                return not_found(fname);
+            }
+        }
+        return target()->NewRandomAccessFile(fname, result);
+    }
+
+    leveldb::Status NewWritableFile(const std::string& fname, leveldb::WritableFile** result) override
+    {
+        std::lock_guard lock(mutex);
+        if (writer != std::this_thread::get_id()) {
+            *result = nullptr;
+            return read_only(fname);
+        }
+        auto file = std::make_shared<MemoryFile>();
+        files[fname] = file;
+        removed.erase(fname);
+        *result = new MemoryWritableFile(std::move(file));
+        return leveldb::Status::OK();
+    }
+
+    leveldb::Status NewAppendableFile(const std::string& fname, leveldb::WritableFile** result) override
+    {
+        *result = nullptr;
+        return read_only(fname);
+    }
+
+    bool FileExists(const std::string& fname) override
+    {
+        {
+            std::lock_guard lock(mutex);
+            if (files.contains(fname)) {
+                return true;
+            }
+            if (removed.contains(fname)) {
+                return false;
+            }
+        }
+        return target()->FileExists(fname);
+    }
+
+    leveldb::Status GetChildren(const std::string& dir, std::vector<std::string>* result) override
+    {
+        auto status = target()->GetChildren(dir, result);
+        if (!status.ok()) {
+            return status;
+        }
+        std::string prefix = dir + "/";
+        std::lock_guard lock(mutex);
+        std::erase_if(*result, [&](const std::string& name) {
+            return removed.contains(prefix + name) || files.contains(prefix + name);
+        });
+        for (const auto& [fname, _] : files) {
+            if (fname.starts_with(prefix) && fname.find('/', prefix.size()) == std::string::npos) {
+                result->push_back(fname.substr(prefix.size()));
+            }
+        }
+        return leveldb::Status::OK();
+    }
+
+    leveldb::Status RemoveFile(const std::string& fname) override
+    {
+        std::lock_guard lock(mutex);
+        files.erase(fname);
+        removed.insert(fname);
+        return leveldb::Status::OK();
+    }
+
+    leveldb::Status CreateDir(const std::string& dirname) override
+    {
+        return leveldb::Status::OK();
+    }
+
+    leveldb::Status RemoveDir(const std::string& dirname) override
+    {
+        return read_only(dirname);
+    }
+
+    leveldb::Status GetFileSize(const std::string& fname, uint64_t* file_size) override
+    {
+        {
+            std::lock_guard lock(mutex);
+            if (auto file = find(fname)) {
+                std::lock_guard file_lock(file->mutex);
+                *file_size = file->data.size();
+                return leveldb::Status::OK();
+            }
+            if (removed.contains(fname)) {
+                *file_size = 0;
+                return not_found(fname);
+            }
+        }
+        return target()->GetFileSize(fname, file_size);
+    }
+
+    leveldb::Status RenameFile(const std::string& src, const std::string& target_name) override
+    {
+        std::lock_guard lock(mutex);
+        auto file = find(src);
+        if (!file) {
+            // Files on disk can not be moved.
+            return read_only(src);
+        }
+        files.erase(src);
+        removed.insert(src);
+        files[target_name] = std::move(file);
+        removed.erase(target_name);
+        return leveldb::Status::OK();
+    }
+
+    leveldb::Status LockFile(const std::string& fname, leveldb::FileLock** lock) override
+    {
+        *lock = new NullFileLock();
+        return leveldb::Status::OK();
+    }
+
+    leveldb::Status UnlockFile(leveldb::FileLock* lock) override
+    {
+        delete lock;
+        return leveldb::Status::OK();
+    }
+
+    leveldb::Status NewLogger(const std::string& fname, leveldb::Logger** result) override
+    {
+        *result = nullptr;
+        return read_only(fname);
+    }
+};
+
+} // namespace Amulet
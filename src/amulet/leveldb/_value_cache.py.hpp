@@ -0,0 +1,229 @@
+#pragma once
+
+#include <array>
+#include <atomic>
+#include <cstdint>
+#include <functional>
+#include <list>
+#include <mutex>
+#include <optional>
+#include <string>
+#include <string_view>
+#include <unordered_map>
+#include <utility>
+
+#include <leveldb/slice.h>
+
+namespace Amulet {
+
+// A least recently used cache of decoded values in front of a database.
+// The block cache stores blocks so a hit there still has to search the block and copy the value.
+// This stores the values of individual keys so a hit skips the database entirely.
+//
+// Writes must call erase for each key they modify after the write is applied.
+// A read that misses must call get_generation before reading from the database
+// and pass the result to insert so that a value read before a concurrent write is not cached.
+class ValueCache {
+private:
+    // The approximate memory used by each entry in addition to the key and value.
+    static constexpr size_t entry_overhead = 64;
+
+    struct Entry {
+        std::string key;
+        std::string value;
+    };
+
+    class Shard {
+    private:
+        mutable std::mutex mutex;
+        size_t capacity = 0;
+        size_t usage = 0;
+        // The entries. The front is the most recently used.
+        std::list<Entry> lru;
+        std::unordered_map<std::string_view, std::list<Entry>::iterator> table;
+
+        static size_t get_charge(const Entry& entry)
+        {
+            return entry.key.size() + entry.value.size() + entry_overhead;
+        }
+
+        void remove(std::list<Entry>::iterator it)
+        {
+            usage -= get_charge(*it);
+            table.erase(it->key);
+            lru.erase(it);
+        }
+
+        void evict()
+        {
+            while (capacity < usage && !lru.empty()) {
+                remove(std::prev(lru.end()));
+            }
+        }
+
+    public:
+        std::optional<std::string> lookup(const leveldb::Slice& key)
+        {
+            std::lock_guard lock(mutex);
+            auto it = table.find(std::string_view(key.data(), key.size()));
+            if (it == table.end()) {
+                return std::nullopt;
+            }
+            lru.splice(lru.begin(), lru, it->second);
+            return it->second->value;
+        }
+
+        // Insert a value if the generation has not changed.
+        void insert(
+            const leveldb::Slice& key,
+            const leveldb::Slice& value,
+            uint64_t generation,
+            const std::atomic<uint64_t>& current_generation)
+        {
+            size_t charge = key.size() + value.size() + entry_overhead;
+            std::lock_guard lock(mutex);
+            if (capacity < charge || generation != current_generation) {
+                return;
+            }
+            auto it = table.find(std::string_view(key.data(), key.size()));
+            if (it != table.end()) {
+                remove(it->second);
+            }
+            lru.push_front(Entry { key.ToString(), value.ToString() });
+            table.emplace(lru.front().key, lru.begin());
+            usage += charge;
+            evict();
+        }
+
+        void erase(const leveldb::Slice& key)
+        {
+            std::lock_guard lock(mutex);
+            auto it = table.find(std::string_view(key.data(), key.size()));
+            if (it != table.end()) {
+                remove(it->second);
+            }
+        }
+
+        void clear()
+        {
+            std::lock_guard lock(mutex);
+            table.clear();
+            lru.clear();
+            usage = 0;
+        }
+
+        void set_capacity(size_t new_capacity)
+        {
+            std::lock_guard lock(mutex);
+            capacity = new_capacity;
+            evict();
+        }
+
+        size_t get_usage() const
+        {
+            std::lock_guard lock(mutex);
+            return usage;
+        }
+    };
+
+    static constexpr size_t shard_count = 16;
+
+    std::array<Shard, shard_count> shards;
+    size_t capacity;
+    // Incremented before each invalidation.
+    std::atomic<uint64_t> generation = 0;
+    std::atomic<uint64_t> hits = 0;
+    std::atomic<uint64_t> misses = 0;
+
+    Shard& get_shard(const leveldb::Slice& key)
+    {
+        return shards[std::hash<std::string_view> {}(std::string_view(key.data(), key.size())) % shard_count];
+    }
+
+public:
+    ValueCache(size_t capacity)
+        : capacity(capacity)
+    {
+        // Round up so that the shards can hold the full capacity.
+        size_t shard_capacity = (capacity + (shard_count - 1)) / shard_count;
+        for (auto& shard : shards) {
+            shard.set_capacity(shard_capacity);
+        }
+    }
+
+    ValueCache(const ValueCache&) = delete;
+    ValueCache& operator=(const ValueCache&) = delete;
+
+    // Get the cached value of a key and count the hit or miss.
+    std::optional<std::string> lookup(const leveldb::Slice& key)
+    {
+        auto value = get_shard(key).lookup(key);
+        if (value) {
+            hits++;
+        } else {
+            misses++;
+        }
+        return value;
+    }
+
+    // Get the generation to pass to insert.
+    // This must be called before the value is read from the database.
+    uint64_t get_generation() const
+    {
+        return generation;
+    }
+
+    // Cache a value that was read from the database.
+    // The value is not cached if a key has been invalidated since the generation was read.
+    // Values larger than a shard are not cached.
+    void insert(const leveldb::Slice& key, const leveldb::Slice& value, uint64_t read_generation)
+    {
+        get_shard(key).insert(key, value, read_generation, generation);
+    }
+
+    // Remove a key that has been modified.
+    void erase(const leveldb::Slice& key)
+    {
+        generation++;
+        get_shard(key).erase(key);
+    }
+
+    // Remove all keys.
+    void clear()
+    {
+        generation++;
+        for (auto& shard : shards) {
+            shard.clear();
+        }
+    }
+
+    // Get the maximum combined size of the entries in bytes.
+    size_t get_capacity() const
+    {
+        return capacity;
+    }
+
+    // Get the approximate combined size of the entries in bytes.
+    size_t get_usage() const
+    {
+        size_t total = 0;
+        for (auto& shard : shards) {
+            total += shard.get_usage();
+        }
+        return total;
+    }
+
+    // The number of lookups that found a value.
+    uint64_t get_hits() const
+    {
+        return hits;
+    }
+
+    // The number of lookups that did not find a value.
+    uint64_t get_misses() const
+    {
+        return misses;
+    }
+};
+
+} // namespace Amulet
@@ -0,0 +1,235 @@
+"""An asyncio interface to :class:`LevelDB`.
+
+Each operation runs on a thread pool owned by the database so that it does not block the event loop.
+The native methods release the GIL while they access the database so the event loop keeps running
+while they wait for disk reads and writes.
+Each awaited call is one round trip to the pool so prefer the batch methods to many single key calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import AsyncIterator, Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, ParamSpec, Self, TypeVar
+
+from amulet.leveldb import Compaction, LevelDB, WriteBatch
+
+__all__ = ["AsyncLevelDB"]
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class AsyncLevelDB:
+    """
+    An asyncio wrapper around a :class:`LevelDB` database.
+
+    >>> async with await AsyncLevelDB.open(path) as db:
+    >>>     value = await db.get(b"key")
+    >>>     async for batch in db.iterate_batches():
+    >>>         ...
+    """
+
+    def __init__(self, db: LevelDB, *, max_workers: int = 4) -> None:
+        """
+        Wrap an open database.
+
+        :param db: The database to wrap. This object closes it when it is closed.
+        :param max_workers: The number of threads that access the database.
+        """
+        self._db = db
+        self._executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="AsyncLevelDB"
+        )
+
+    @classmethod
+    async def open(
+        cls,
+        path: str,
+        create_if_missing: bool = False,
+        *,
+        max_workers: int = 4,
+        **kwargs: Any,
+    ) -> Self:
+        """
+        Open a database without blocking the event loop.
+
+        :param path: The path to the database directory.
+        :param create_if_missing: If True a new database will be created if one does not exist.
+        :param max_workers: The number of threads that access the database.
+        :param kwargs: Other arguments to pass to :class:`LevelDB`.
+        """
+        db = await asyncio.to_thread(LevelDB, path, create_if_missing, **kwargs)
+        return cls(db, max_workers=max_workers)
+
+    @property
+    def db(self) -> LevelDB:
+        """The wrapped database."""
+        return self._db
+
+    def _run(
+        self, func: Callable[P, T], /, *args: P.args, **kwargs: P.kwargs
+    ) -> asyncio.Future[T]:
+        return asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def get(self, key: bytes) -> bytes:
+        """
+        Get a key from the database.
+
+        :param key: The key to get from the database.
+        :return: The data stored behind the given key.
+        :raises: KeyError if the requested key is not present.
+        :raises: LevelDBException on other error.
+        """
+        return await self._run(self._db.get, key)
+
+    async def get_many(self, keys: Sequence[bytes], default: Any = None) -> list[Any]:
+        """
+        Get the values for many keys from the same snapshot of the database.
+
+        :param keys: The keys to get from the database.
+        :param default: The value to use for keys that are not present.
+        :return: A list of the values in the same order as the keys.
+        """
+        return await self._run(self._db.get_many, keys, default)
+
+    async def put(self, key: bytes, value: bytes, sync: bool | None = None) -> None:
+        """
+        Set a value in the database.
+
+        :param key: The key to set.
+        :param value: The value to set.
+        :param sync: If True the write is flushed to disk before returning. None to use the database default.
+        """
+        await self._run(self._db.put, key, value, sync)
+
+    async def put_batch(
+        self, batch: Mapping[bytes, bytes | None], sync: bool | None = None
+    ) -> None:
+        """
+        Set a group of values in the database.
+
+        :param batch: A mapping of keys to values. A value of None deletes the key.
+        :param sync: If True the write is flushed to disk before returning. None to use the database default.
+        """
+        await self._run(self._db.put_batch, batch, sync)
+
+    async def write(self, batch: WriteBatch, sync: bool | None = None) -> None:
+        """
+        Apply the operations in a batch to the database atomically.
+
+        :param batch: The batch to write. It is not cleared.
+        :param sync: If True the write is flushed to disk before returning. None to use the database default.
+        """
+        await self._run(self._db.write, batch, sync)
+
+    async def delete(self, key: bytes, sync: bool | None = None) -> None:
+        """
+        Delete a key from the database.
+
+        :param key: The key to delete.
+        :param sync: If True the write is flushed to disk before returning. None to use the database default.
+        """
+        await self._run(self._db.delete, key, sync)
+
+    async def compact(self) -> None:
+        """Remove deleted entries from the database to reduce its size."""
+        await self._run(self._db.compact)
+
+    async def compact_range(
+        self, start: bytes | None = None, end: bytes | None = None
+    ) -> None:
+        """
+        Compact the keys in [start, end).
+
+        :param start: The first key in the range. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        """
+        await self._run(self._db.compact_range, start, end)
+
+    def compact_async(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        *,
+        partition_size: int = 64 * 1024 * 1024,
+    ) -> Compaction:
+        """
+        Start compacting the keys in [start, end) on a background thread.
+
+        This does not block so it is not a coroutine.
+        Await :meth:`wait_compaction` to wait for it to finish.
+        """
+        return self._db.compact_async(start, end, partition_size=partition_size)
+
+    async def wait_compaction(self, compaction: Compaction) -> None:
+        """
+        Wait for a compaction to stop.
+
+        :raises: LevelDBException if the compaction failed.
+        """
+        await asyncio.to_thread(compaction.wait)
+
+    async def iterate_batches(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        batch_size: int = 1000,
+        max_bytes: int | None = None,
+    ) -> AsyncIterator[list[tuple[bytes, bytes]]]:
+        """
+        Iterate through the keys and values in [start, end) in batches.
+
+        Each batch is read on the thread pool.
+
+        :param start: The first key in the range. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        :param batch_size: The maximum number of items in each batch.
+        :param max_bytes: The maximum combined size of the keys and values in each batch.
+        """
+        iterator = await self._run(
+            self._db.iterate_batches, start, end, batch_size, max_bytes
+        )
+        while (batch := await self._run(next, iterator, None)) is not None:
+            yield batch
+
+    async def iterate_key_batches(
+        self,
+        start: bytes | None = None,
+        end: bytes | None = None,
+        batch_size: int = 1000,
+        max_bytes: int | None = None,
+    ) -> AsyncIterator[list[bytes]]:
+        """
+        Iterate through the keys in [start, end) in batches.
+
+        Each batch is read on the thread pool.
+
+        :param start: The first key in the range. None for the start of the database.
+        :param end: The end of the range. None for the end of the database.
+        :param batch_size: The maximum number of keys in each batch.
+        :param max_bytes: The maximum combined size of the keys in each batch.
+        """
+        iterator = await self._run(
+            self._db.iterate_key_batches, start, end, batch_size, max_bytes
+        )
+        while (batch := await self._run(next, iterator, None)) is not None:
+            yield batch
+
+    def _close(self) -> None:
+        self._executor.shutdown()
+        self._db.close()
+
+    async def close(self) -> None:
+        """Wait for the running operations to finish and close the database."""
+        await asyncio.to_thread(self._close)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        await self.close()
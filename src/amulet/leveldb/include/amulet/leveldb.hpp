@@ -1,5 +1,8 @@
 #pragma once
 
+#include <atomic>
+#include <mutex>
+
 #include <leveldb/db.h>
 #include <leveldb/iterator.h>
 #include <leveldb/options.h>
@@ -11,10 +14,15 @@ class LevelDBImpl;
 class LEVELDB_EXPORT LevelDBIterator {
 private:
     leveldb::Iterator* _it;
+    std::mutex _mutex;
 
     friend class LevelDBImpl;
     void destroy();
 
+    // Destroy the iterator if it is not locked.
+    // Returns false if the mutex is held by another thread.
+    bool try_destroy();
+
     // Constructor
     LevelDBIterator(leveldb::Iterator*);
 
@@ -38,6 +46,64 @@ public:
     leveldb::Iterator* operator->();
     leveldb::Iterator& operator*();
     leveldb::Iterator& get_iterator();
+
+    // The mutex that guards the raw iterator.
+    // The iterator is not destroyed while this is locked,
+    // so lock it while using the iterator if the database may be closed by another thread.
+    // Do not acquire any lock that the database acquires while holding this.
+    // The GIL may be acquired while holding this so a thread that holds the GIL must not block on it.
+    // Try to lock it and release the GIL before blocking if that fails.
+    std::mutex& get_mutex();
+};
+
+class LEVELDB_EXPORT LevelDBSnapshot {
+private:
+    std::atomic<LevelDBImpl*> _impl;
+    leveldb::ReadOptions _read_options;
+    // Held while the snapshot is released so that the database is not freed during the release.
+    std::mutex _mutex;
+
+    friend class LevelDBImpl;
+
+    // Release the snapshot and remove it from the database.
+    // The mutex and the database's iterators_mutex must be locked.
+    void destroy();
+
+    // Destroy the snapshot if it is not locked.
+    // Returns false if the mutex is held by another thread.
+    bool try_destroy();
+
+    // Constructor
+    LevelDBSnapshot(LevelDBImpl*, const leveldb::ReadOptions&);
+
+public:
+    // Copy
+    LevelDBSnapshot(const LevelDBSnapshot&) = delete;
+    LevelDBSnapshot& operator=(const LevelDBSnapshot&) = delete;
+
+    // Move
+    LevelDBSnapshot(LevelDBSnapshot&&) = delete;
+    LevelDBSnapshot& operator=(LevelDBSnapshot&&) = delete;
+
+    // Destructor
+    ~LevelDBSnapshot();
+
+    // Release the snapshot.
+    // This is called automatically when the snapshot is destroyed or the database is closed.
+    void release();
+
+    // Check if the snapshot is still alive.
+    // If false other calls will error.
+    operator bool();
+
+    // Get the raw leveldb object.
+    leveldb::DB& get_database();
+
+    // Get the read options that read from this snapshot.
+    const leveldb::ReadOptions& get_read_options();
+
+    // Create an iterator over this snapshot that is automatically destroyed when the database is closed.
+    std::unique_ptr<LevelDBIterator> create_iterator();
 };
 
 class LEVELDB_EXPORT LevelDBOptions {
@@ -47,6 +113,10 @@ public:
     leveldb::WriteOptions write_options;
 
     virtual ~LevelDBOptions() = default;
+
+    // Called when the database is closed, before iterators and snapshots are destroyed.
+    // Subclasses can override this to stop background work that uses the database.
+    virtual void close() { }
 };
 
 class LEVELDB_EXPORT LevelDB {
@@ -87,11 +157,21 @@ public:
     // You may use raw iterators but you must ensure the database outlives the iterator.
     std::unique_ptr<LevelDBIterator> create_iterator();
 
+    // Create an iterator using custom read options.
+    // It is automatically destroyed when the database is closed.
+    std::unique_ptr<LevelDBIterator> create_iterator(const leveldb::ReadOptions&);
+
+    // Create a snapshot that is automatically released when the database is closed.
+    std::unique_ptr<LevelDBSnapshot> create_snapshot();
+
     // Get the read options for the database.
     const leveldb::ReadOptions& get_read_options();
 
     // Get the write options for the database.
     const leveldb::WriteOptions& get_write_options();
+
+    // Get the options the database was opened with.
+    LevelDBOptions& get_options();
 };
 
 } // namespace Amulet
@@ -1,6 +1,7 @@
 #include <memory>
 #include <mutex>
 #include <set>
+#include <thread>
 
 #include <leveldb/db.h>
 #include <leveldb/iterator.h>
@@ -22,10 +23,22 @@ LevelDBIterator::~LevelDBIterator()
 
 void LevelDBIterator::destroy()
 {
+    std::lock_guard lock(_mutex);
     delete _it;
     _it = nullptr;
 }
 
+bool LevelDBIterator::try_destroy()
+{
+    std::unique_lock lock(_mutex, std::try_to_lock);
+    if (!lock) {
+        return false;
+    }
+    delete _it;
+    _it = nullptr;
+    return true;
+}
+
 LevelDBIterator::operator bool()
 {
     return _it != nullptr;
@@ -45,6 +58,11 @@ leveldb::Iterator& LevelDBIterator::get_iterator()
     return *_it;
 }
 
+std::mutex& LevelDBIterator::get_mutex()
+{
+    return _mutex;
+}
+
 class LevelDBImpl {
 private:
     static void remove_iterator(LevelDBImpl* self, LevelDBIterator* it);
@@ -61,13 +79,83 @@ public:
     // We need to destroy all iterators before closing the database.
     // During destruction of the iterator a callback will remove the pointer.
     std::set<LevelDBIterator*> iterators;
+
+    // The snapshots created by the leveldb object.
+    // These must be released before closing the database.
+    // A snapshot removes itself when it is released.
+    std::set<LevelDBSnapshot*> snapshots;
+
+    // Mutex for iterators and snapshots.
+    // A snapshot's mutex is locked before this so this must only try to lock a snapshot.
     std::recursive_mutex iterators_mutex;
 
     void close();
 
-    std::unique_ptr<LevelDBIterator> create_iterator();
+    std::unique_ptr<LevelDBIterator> create_iterator(const leveldb::ReadOptions&);
+
+    std::unique_ptr<LevelDBSnapshot> create_snapshot();
 };
 
+LevelDBSnapshot::LevelDBSnapshot(LevelDBImpl* impl, const leveldb::ReadOptions& read_options)
+    : _impl(impl)
+    , _read_options(read_options)
+{
+}
+
+LevelDBSnapshot::~LevelDBSnapshot()
+{
+    release();
+}
+
+void LevelDBSnapshot::destroy()
+{
+    LevelDBImpl* impl = _impl;
+    impl->snapshots.erase(this);
+    impl->db->ReleaseSnapshot(_read_options.snapshot);
+    _read_options.snapshot = nullptr;
+    _impl = nullptr;
+}
+
+bool LevelDBSnapshot::try_destroy()
+{
+    std::unique_lock lock(_mutex, std::try_to_lock);
+    if (!lock) {
+        return false;
+    }
+    destroy();
+    return true;
+}
+
+void LevelDBSnapshot::release()
+{
+    // The database can not be freed while this is locked because it waits for this snapshot to be destroyed.
+    std::lock_guard lock(_mutex);
+    if (LevelDBImpl* impl = _impl) {
+        std::lock_guard impl_lock(impl->iterators_mutex);
+        destroy();
+    }
+}
+
+LevelDBSnapshot::operator bool()
+{
+    return _impl != nullptr;
+}
+
+leveldb::DB& LevelDBSnapshot::get_database()
+{
+    return *_impl.load()->db;
+}
+
+const leveldb::ReadOptions& LevelDBSnapshot::get_read_options()
+{
+    return _read_options;
+}
+
+std::unique_ptr<LevelDBIterator> LevelDBSnapshot::create_iterator()
+{
+    return _impl.load()->create_iterator(_read_options);
+}
+
 void LevelDBImpl::remove_iterator(LevelDBImpl* self, LevelDBIterator* it)
 {
     std::lock_guard lock(self->iterators_mutex);
@@ -83,10 +171,26 @@ LevelDB::LevelDB(
 
 void LevelDBImpl::close()
 {
-    std::lock_guard lock(iterators_mutex);
+    options->close();
+    std::unique_lock lock(iterators_mutex);
     while (!iterators.empty()) {
         // Destroy automatically removes the item from iterators.
-        (*iterators.begin())->destroy();
+        if (!(*iterators.begin())->try_destroy()) {
+            // Another thread is using the iterator or destroying it.
+            // Destroying it needs this lock so release it and try again.
+            lock.unlock();
+            std::this_thread::yield();
+            lock.lock();
+        }
+    }
+    while (!snapshots.empty()) {
+        // Destroy removes the item from snapshots.
+        if (!(*snapshots.begin())->try_destroy()) {
+            // Another thread is releasing the snapshot and is waiting for this lock.
+            lock.unlock();
+            std::this_thread::yield();
+            lock.lock();
+        }
     }
     db.reset();
 }
@@ -95,6 +199,8 @@ void LevelDB::close()
 {
     if (_impl) {
         _impl->close();
+        // Free the options and the resources they own.
+        delete _impl;
         _impl = nullptr;
     }
 }
@@ -126,14 +232,14 @@ leveldb::DB& LevelDB::get_database() {
 
 // Create an iterator that is automatically destroyed when the database is closed.
 // You may use raw iterators but you must ensure the database outlives the iterator.
-std::unique_ptr<LevelDBIterator> LevelDBImpl::create_iterator()
+std::unique_ptr<LevelDBIterator> LevelDBImpl::create_iterator(const leveldb::ReadOptions& read_options)
 {
     std::lock_guard lock(iterators_mutex);
 
     // Create the iterator
     auto iterator = std::unique_ptr<LevelDBIterator>(
         new LevelDBIterator(
-            db->NewIterator(options->read_options)));
+            db->NewIterator(read_options)));
 
     // Get a raw pointer to the iterator
     LevelDBIterator* ptr = iterator.get();
@@ -158,7 +264,30 @@ std::unique_ptr<LevelDBIterator> LevelDBImpl::create_iterator()
 
 std::unique_ptr<LevelDBIterator> LevelDB::create_iterator()
 {
-    return _impl->create_iterator();
+    return _impl->create_iterator(_impl->options->read_options);
+}
+
+std::unique_ptr<LevelDBIterator> LevelDB::create_iterator(const leveldb::ReadOptions& read_options)
+{
+    return _impl->create_iterator(read_options);
+}
+
+std::unique_ptr<LevelDBSnapshot> LevelDBImpl::create_snapshot()
+{
+    std::lock_guard lock(iterators_mutex);
+
+    leveldb::ReadOptions read_options = options->read_options;
+    read_options.snapshot = db->GetSnapshot();
+
+    auto snapshot = std::unique_ptr<LevelDBSnapshot>(
+        new LevelDBSnapshot(this, read_options));
+    snapshots.insert(snapshot.get());
+    return snapshot;
+}
+
+std::unique_ptr<LevelDBSnapshot> LevelDB::create_snapshot()
+{
+    return _impl->create_snapshot();
 }
 
 const leveldb::ReadOptions& LevelDB::get_read_options()
@@ -171,4 +300,9 @@ const leveldb::WriteOptions& LevelDB::get_write_options()
     return _impl->options->write_options;
 }
 
+LevelDBOptions& LevelDB::get_options()
+{
+    return *_impl->options;
+}
+
 } // namespace Amulet
@@ -0,0 +1,62 @@
+import unittest
+import asyncio
+from tempfile import TemporaryDirectory
+
+from amulet.leveldb import LevelDB, WriteBatch
+from amulet.leveldb.aio import AsyncLevelDB
+
+data = {f"key{i:05}".encode(): f"val{i}".encode() for i in range(10_000)}
+
+
+class AsyncLevelDBTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_read_write(self) -> None:
+        with TemporaryDirectory() as path:
+            async with await AsyncLevelDB.open(path, True) as db:
+                self.assertIsInstance(db.db, LevelDB)
+                await db.put(b"a", b"1")
+                self.assertEqual(b"1", await db.get(b"a"))
+                with self.assertRaises(KeyError):
+                    await db.get(b"b")
+                await db.put_batch(data, sync=True)
+                self.assertEqual(
+                    [b"val0", None, b"val9999"],
+                    await db.get_many([b"key00000", b"b", b"key09999"]),
+                )
+                results = await asyncio.gather(
+                    *(db.get(key) for key in list(data)[:100])
+                )
+                self.assertEqual(list(data.values())[:100], results)
+
+                batch = WriteBatch()
+                batch.put(b"b", b"2")
+                batch.delete(b"a")
+                await db.write(batch)
+                await db.delete(b"b")
+                self.assertEqual([None, None], await db.get_many([b"a", b"b"]))
+                await db.compact()
+                await db.compact_range(b"key", b"key1")
+                await db.wait_compaction(db.compact_async())
+
+            with self.assertRaises(RuntimeError):
+                db.db.get(b"a")
+
+    async def test_iterate(self) -> None:
+        with TemporaryDirectory() as path:
+            async with await AsyncLevelDB.open(path, True, max_workers=1) as db:
+                await db.put_batch(data)
+                items = []
+                async for batch in db.iterate_batches(batch_size=1000):
+                    self.assertLessEqual(len(batch), 1000)
+                    items.extend(batch)
+                self.assertEqual(list(data.items()), items)
+
+                keys = []
+                async for key_batch in db.iterate_key_batches(
+                    b"key00100", b"key00200", batch_size=30
+                ):
+                    keys.extend(key_batch)
+                self.assertEqual(list(data)[100:200], keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
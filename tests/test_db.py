@@ -6,10 +6,20 @@ import glob
 import os
 import weakref
 import time
+from threading import Barrier
 from concurrent.futures import ThreadPoolExecutor
-from collections.abc import Iterable, Sequence
-
-from amulet.leveldb import LevelDB, LevelDBException
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+from amulet.leveldb import (
+    LevelDB,
+    LevelDBException,
+    CompressionType,
+    BlockCache,
+    WriteBatch,
+    BulkLoader,
+    Snapshot,
+)
 
 num_keys = [struct.pack("<Q", i) for i in range(10_000)]
 num_db = dict(zip(num_keys, num_keys))
@@ -33,6 +43,100 @@ class LevelDBTestCase(unittest.TestCase):
         with self.assertRaises(LevelDBException):
             LevelDB("path")
 
+    def test_config(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            self.assertEqual(
+                {
+                    "compression_type": CompressionType.ZlibRawCompression,
+                    "block_cache_size": 40 * 1024 * 1024,
+                    "write_buffer_size": 4 * 1024 * 1024,
+                    "block_size": 163840,
+                    "bloom_filter_bits": 10,
+                    "max_open_files": 1000,
+                    "block_cache": None,
+                    "sync": False,
+                    "read_only": False,
+                    "value_cache_size": 0,
+                    "metrics": False,
+                    "io_stats": False,
+                    "compaction_write_rate": 0,
+                },
+                db.get_config(),
+            )
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.get_config()
+
+            config: dict[str, Any] = {
+                "block_cache_size": 1024 * 1024,
+                "write_buffer_size": 64 * 1024,
+                "block_size": 4096,
+                "bloom_filter_bits": 0,
+                "max_open_files": 64,
+                "sync": True,
+                "value_cache_size": 1024 * 1024,
+                "metrics": True,
+                "io_stats": True,
+                "compaction_write_rate": 64 * 1024 * 1024,
+            }
+            db = LevelDB(path, compression_type=CompressionType.NoCompression, **config)
+            self.assertEqual(
+                {
+                    "compression_type": CompressionType.NoCompression,
+                    "block_cache": None,
+                    "read_only": False,
+                    **config,
+                },
+                db.get_config(),
+            )
+            db.put_batch(full_db)
+            self.assertEqual(full_db, dict(db.items()))
+            db.close()
+
+            with self.assertRaises(ValueError):
+                LevelDB(path, write_buffer_size=0)
+            with self.assertRaises(ValueError):
+                LevelDB(path, block_size=0)
+            with self.assertRaises(ValueError):
+                LevelDB(path, max_open_files=0)
+            with self.assertRaises(ValueError):
+                LevelDB(path, bloom_filter_bits=-1)
+
+    def test_block_cache(self) -> None:
+        cache = BlockCache(1024 * 1024)
+        self.assertEqual(1024 * 1024, cache.capacity)
+        self.assertEqual(0, cache.usage)
+        with TemporaryDirectory() as path1, TemporaryDirectory() as path2:
+            db1 = LevelDB(path1, True, block_cache=cache, block_size=4096)
+            db2 = LevelDB(path2, True, block_cache=cache, block_size=4096)
+            self.assertIs(cache, db1.get_config()["block_cache"])
+            self.assertEqual(1024 * 1024, db1.get_config()["block_cache_size"])
+
+            for db in (db1, db2):
+                db.put_batch(full_db)
+                db.compact()
+            self.assertEqual(full_db, dict(db1.items()))
+            self.assertEqual(full_db, dict(db2.items()))
+            usage = cache.usage
+            self.assertGreater(usage, 0)
+            self.assertLessEqual(usage, cache.capacity)
+
+            cache.capacity = 16 * 1024
+            self.assertEqual(16 * 1024, cache.capacity)
+            self.assertEqual(16 * 1024, db2.get_config()["block_cache_size"])
+            self.assertLess(cache.usage, usage)
+            self.assertLessEqual(cache.usage, 16 * 1024 + 4096)
+            self.assertEqual(full_db, dict(db1.items()))
+
+            cache.capacity = 0
+            self.assertEqual(0, cache.usage)
+            self.assertEqual(full_db, dict(db2.items()))
+            self.assertEqual(0, cache.usage)
+
+            db1.close()
+            db2.close()
+
     def test_read_write(self) -> None:
         with TemporaryDirectory() as path:
             db = LevelDB(path, True)
@@ -68,6 +172,693 @@ class LevelDBTestCase(unittest.TestCase):
 
             db.close()
 
+    def test_iterate_range(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put_batch({b"a": b"1", b"b": b"2", b"c": b"3", b"d": b"4"})
+
+            def keys(
+                start: bytes | None = None,
+                end: bytes | None = None,
+                *,
+                start_inclusive: bool = True,
+                end_inclusive: bool = False,
+                reverse: bool = False,
+            ) -> list[bytes]:
+                return [
+                    k
+                    for k, _ in db.iterate(
+                        start,
+                        end,
+                        start_inclusive=start_inclusive,
+                        end_inclusive=end_inclusive,
+                        reverse=reverse,
+                    )
+                ]
+
+            self.assertEqual([b"b", b"c"], keys(b"b", b"d"))
+            self.assertEqual([b"c"], keys(b"b", b"d", start_inclusive=False))
+            self.assertEqual([b"b", b"c", b"d"], keys(b"b", b"d", end_inclusive=True))
+            self.assertEqual([b"c", b"b"], keys(b"b", b"d", reverse=True))
+            self.assertEqual(
+                [b"d", b"c", b"b"], keys(b"b", b"d", reverse=True, end_inclusive=True)
+            )
+            self.assertEqual(
+                [b"c"], keys(b"b", b"d", reverse=True, start_inclusive=False)
+            )
+            self.assertEqual([b"d", b"c", b"b", b"a"], keys(reverse=True))
+            self.assertEqual([b"d", b"c"], keys(b"bb", reverse=True))
+            self.assertEqual([b"c", b"b", b"a"], keys(None, b"cc", reverse=True))
+            self.assertEqual([b"d", b"c"], keys(b"c", b"z", reverse=True))
+            self.assertEqual([], keys(b"d", b"b"))
+            self.assertEqual([], keys(b"d", b"b", reverse=True))
+            self.assertEqual([(b"b", b"2")], list(db.iterate(b"b", b"c")))
+            db.close()
+
+    def test_iterate_prefix(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            data = {
+                b"a": b"1",
+                b"ab": b"2",
+                b"ab\xff": b"3",
+                b"ab\xff\xff": b"4",
+                b"ac": b"5",
+                b"\xff": b"6",
+                b"\xff\x00": b"7",
+            }
+            db.put_batch(data)
+
+            self.assertEqual(
+                [(b"ab", b"2"), (b"ab\xff", b"3"), (b"ab\xff\xff", b"4")],
+                list(db.iterate_prefix(b"ab")),
+            )
+            self.assertEqual(
+                [b"ab\xff\xff", b"ab\xff", b"ab"],
+                [k for k, _ in db.iterate_prefix(b"ab", reverse=True)],
+            )
+            self.assertEqual(
+                [b"\xff", b"\xff\x00"], [k for k, _ in db.iterate_prefix(b"\xff")]
+            )
+            self.assertEqual(
+                [b"\xff\x00", b"\xff"],
+                [k for k, _ in db.iterate_prefix(b"\xff", reverse=True)],
+            )
+            self.assertEqual([], list(db.iterate_prefix(b"b")))
+            self.assertEqual(data, dict(db.iterate_prefix(b"")))
+            with self.assertRaises(TypeError):
+                db.iterate_prefix("ab")  # type: ignore
+
+            with db.snapshot() as snapshot:
+                db.put(b"ad", b"8")
+                self.assertEqual(
+                    [b"ac", b"ab\xff\xff", b"ab\xff", b"ab", b"a"],
+                    [k for k, _ in snapshot.iterate_prefix(b"a", reverse=True)],
+                )
+                self.assertEqual(
+                    [b"ab", b"ab\xff"],
+                    [
+                        k
+                        for k, _ in snapshot.iterate(
+                            b"ab", b"ab\xff", end_inclusive=True
+                        )
+                    ],
+                )
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.iterate_prefix(b"a")
+
+    def test_delete_range(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            data = {
+                b"a": b"1",
+                b"ab": b"2",
+                b"ab\xff": b"3",
+                b"ac": b"4",
+                b"b": b"5",
+                b"\xff": b"6",
+            }
+            db.put_batch(data)
+            self.assertEqual(2, db.delete_prefix(b"ab"))
+            self.assertEqual([b"a", b"ac", b"b", b"\xff"], list(db.keys()))
+            self.assertEqual(0, db.delete_prefix(b"ab"))
+            self.assertEqual(2, db.delete_range(b"ac", b"\xff"))
+            self.assertEqual([b"a", b"\xff"], list(db.keys()))
+            self.assertEqual(1, db.delete_prefix(b"\xff", sync=True))
+            self.assertEqual(1, db.delete_range())
+            self.assertEqual([], list(db.keys()))
+            with self.assertRaises(ValueError):
+                db.delete_range(max_batch_size=0)
+
+            # Delete in many small batches and compact.
+            db.put_batch(
+                {struct.pack(">Q", i): b"\x00" * 100 for i in range(0, 100_000)}
+            )
+            self.assertEqual(
+                50_000,
+                db.delete_range(
+                    None,
+                    struct.pack(">Q", 50_000),
+                    compact=True,
+                    max_batch_size=1024,
+                ),
+            )
+            self.assertEqual(
+                list(range(50_000, 100_000)),
+                [struct.unpack(">Q", key)[0] for key in db.keys()],
+            )
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.delete_range()
+            with self.assertRaises(RuntimeError):
+                db.delete_prefix(b"a")
+
+    def test_iterate_limit(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put_batch(num_db)
+            keys = sorted(num_keys)
+
+            self.assertEqual(
+                list(reversed(keys[-10:])),
+                list(db.iterate_keys(reverse=True, limit=10)),
+            )
+            self.assertEqual(
+                list(reversed(keys[90:100])),
+                list(db.iterate_keys(end=keys[100], reverse=True, limit=10)),
+            )
+            self.assertEqual(keys[5:8], list(db.iterate_values(keys[5], limit=3)))
+            self.assertEqual([(k, k) for k in keys[:2]], list(db.iterate(limit=2)))
+            self.assertEqual([], list(db.iterate(limit=0)))
+            self.assertEqual(
+                keys[:5],
+                list(db.iterate_keys(None, keys[5], limit=10)),
+            )
+            self.assertEqual(
+                [(keys[1], keys[1])],
+                list(db.iterate_prefix(keys[1][:-1], limit=1)),
+            )
+
+            with db.snapshot() as snapshot:
+                db.delete(keys[-1])
+                self.assertEqual(
+                    [keys[-1]],
+                    list(snapshot.iterate_keys(reverse=True, limit=1)),
+                )
+            self.assertEqual([keys[-2]], list(db.iterate_keys(reverse=True, limit=1)))
+            db.close()
+
+    def test_approximate_size(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            self.assertEqual(0, db.approximate_size())
+            self.assertEqual(0, db.estimate_count())
+
+            for i in range(0, 200_000, 10_000):
+                db.put_batch(
+                    {
+                        struct.pack(">Q", j): struct.pack(">Q", j) * 10
+                        for j in range(i, i + 10_000)
+                    }
+                )
+            db.compact()
+            start = struct.pack(">Q", 50_000)
+            end = struct.pack(">Q", 150_000)
+
+            total = db.approximate_size()
+            self.assertGreater(total, 1_000_000)
+            self.assertEqual(total, db.approximate_size(None, b"\xff"))
+            half = db.approximate_size(start, end)
+            self.assertLess(total * 0.4, half)
+            self.assertLess(half, total * 0.6)
+            self.assertEqual(0, db.approximate_size(end, start))
+            self.assertEqual(
+                [total, half, 0, total],
+                db.approximate_sizes(
+                    [(None, None), (start, end), (end, start), (b"", None)]
+                ),
+            )
+
+            self.assertEqual(100, db.estimate_count(start, struct.pack(">Q", 50_100)))
+            self.assertEqual(
+                5_000,
+                db.estimate_count(start, struct.pack(">Q", 55_000), sample_size=5_000),
+            )
+            estimate = db.estimate_count(start, end)
+            self.assertLess(80_000, estimate)
+            self.assertLess(estimate, 120_000)
+            estimate = db.estimate_count()
+            self.assertLess(160_000, estimate)
+            self.assertLess(estimate, 240_000)
+            self.assertEqual(0, db.estimate_count(end, start))
+            with self.assertRaises(ValueError):
+                db.estimate_count(sample_size=0)
+
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.approximate_size()
+            with self.assertRaises(RuntimeError):
+                db.approximate_sizes([(None, None)])
+            with self.assertRaises(RuntimeError):
+                db.estimate_count()
+
+    def test_parallel_scan(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            self.assertEqual([(None, None)], db.split_range())
+            for i in range(0, 200_000, 10_000):
+                db.put_batch(
+                    {
+                        struct.pack(">Q", j): struct.pack(">Q", j) * 10
+                        for j in range(i, i + 10_000)
+                    }
+                )
+            db.compact()
+            start = struct.pack(">Q", 50_000)
+            end = struct.pack(">Q", 150_000)
+
+            ranges = db.split_range(start, end, 4)
+            self.assertEqual(4, len(ranges))
+            self.assertEqual(start, ranges[0][0])
+            self.assertEqual(end, ranges[-1][1])
+            for (_, range_end), (range_start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(range_end, range_start)
+            sizes = db.approximate_sizes(ranges)
+            self.assertLess(max(sizes), min(sizes) * 2)
+            ranges = db.split_range(count=10)
+            self.assertEqual(10, len(ranges))
+            self.assertIsNone(ranges[0][0])
+            self.assertIsNone(ranges[-1][1])
+            self.assertEqual([(None, None)], db.split_range(count=1))
+            with self.assertRaises(ValueError):
+                db.split_range(count=0)
+
+            items: list[tuple[bytes, bytes]] = []
+            db.parallel_scan(start, end, items.extend, workers=4, batch_size=100)
+            self.assertEqual(
+                [
+                    (struct.pack(">Q", i), struct.pack(">Q", i) * 10)
+                    for i in range(50_000, 150_000)
+                ],
+                sorted(items),
+            )
+            items.clear()
+            db.parallel_scan(None, None, items.extend)
+            self.assertEqual(200_000, len(set(items)))
+
+            def fail(batch: list[tuple[bytes, bytes]]) -> None:
+                raise ZeroDivisionError
+
+            with self.assertRaises(ZeroDivisionError):
+                db.parallel_scan(None, None, fail)
+            with self.assertRaises(ValueError):
+                db.parallel_scan(None, None, items.extend, workers=0)
+
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.split_range()
+            with self.assertRaises(RuntimeError):
+                db.parallel_scan(None, None, items.extend)
+
+    def test_value_cache(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True, value_cache_size=1024 * 1024)
+            db.put_batch(full_db)
+            stats = db.stats()
+            self.assertEqual(1024 * 1024, stats["value_cache_capacity"])
+            self.assertEqual(0, stats["value_cache_usage"])
+
+            self.assertEqual(b"val1", db.get(b"key1"))
+            self.assertEqual(b"val1", db[b"key1"])
+            stats = db.stats()
+            self.assertEqual(1, stats["value_cache_hits"])
+            self.assertEqual(1, stats["value_cache_misses"])
+            self.assertGreater(stats["value_cache_usage"], 0)
+
+            # Writes remove the modified keys from the cache.
+            db.put(b"key1", b"new1")
+            self.assertEqual(b"new1", db.get(b"key1"))
+            db.put_batch({b"key1": b"new2"})
+            self.assertEqual(b"new2", db.get(b"key1"))
+            batch = WriteBatch()
+            batch.put(b"key1", b"new3")
+            db.write(batch)
+            self.assertEqual(b"new3", db.get(b"key1"))
+            db.delete(b"key1")
+            with self.assertRaises(KeyError):
+                db.get(b"key1")
+
+            self.assertEqual(
+                [b"val2", b"val3", None], db.get_many([b"key2", b"key3", b"key1"])
+            )
+            self.assertEqual(
+                [b"val2", b"val3", None], db.get_many([b"key2", b"key3", b"key1"])
+            )
+            db.delete_prefix(b"key")
+            self.assertEqual([None, None], db.get_many([b"key2", b"key3"]))
+            db.close()
+
+            db = LevelDB(path, value_cache_size=16 * 1024)
+            for i in range(100):
+                db.put(struct.pack(">i", i), b"\x00" * 100)
+            for i in range(100):
+                self.assertEqual(b"\x00" * 100, db.get(struct.pack(">i", i)))
+            self.assertLessEqual(db.stats()["value_cache_usage"], 16 * 1024)
+            db.close()
+
+    def test_metrics(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            self.assertEqual({}, db.metrics())
+            db.reset_metrics()
+            db.close()
+
+            db = LevelDB(path, metrics=True)
+            metrics = db.metrics()
+            self.assertEqual(1, metrics["open"]["count"])
+            self.assertEqual(0, metrics["repair"]["count"])
+            self.assertEqual(0, metrics["get"]["count"])
+            self.assertIsNone(metrics["get"]["p50"])
+
+            db.put_batch(full_db)
+            for key in list(full_db)[:100]:
+                db.put(key, key)
+                db.get(key)
+            db.delete(b"key1")
+            db.get_many([b"key2", b"key3"])
+            list(db.iterate(limit=10))
+            list(db.iterate_batches(batch_size=100))
+            db.compact_range(b"key0", b"key5")
+
+            metrics = db.metrics()
+            self.assertEqual(100, metrics["get"]["count"])
+            self.assertEqual(100, metrics["put"]["count"])
+            self.assertEqual(1, metrics["delete"]["count"])
+            self.assertEqual(1, metrics["get_many"]["count"])
+            self.assertEqual(1, metrics["write"]["count"])
+            self.assertEqual(2, metrics["seek"]["count"])
+            self.assertEqual(9, metrics["next"]["count"])
+            self.assertGreater(metrics["next_batch"]["count"], 0)
+            self.assertEqual(1, metrics["compact"]["count"])
+            get = metrics["get"]
+            self.assertLessEqual(get["min"], get["p50"])
+            self.assertLessEqual(get["p50"], get["p99"])
+            self.assertLessEqual(get["p99"], get["max"])
+            self.assertAlmostEqual(get["total"] / 100, get["mean"])
+
+            db.reset_metrics()
+            self.assertTrue(all(m["count"] == 0 for m in db.metrics().values()))
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.metrics()
+
+    def test_io_stats(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            self.assertEqual({}, db.io_stats())
+            db.close()
+
+            db = LevelDB(path, io_stats=True, write_buffer_size=64 * 1024, sync=True)
+            db.put_batch(full_db)
+            db.compact()
+            db.close()
+            db = LevelDB(path, io_stats=True)
+            self.assertEqual(full_db, dict(db.items()))
+            stats = db.io_stats()
+            self.assertGreater(stats["table"]["read_bytes"], 0)
+            self.assertGreater(stats["table"]["reads"], 0)
+            self.assertEqual(0, stats["throttled_time"])
+            db.close()
+
+            db = LevelDB(path, io_stats=True, write_buffer_size=64 * 1024, sync=True)
+            db.put(b"key", b"value")
+            stats = db.io_stats()
+            self.assertGreater(stats["log"]["write_bytes"], 0)
+            self.assertGreater(stats["log"]["syncs"], 0)
+            db.close()
+
+        with TemporaryDirectory() as path:
+            db = LevelDB(
+                path,
+                True,
+                write_buffer_size=64 * 1024,
+                compaction_write_rate=128 * 1024,
+            )
+            db.put_batch({struct.pack(">Q", i): os.urandom(100) for i in range(2000)})
+            db.compact()
+            stats = db.io_stats()
+            self.assertGreater(stats["table"]["write_bytes"], 0)
+            self.assertGreater(stats["throttled_time"], 0)
+            db.close()
+
+    def test_stats(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True, write_buffer_size=64 * 1024)
+            self.assertIsNone(db.get_property("leveldb.unknown"))
+            self.assertEqual("0", db.get_property("leveldb.num-files-at-level0"))
+            stats = db.stats()
+            levels = stats["levels"]
+            assert isinstance(levels, list)
+            self.assertEqual(7, len(levels))
+            self.assertEqual(0, stats["files"])
+            self.assertIsNone(stats["write_amplification"])
+            self.assertEqual(40 * 1024 * 1024, stats["block_cache_capacity"])
+
+            for i in range(0, 100_000, 10_000):
+                db.put_batch(
+                    {struct.pack(">Q", j): b"\x00" * 100 for j in range(i, i + 10_000)}
+                )
+            db.compact()
+            list(db.iterate_batches())
+            stats = db.stats()
+            levels = stats["levels"]
+            assert isinstance(levels, list)
+            self.assertGreater(stats["files"], 0)
+            self.assertEqual(stats["files"], sum(l["files"] for l in levels))
+            self.assertEqual(stats["size"], sum(l["size"] for l in levels))
+            for level, level_stats in enumerate(levels):
+                self.assertEqual(
+                    str(level_stats["files"]),
+                    db.get_property(f"leveldb.num-files-at-level{level}"),
+                )
+            self.assertGreaterEqual(stats["read_amplification"], 1)
+            self.assertGreater(stats["block_cache_usage"], 0)
+            self.assertGreater(stats["memory_usage"], 0)
+            self.assertIn("Compactions", db.get_property("leveldb.stats") or "")
+            db.close()
+
+            with self.assertRaises(RuntimeError):
+                db.get_property("leveldb.stats")
+            with self.assertRaises(RuntimeError):
+                db.stats()
+
+    def test_iterate_batches(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put_batch(full_db)
+
+            batches = list(db.iterate_batches(batch_size=999))
+            self.assertTrue(all(0 < len(batch) <= 999 for batch in batches))
+            self.assertEqual(list(db.iterate()), [i for b in batches for i in b])
+
+            batches = list(db.iterate_batches(b"key", b"key5", batch_size=100))
+            self.assertEqual(
+                list(db.iterate(b"key", b"key5")), [i for b in batches for i in b]
+            )
+
+            # The items in num_db are 8 + 8 bytes.
+            batches = list(
+                db.iterate_batches(num_keys[0], b"key", max_bytes=16 * 10 + 8)
+            )
+            self.assertTrue(all(len(batch) == 10 for batch in batches[:-1]))
+            self.assertEqual(sum(k < b"key" for k in num_keys), sum(map(len, batches)))
+            batches = list(db.iterate_batches(max_bytes=1))
+            self.assertTrue(all(len(batch) == 1 for batch in batches))
+            self.assertEqual(len(full_db), len(batches))
+
+            self.assertEqual([], list(db.iterate_batches(b"key", b"key")))
+            with self.assertRaises(ValueError):
+                db.iterate_batches(batch_size=0)
+
+            it = db.iterate_batches()
+            db.close()
+            with self.assertRaises(RuntimeError):
+                next(it)
+            with self.assertRaises(RuntimeError):
+                db.iterate_batches()
+
+    def test_iterate_keys(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put_batch(full_db)
+
+            self.assertEqual(list(db.keys()), list(db.iterate_keys()))
+            self.assertEqual(
+                [k for k, _ in db.iterate(b"key", b"key5")],
+                list(db.iterate_keys(b"key", b"key5")),
+            )
+            self.assertEqual(
+                sorted(k for k in incr_db if k.startswith(b"key99")),
+                list(db.iterate_keys_prefix(b"key99")),
+            )
+            self.assertEqual(
+                [b"key9999", b"key9998"],
+                list(db.iterate_keys_prefix(b"key99", reverse=True, limit=2)),
+            )
+
+            batches = list(db.iterate_key_batches(batch_size=999))
+            self.assertTrue(all(0 < len(batch) <= 999 for batch in batches))
+            self.assertEqual(list(db.keys()), [k for b in batches for k in b])
+            batches = list(db.iterate_key_batches(num_keys[0], b"key", max_bytes=80))
+            self.assertTrue(all(len(batch) == 10 for batch in batches[:-1]))
+            self.assertEqual(
+                [k for k, _ in db.iterate(num_keys[0], b"key")],
+                [k for b in batches for k in b],
+            )
+            with self.assertRaises(ValueError):
+                db.iterate_key_batches(batch_size=0)
+
+            with db.snapshot() as snapshot:
+                db.delete(b"key99")
+                self.assertIn(b"key99", list(snapshot.iterate_keys_prefix(b"key99")))
+            self.assertNotIn(b"key99", list(db.iterate_keys_prefix(b"key99")))
+
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.iterate_keys_prefix(b"key")
+            with self.assertRaises(RuntimeError):
+                db.iterate_key_batches()
+
+    def test_write_batch(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+
+            batch = WriteBatch()
+            self.assertEqual(0, len(batch))
+            empty_size = batch.approximate_size()
+            batch.put(b"a", b"1")
+            batch.put(b"b", b"2")
+            batch.delete(b"a")
+            batch.put(b"c", b"3")
+            self.assertEqual(4, len(batch))
+            self.assertGreater(batch.approximate_size(), empty_size)
+            db.write(batch)
+            self.assertEqual({b"b": b"2", b"c": b"3"}, dict(db.items()))
+
+            # Writing does not clear the batch.
+            self.assertEqual(4, len(batch))
+            batch.clear()
+            self.assertEqual(0, len(batch))
+            self.assertEqual(empty_size, batch.approximate_size())
+
+            batch.put_many(num_db.items())
+            batch.put_many([(b"d", b"4")])
+            self.assertEqual(len(num_db) + 1, len(batch))
+            with self.assertRaises(TypeError):
+                batch.put_many([b"e"])  # type: ignore
+            with self.assertRaises(TypeError):
+                batch.put_many([("e", "5")])  # type: ignore
+
+            other = WriteBatch()
+            other.delete(b"d")
+            other.put(b"e", b"5")
+            batch.append(other)
+            self.assertEqual(len(num_db) + 3, len(batch))
+            other.append(other)
+            self.assertEqual(4, len(other))
+            db.write(batch, sync=True)
+            self.assertEqual(
+                {b"b": b"2", b"c": b"3", b"e": b"5", **num_db}, dict(db.items())
+            )
+
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.write(batch)
+
+    def test_sync(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True, sync=True)
+            db.put(b"a", b"1")
+            db.put(b"b", b"2", sync=False)
+            db.put_batch({b"c": b"3"}, sync=True)
+            db.delete(b"a", sync=False)
+            db[b"d"] = b"4"
+            del db[b"d"]
+            self.assertEqual({b"b": b"2", b"c": b"3"}, dict(db.items()))
+            db.close()
+
+            db = LevelDB(path)
+            self.assertEqual({b"b": b"2", b"c": b"3"}, dict(db.items()))
+            db.close()
+
+    def test_bulk_import(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put(b"a", b"1")
+
+            with db.bulk_import(max_batch_size=64 * 1024) as bulk:
+                bulk.put_many(full_db.items())
+
+                def pairs() -> Iterator[tuple[bytes, bytes]]:
+                    # The iterable may use the same import.
+                    for key, value in incr_db.items():
+                        bulk.put(key, value)
+                        yield key, value
+
+                bulk.put_many(pairs())
+                bulk.put(b"b", b"2")
+                bulk.delete(b"a")
+                with self.assertRaises(TypeError):
+                    bulk.put_many([b"e"])  # type: ignore
+            self.assertEqual({b"b": b"2", **full_db}, dict(db.items()))
+            with self.assertRaises(RuntimeError):
+                bulk.put(b"c", b"3")
+            # Finishing twice does nothing.
+            bulk.finish()
+            db.close()
+
+            db = LevelDB(path)
+            self.assertEqual({b"b": b"2", **full_db}, dict(db.items()))
+            bulk = db.bulk_import(compact=False)
+            bulk.put(b"c", b"3")
+            db.close()
+            with self.assertRaises(RuntimeError):
+                bulk.finish()
+            with self.assertRaises(RuntimeError):
+                db.bulk_import()
+
+    def test_bulk_loader(self) -> None:
+        with TemporaryDirectory() as path:
+            with self.assertRaises(LevelDBException):
+                BulkLoader(os.path.join(path, "missing"))
+
+            with BulkLoader(path, True, max_file_size=64 * 1024) as loader:
+
+                def pairs() -> Iterator[tuple[bytes, bytes]]:
+                    # The iterable may use the same loader.
+                    for i, item in enumerate(sorted(full_db.items())):
+                        self.assertLessEqual(len(loader), i)
+                        yield item
+
+                loader.add_many(pairs())
+                self.assertEqual(len(full_db), len(loader))
+                with self.assertRaises(ValueError):
+                    loader.add(num_keys[0], b"")
+                with self.assertRaises(LevelDBException):
+                    LevelDB(path)
+            with self.assertRaises(RuntimeError):
+                loader.add(b"\xff", b"")
+
+            db = LevelDB(path)
+            self.assertEqual(full_db, dict(db.items()))
+            self.assertEqual(incr_db[b"key5"], db.get(b"key5"))
+            db.put(b"a", b"1")
+            db.put(b"b", b"2")
+            with self.assertRaises(LevelDBException):
+                BulkLoader(path)
+            db.close()
+
+            # Loaded values replace existing values.
+            loader = BulkLoader(path)
+            loader.add(b"a", b"3")
+            loader.add(b"c", b"4")
+            loader.finish()
+            db = LevelDB(path)
+            self.assertEqual(b"3", db.get(b"a"))
+            self.assertEqual(b"2", db.get(b"b"))
+            self.assertEqual(b"4", db.get(b"c"))
+            db.close()
+
+            # Abandoned data is not added.
+            with self.assertRaises(KeyError):
+                with BulkLoader(path) as loader:
+                    loader.add(b"d", b"5")
+                    raise KeyError
+            db = LevelDB(path)
+            self.assertNotIn(b"d", db)
+            db.close()
+
     def test_get_set_item(self) -> None:
         with TemporaryDirectory() as path:
             db = LevelDB(path, True)
@@ -80,6 +871,110 @@ class LevelDBTestCase(unittest.TestCase):
 
             db.close()
 
+    def test_get_view(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+
+            with self.assertRaises(KeyError):
+                db.get_view(b"random_key")
+
+            value = b"value" * 1000
+            db.put(b"key", value)
+            view = db.get_view(b"key")
+            self.assertIsInstance(view, memoryview)
+            self.assertTrue(view.readonly)
+            self.assertEqual("B", view.format)
+            self.assertEqual(value, view)
+            self.assertEqual(value, bytes(view))
+            with self.assertRaises(TypeError):
+                view[0] = 0  # type: ignore
+
+            # The view owns its data.
+            db.put(b"key", b"new_value")
+            db.close()
+            self.assertEqual(value, view.tobytes())
+
+            with self.assertRaises(RuntimeError):
+                db.get_view(b"key")
+
+    def test_get_many(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put_batch(num_db)
+
+            keys = [num_keys[0], b"missing", num_keys[500], num_keys[0]]
+            self.assertEqual(
+                [num_keys[0], None, num_keys[500], num_keys[0]], db.get_many(keys)
+            )
+            sentinel = object()
+            self.assertIs(sentinel, db.get_many(keys, sentinel)[1])
+            self.assertEqual([], db.get_many([]))
+            self.assertEqual(list(num_db.values()), db.get_many(num_keys))
+            with self.assertRaises(TypeError):
+                db.get_many(["key"])  # type: ignore
+
+            db.close()
+
+    def test_snapshot(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put_batch({b"a": b"1", b"b": b"2", b"c": b"3"})
+
+            with db.snapshot() as snapshot:
+                db.put(b"a", b"4")
+                db.delete(b"b")
+                db.put(b"d", b"5")
+
+                self.assertEqual(b"1", snapshot.get(b"a"))
+                self.assertEqual(b"2", snapshot.get(b"b"))
+                with self.assertRaises(KeyError):
+                    snapshot.get(b"d")
+                self.assertEqual(
+                    [b"1", b"2", b"3", None],
+                    snapshot.get_many([b"a", b"b", b"c", b"d"]),
+                )
+                self.assertEqual(
+                    [(b"a", b"1"), (b"b", b"2"), (b"c", b"3")],
+                    list(snapshot.iterate()),
+                )
+                self.assertEqual([(b"b", b"2")], list(snapshot.iterate(b"b", b"c")))
+                it = snapshot.create_iterator()
+                it.seek_to_last()
+                self.assertEqual(b"c", it.key())
+
+            # The iterator outlives the snapshot.
+            it.prev()
+            self.assertEqual(b"b", it.key())
+
+            with self.assertRaises(RuntimeError):
+                snapshot.get(b"a")
+            with self.assertRaises(RuntimeError):
+                snapshot.get_many([b"a"])
+            with self.assertRaises(RuntimeError):
+                snapshot.iterate()
+            with self.assertRaises(RuntimeError):
+                snapshot.create_iterator()
+            snapshot.release()
+
+            self.assertEqual(
+                {b"a": b"4", b"c": b"3", b"d": b"5"},
+                dict(db.iterate()),
+            )
+
+            # Closing the database releases the snapshot.
+            snapshot = db.snapshot()
+            it_i = snapshot.iterate()
+            db.close()
+            with self.assertRaises(RuntimeError):
+                snapshot.get(b"a")
+            with self.assertRaises(RuntimeError):
+                next(it_i)
+            with self.assertRaises(RuntimeError):
+                it.key()
+            snapshot.release()
+            with self.assertRaises(RuntimeError):
+                db.snapshot()
+
     def test_contains(self) -> None:
         with TemporaryDirectory() as path:
             db = LevelDB(path, True)
@@ -92,6 +987,22 @@ class LevelDBTestCase(unittest.TestCase):
 
             db.close()
 
+    def test_contains_many(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            db.put_batch(num_db)
+            db.put(b"large", b"\x00" * 2_000_000)
+
+            self.assertEqual(
+                [True, False, True, True],
+                db.contains_many([num_keys[0], b"missing", num_keys[-1], b"large"]),
+            )
+            self.assertEqual([], db.contains_many([]))
+            self.assertTrue(all(db.contains_many(num_keys)))
+            self.assertTrue(b"large" in db)
+
+            db.close()
+
     def test_delete(self) -> None:
         with TemporaryDirectory() as path:
             db = LevelDB(path, True)
@@ -130,6 +1041,8 @@ class LevelDBTestCase(unittest.TestCase):
                 db.get(b"key")
             with self.assertRaises(RuntimeError):
                 _ = db[b"key"]
+            with self.assertRaises(RuntimeError):
+                db.get_many([b"key"])
             with self.assertRaises(RuntimeError):
                 db.put(b"key", b"value")
             with self.assertRaises(RuntimeError):
@@ -150,6 +1063,8 @@ class LevelDBTestCase(unittest.TestCase):
                 list(db.items())
             with self.assertRaises(RuntimeError):
                 _ = b"key" in db
+            with self.assertRaises(RuntimeError):
+                db.contains_many([b"key"])
             with self.assertRaises(RuntimeError):
                 list(db)
 
@@ -260,6 +1175,65 @@ class LevelDBTestCase(unittest.TestCase):
             finally:
                 db.close()
 
+    def test_read_only(self) -> None:
+        with TemporaryDirectory() as path:
+            with self.assertRaises(LevelDBException):
+                LevelDB(path, read_only=True)
+            with self.assertRaises(ValueError):
+                LevelDB(path, True, read_only=True)
+
+            db = LevelDB(path, True, write_buffer_size=64 * 1024)
+            db.put_batch(num_db)
+            db.compact()
+            db.put_batch(incr_db)
+            db.close()
+
+            def get_files() -> dict[str, tuple[int, float]]:
+                return {
+                    item.name: (item.stat().st_size, item.stat().st_mtime)
+                    for item in os.scandir(path)
+                }
+
+            files = get_files()
+            db = LevelDB(path, read_only=True)
+            self.assertTrue(db.get_config()["read_only"])
+            self.assertEqual(full_db, dict(db.items()))
+            for write in (
+                lambda: db.put(b"key", b"value"),
+                lambda: db.delete(b"key0"),
+                lambda: db.put_batch({b"key": b"value"}),
+                lambda: db.write(WriteBatch()),
+                lambda: db.delete_range(),
+                lambda: db.bulk_import(),
+                lambda: db.compact(),
+                lambda: db.compact_range(),
+                lambda: db.compact_async(),
+            ):
+                with self.assertRaises(LevelDBException):
+                    write()
+            self.assertEqual(full_db, dict(db.items()))
+            self.assertEqual(files, get_files())
+
+            # Read only databases can be opened while a writer is open.
+            # This is only safe here because the writer does not compact away the tables they use.
+            db2 = LevelDB(path, read_only=True)
+            writer = LevelDB(path)
+            writer.put(b"key", b"value")
+            db3 = LevelDB(path, read_only=True)
+            self.assertEqual(b"value", db3.get(b"key"))
+            self.assertEqual(full_db, dict(db2.items()))
+            self.assertNotIn(b"key", db)
+            writer.close()
+            db.close()
+            db2.close()
+            db3.close()
+
+            files = get_files()
+            db = LevelDB(path, read_only=True)
+            self.assertEqual(b"value", db.get(b"key"))
+            db.close()
+            self.assertEqual(files, get_files())
+
     def test_compact(self) -> None:
         with TemporaryDirectory() as path:
             db = LevelDB(path, True)
@@ -282,6 +1256,52 @@ class LevelDBTestCase(unittest.TestCase):
 
             self.assertLess(get_directory_size(path), 10_000)
 
+    def test_compact_range(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True, write_buffer_size=64 * 1024)
+            try:
+                for i in range(0, 100_000, 10_000):
+                    db.put_batch(
+                        {
+                            struct.pack(">Q", j): b"\x00" * 100
+                            for j in range(i, i + 10_000)
+                        }
+                    )
+                db.compact_range(struct.pack(">Q", 0), struct.pack(">Q", 50_000))
+                db.compact_range()
+                with self.assertRaises(ValueError):
+                    db.compact_async(partition_size=0)
+
+                for key in db.iterate_keys(end=struct.pack(">Q", 50_000)):
+                    db.delete(key)
+                compaction = db.compact_async(
+                    None, struct.pack(">Q", 50_000), partition_size=64 * 1024
+                )
+                self.assertTrue(compaction.wait(60))
+                self.assertTrue(compaction.done)
+                self.assertFalse(compaction.cancelled)
+                self.assertEqual(1.0, compaction.progress)
+                self.assertEqual(
+                    list(range(50_000, 100_000)),
+                    [struct.unpack(">Q", key)[0] for key in db.keys()],
+                )
+
+                compaction = db.compact_async(partition_size=1024)
+                compaction.cancel()
+                self.assertTrue(compaction.cancelled)
+                self.assertTrue(compaction.wait())
+                self.assertLessEqual(compaction.progress, 1.0)
+
+                # Closing the database stops running compactions.
+                compaction = db.compact_async(partition_size=1024)
+            finally:
+                db.close()
+            self.assertTrue(compaction.wait(0))
+            with self.assertRaises(RuntimeError):
+                db.compact_range()
+            with self.assertRaises(RuntimeError):
+                db.compact_async()
+
     def test_corrupt(self) -> None:
         """Test how the library handles a corrupt db."""
         with TemporaryDirectory() as path:
@@ -304,6 +1324,52 @@ class LevelDBTestCase(unittest.TestCase):
             finally:
                 db.close()
 
+    def test_repair_mode(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            try:
+                for _ in range(100_000):
+                    key = str(uuid4()).encode()
+                    db.put(key, key)
+                # Finish flushing the memtable so that every table file is in the manifest.
+                db.compact()
+            finally:
+                db.close()
+
+            os.remove(next(glob.iglob(os.path.join(glob.escape(path), "*.ldb"))))
+
+            with self.assertRaises(ValueError):
+                LevelDB(path, repair="background")
+            with self.assertRaises(LevelDBException):
+                LevelDB(path, repair="never")
+
+            LevelDB.repair(path)
+            db = LevelDB(path, repair="never")
+            try:
+                self.assertGreater(len(list(db.keys())), 10)
+                self.assertFalse(db.open_info()["repaired"])
+            finally:
+                db.close()
+
+    def test_open_info(self) -> None:
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            info = db.open_info()
+            self.assertFalse(info["repaired"])
+            self.assertIsNone(info["repair_time"])
+            self.assertEqual(0, info["table_files"])
+            self.assertGreaterEqual(info["total_time"], info["open_time"])
+            db.put_batch(full_db)
+            db.close()
+            with self.assertRaises(RuntimeError):
+                db.open_info()
+
+            db = LevelDB(path)
+            info = db.open_info()
+            self.assertEqual(1, info["log_files"])
+            self.assertGreater(info["log_bytes"], 0)
+            db.close()
+
     def test_iterator_lifespan(self) -> None:
         with TemporaryDirectory() as path:
             db = LevelDB(path, True)
@@ -517,6 +1583,66 @@ class LevelDBTestCase(unittest.TestCase):
             db.close()
             self.assertEqual(m, m2)
 
+    def test_thread_snapshot_close(self) -> None:
+        with TemporaryDirectory() as path:
+            for _ in range(200):
+                db = LevelDB(path, True)
+                db.put(b"key", b"value")
+                # Creating a snapshot while the database is closing is not safe
+                # so create them first and only race release against close.
+                snapshots = [db.snapshot() for _ in range(16)]
+                barrier = Barrier(len(snapshots) + 1)
+
+                def release(snapshot: Snapshot) -> None:
+                    barrier.wait()
+                    snapshot.release()
+
+                with ThreadPoolExecutor(len(snapshots)) as executor:
+                    futures = [
+                        executor.submit(release, snapshot) for snapshot in snapshots
+                    ]
+                    barrier.wait()
+                    db.close()
+                    for future in futures:
+                        future.result()
+                for snapshot in snapshots:
+                    with self.assertRaises(RuntimeError):
+                        snapshot.get(b"key")
+
+    def test_thread_iterate_close(self) -> None:
+        count = 10_000
+        with TemporaryDirectory() as path:
+            db = LevelDB(path, True)
+            for i in range(count):
+                key = struct.pack(">i", i)
+                db.put(key, key)
+
+            def read(iterator: Iterator[tuple[bytes, bytes]]) -> int:
+                read_count = 0
+                try:
+                    for _ in iterator:
+                        read_count += 1
+                except RuntimeError:
+                    pass
+                return read_count
+
+            # Creating an iterator while the database is closing is not safe
+            # so create them first and only race iteration against close.
+            iterators = []
+            for i in range(0, count, 1000):
+                iterator = db.iterate(struct.pack(">i", i))
+                next(iterator)
+                iterators.append(iterator)
+
+            with ThreadPoolExecutor() as executor:
+                futures = [executor.submit(read, iterator) for iterator in iterators]
+                db.close()
+                for future in futures:
+                    self.assertLessEqual(future.result(), count)
+
+            with self.assertRaises(RuntimeError):
+                db.get(b"0")
+
 
 if __name__ == "__main__":
     unittest.main()